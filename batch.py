@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ltbx import (
+    LETTERBOXD_BASE_URL,
+    parse_rss_feed,
+    check_username,
+    build_report,
+    write_bundle,
+    tracer,
+    HttpClient,
+    HostRateLimiter,
+    Community,
+    TwinIndex,
+)
+
+# --- BATCH WRAPPED ---
+# Headless entry point: reads a file of usernames, fetches their feeds
+# concurrently through a shared ltbx.http client (pooled connections, retries
+# with backoff, circuit breaker) and writes one analytics record per user.
+#
+#   python batch.py usernames.txt -o wrapped.jsonl --workers 16 --rate 10
+#
+# --profile traces every stage (--profile-memory adds tracemalloc peaks) and
+# writes spans.jsonl, trace.json (Chrome trace) and metrics.prom (Prometheus
+# text) to --trace-dir. --html-dir also writes each user's static report
+# (<dir>/<username>/index.html + data.json), ready to be served as files.
+# --community adds every user's summary to a community percentile file (the
+# one the app reads from LTBX_COMMUNITY_PATH), and --twins builds the twin
+# index the app loads from LTBX_TWIN_INDEX.
+
+def analyze(username, report):
+    summary = report.summary
+    return {
+        'username': username,
+        'total': summary.total,
+        'avg_rating': round(summary.avg_rating, 3),
+        'rewatch_pct': round(summary.rewatch_pct, 1),
+        'review_pct': round(summary.review_pct, 1),
+        'streak': summary.streak,
+        'max_binge': summary.max_binge,
+        'binge_date': summary.binge_date,
+        'personas': [title for title, _ in report.personas],
+        'mbti': report.mbti_code,
+        'roast': report.roast,
+    }
+
+def process_user(client, base_url, username, html_dir=None, charts="plotly", seed=None, community=None,
+                 twins=None):
+    started = time.perf_counter()
+    record = {'username': username, 'error': None, 'attempts': 0}
+    try:
+        with tracer.span("batch.user", username=username):
+            key = check_username(username)
+            with tracer.span("batch.fetch", username=username) as span:
+                response, record['attempts'] = client.fetch(f"{base_url}/{key}/rss/")
+                span.set(status=response.status_code, attempts=record['attempts'])
+            if response.status_code != 200:
+                record['error'] = f"Status {response.status_code}"
+            else:
+                with tracer.span("batch.parse", username=username):
+                    df, error = parse_rss_feed(response.content)
+                if error:
+                    record['error'] = error
+                else:
+                    with tracer.span("batch.analyze", username=username):
+                        report = build_report(df, seed=seed)
+                        record.update(analyze(username, report))
+                        if community is not None:
+                            community.ingest(username, report.summary)
+                        if twins is not None:
+                            twins.add(username, df, report.summary)
+                    if html_dir:
+                        with tracer.span("batch.render", username=username):
+                            write_bundle(html_dir, report, df, username, charts=charts)
+    except Exception as e:
+        record['error'] = str(e)
+    record['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+def write_records(records, path):
+    if path.endswith(".parquet"):
+        import pandas as pd
+        pd.DataFrame(records).to_parquet(path, index=False)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def print_summary(records, elapsed, out=sys.stderr):
+    latencies = sorted(r['latency_ms'] for r in records)
+    failed = sum(1 for r in records if r['error'])
+    attempts = sum(r['attempts'] for r in records)
+    print(f"users: {len(records)}  ok: {len(records) - failed}  failed: {failed}", file=out)
+    print(f"upstream requests: {attempts}  retries: {attempts - len(records)}", file=out)
+    print(f"elapsed: {elapsed:.2f}s  throughput: {len(records) / elapsed if elapsed else 0:.1f} users/s", file=out)
+    print(f"latency ms  p50: {percentile(latencies, 50):.0f}  p95: {percentile(latencies, 95):.0f}  "
+          f"p99: {percentile(latencies, 99):.0f}  max: {latencies[-1] if latencies else 0:.0f}", file=out)
+
+def print_trace_summary(spans, out=sys.stderr):
+    print(f"{'span':<22}{'count':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}{'peak KiB':>10}", file=out)
+    for name, row in spans.items():
+        peak = f"{row['peak_bytes'] / 1024:.0f}" if 'peak_bytes' in row else "-"
+        print(f"{name:<22}{row['count']:>8}{row['total_ms']:>12.1f}{row['mean_ms']:>10.2f}{row['max_ms']:>10.2f}{peak:>10}", file=out)
+
+def read_usernames(path):
+    with open(path, encoding="utf-8") as f:
+        names = (line.strip() for line in f)
+        return list(dict.fromkeys(n for n in names if n and not n.startswith("#")))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Wrapped reports for many Letterboxd users.")
+    parser.add_argument("usernames", help="file with one username per line")
+    parser.add_argument("-o", "--output", default="wrapped.jsonl", help="output path (.jsonl or .parquet)")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent fetches")
+    parser.add_argument("--rate", type=float, default=5.0, help="max requests per second per host (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.5, help="base backoff in seconds")
+    parser.add_argument("--base-url", default=LETTERBOXD_BASE_URL)
+    parser.add_argument("--seed", type=int, help="vary the roast picks (output is reproducible either way)")
+    parser.add_argument("--html-dir", help="also write static HTML + JSON reports here")
+    parser.add_argument("--charts", choices=["plotly", "none"], default="plotly", help="charts in the HTML reports")
+    parser.add_argument("--community", help="add every user to this community percentile file")
+    parser.add_argument("--twins", help="add every user to this twin index (.npz)")
+    parser.add_argument("--profile", action="store_true", help="trace each stage")
+    parser.add_argument("--profile-memory", action="store_true", help="also record tracemalloc peaks (slow)")
+    parser.add_argument("--trace-dir", default="profile", help="where --profile writes its traces and metrics")
+    args = parser.parse_args(argv)
+
+    if args.profile or args.profile_memory:
+        tracer.enable(memory=args.profile_memory)
+    usernames = read_usernames(args.usernames)
+    base_url = args.base_url.rstrip("/")
+    limiter = HostRateLimiter(args.rate)
+    client = HttpClient(pool_size=args.workers, retries=args.retries, backoff=args.backoff, before_request=limiter.wait)
+    community = Community(args.community) if args.community else None
+    twins = (TwinIndex.load(args.twins) if os.path.exists(args.twins) else TwinIndex()) if args.twins else None
+
+    started = time.perf_counter()
+    records = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(process_user, client, base_url, name, args.html_dir, args.charts, args.seed,
+                               community, twins)
+                   for name in usernames]
+        for future in as_completed(futures):
+            records.append(future.result())
+    elapsed = time.perf_counter() - started
+
+    order = {name: i for i, name in enumerate(usernames)}
+    records.sort(key=lambda r: order[r['username']])
+    write_records(records, args.output)
+    print_summary(records, elapsed)
+    if community is not None:
+        community.save()
+        print(f"community: {community.users} users in {args.community}", file=sys.stderr)
+    if twins is not None:
+        twins.save(args.twins)
+        print(f"twins: {len(twins)} users in {args.twins}", file=sys.stderr)
+    breakers = client.stats()['breakers'].values()
+    if any(b['trips'] for b in breakers):
+        print(f"circuit breaker opened {sum(b['trips'] for b in breakers)} time(s), "
+              f"{sum(b['rejected'] for b in breakers)} requests failed fast", file=sys.stderr)
+    if tracer.enabled:
+        print_trace_summary(tracer.summary())
+        paths = tracer.write(args.trace_dir)
+        print(f"traces: {', '.join(paths.values())}", file=sys.stderr)
+    return 0 if records and not all(r['error'] for r in records) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import argparse
+import os
+import statistics
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import make_diary_frame
+from ltbx import Rollups, report_fingerprint
+
+# --- APP RENDERING ---
+# Runs the Streamlit app headless (AppTest) on diaries of a few sizes, with
+# the heavy sections deferred into fragments (LTBX_PROGRESSIVE=1, the
+# default) and rendered in place as before (LTBX_PROGRESSIVE=0). For each it
+# reports, from the timings the app records on every rerun:
+#   first content: the header and key numbers have been sent
+#   text:          every section except the deferred ones has been sent
+#   total:         the whole page, charts and images included
+# The first run of a diary builds its report (cold); the reruns after it hit
+# the report cache (warm), which is what widget interactions cost.
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ltbxfinal.py")
+
+def run_app(df, progressive, reruns):
+    os.environ["LTBX_PROGRESSIVE"] = "1" if progressive else "0"
+    at = AppTest.from_file(APP, default_timeout=300)
+    at.session_state['data'] = df
+    at.session_state['username'] = "Your"
+    at.session_state['period'] = "All Time"
+    at.session_state['fingerprint'] = report_fingerprint(df) + ("p" if progressive else "i")
+    at.session_state['rollups'] = Rollups.from_frame(df)
+    timings = []
+    for _ in range(reruns + 1):
+        at.run()
+        assert not at.exception, [e.value for e in at.exception]
+        timings.append(at.session_state['render_timings'])
+    order = [header.value for header in at.subheader]
+    return timings[0], timings[1:], order
+
+def main():
+    parser = argparse.ArgumentParser(description="Time progressive vs in-place rendering of the app.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1_000, 10_000])
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'mode':>12} {'cold first':>11} {'cold text':>10} {'cold total':>11} "
+          f"{'warm first':>11} {'warm text':>10} {'warm total':>11}")
+    for n in args.sizes:
+        df = make_diary_frame(n, seed=n)
+        orders = []
+        for progressive in (False, True):
+            cold, warm, order = run_app(df, progressive, args.reruns)
+            orders.append(order)
+            median = lambda key: statistics.median(t[key] for t in warm)
+            print(f"{n:>7} {'progressive' if progressive else 'in place':>12} {cold['first_content_ms']:>11.1f} "
+                  f"{cold['text_ms']:>10.1f} {cold['total_ms']:>11.1f} {median('first_content_ms'):>11.1f} "
+                  f"{median('text_ms'):>10.1f} {median('total_ms'):>11.1f}")
+        # Deferring changes when sections are sent, not where they appear
+        assert orders[0] == orders[1], orders
+    os.environ.pop("LTBX_PROGRESSIVE")
+    print("\nms since the rerun started; page layout identical in both modes")
+
+if __name__ == "__main__":
+    main()
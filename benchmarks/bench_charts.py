@@ -0,0 +1,73 @@
+import argparse
+import os
+import time
+
+from benchmarks.synthetic import make_diary_frame
+from ltbx import (
+    StaticChartCache,
+    summarize,
+    chart_fingerprint,
+    rating_trend_figure,
+    rating_distribution_figure,
+    day_rhythm_figure,
+)
+
+# --- INTERACTIVE VS STATIC CHARTS ---
+# Interactive: what every rerun costs today, building the three figures and
+# serialising them to the JSON that st.plotly_chart ships to the browser.
+# Static: rendering them to images once (cold) and serving them from the
+# fingerprint cache afterwards (warm). Static numbers need kaleido + Chrome.
+
+def builders(df):
+    summary = summarize(df)
+    return {
+        'trend': lambda: rating_trend_figure(df),
+        'ratings': lambda: rating_distribution_figure(summary.rating_counts),
+        'rhythm': lambda: day_rhythm_figure(summary.day_counts),
+    }
+
+def plotly_js_bytes():
+    import plotly
+
+    path = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare payload size and render time of interactive and static charts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1_000, 10_000])
+    parser.add_argument("--format", default="svg", choices=["svg", "png"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"plotly.min.js the browser loads for interactive charts: {plotly_js_bytes() / 1024:.0f} KiB")
+    print(f"{'rows':>8} {'json KiB':>9} {'json ms':>8} {'image KiB':>10} {'cold ms':>8} {'warm ms':>8}")
+    for n in args.sizes:
+        df = make_diary_frame(n)
+        figures = builders(df)
+
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            payload = sum(len(build().to_json()) for build in figures.values())
+            best = min(best, time.perf_counter() - start)
+        json_t = best
+
+        cache = StaticChartCache(fmt=args.format)
+        start = time.perf_counter()
+        fingerprint = chart_fingerprint(df)
+        images = [cache.render(name, fingerprint, build) for name, build in figures.items()]
+        cold_t = time.perf_counter() - start
+        if not cache.available:
+            print(f"{n:>8} {payload / 1024:>9.0f} {json_t * 1000:>8.1f} {'n/a (no kaleido/Chrome)':>28}")
+            continue
+        start = time.perf_counter()
+        fingerprint = chart_fingerprint(df)
+        for name, build in figures.items():
+            cache.render(name, fingerprint, build)
+        warm_t = time.perf_counter() - start
+        image_bytes = sum(len(image) for image in images)
+        print(f"{n:>8} {payload / 1024:>9.0f} {json_t * 1000:>8.1f} {image_bytes / 1024:>10.0f} "
+              f"{cold_t * 1000:>8.1f} {warm_t * 1000:>8.2f}")
+
+if __name__ == "__main__":
+    main()
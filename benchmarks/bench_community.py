@@ -0,0 +1,78 @@
+import argparse
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from ltbx.community import Community, METRICS
+
+# --- COMMUNITY PERCENTILES ---
+# Ingests synthetic summary vectors for a large user base, then checks how far
+# the sketched percentiles are from exact ranks over the raw values and times
+# ingest, lookups and saving. The vectors are drawn directly rather than
+# summarized from diaries, so this measures the community service alone.
+
+def synthetic_users(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'total': rng.integers(1, 2_000, n).astype(float),
+        'avg_rating': np.clip(rng.normal(3.3, 0.6, n), 0.5, 5.0),
+        'rewatch_pct': np.clip(rng.gamma(1.5, 6.0, n), 0, 100),
+        'decade_diversity': rng.integers(1, 11, n).astype(float),
+        'review_pct': rng.uniform(0, 100, n),
+        'daily_variance': rng.gamma(1.2, 0.8, n),
+        'streak': rng.geometric(0.3, n).astype(float),
+    }
+
+def exact_rank(sorted_values, value):
+    lo = np.searchsorted(sorted_values, value, side='left')
+    hi = np.searchsorted(sorted_values, value, side='right')
+    return (lo + hi) / 2 / len(sorted_values)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and check community percentiles over many users.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    columns = synthetic_users(args.users)
+    community = Community()
+    start = time.perf_counter()
+    for i in range(args.users):
+        summary = SimpleNamespace(**{metric: columns[metric][i] for metric in METRICS})
+        community.ingest(f"user{i}", summary)
+    ingest = time.perf_counter() - start
+    print(f"ingested {args.users} users in {ingest:.1f}s ({args.users / ingest:,.0f} users/s)")
+    print(f"retained values per metric: {community.stats()['retained']}")
+
+    probes = synthetic_users(args.lookups, seed=1)
+    worst = {}
+    for metric in METRICS:
+        exact = np.sort(columns[metric])
+        sketch = community.sketches[metric]
+        worst[metric] = max(abs(sketch.rank(v) - exact_rank(exact, v)) for v in probes[metric][:1_000])
+    print("max rank error (percentage points): "
+          + ", ".join(f"{metric} {error * 100:.2f}" for metric, error in worst.items()))
+    assert max(worst.values()) < 0.03, worst
+
+    summaries = [SimpleNamespace(**{metric: probes[metric][i] for metric in METRICS}) for i in range(args.lookups)]
+    start = time.perf_counter()
+    for summary in summaries:
+        community.percentiles(summary)
+    lookup = time.perf_counter() - start
+    print(f"percentiles(): {lookup / args.lookups * 1e6:.1f} us per report ({len(METRICS)} metrics)")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="ltbx-community-"), "community.json")
+    start = time.perf_counter()
+    community.save(path)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    Community(path)
+    loaded = time.perf_counter() - start
+    print(f"save {saved * 1000:.1f} ms, load {loaded * 1000:.1f} ms, {os.path.getsize(path) / 1024:.1f} KiB on disk")
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
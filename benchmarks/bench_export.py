@@ -0,0 +1,71 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.synthetic import write_export_zip
+
+# --- EXPORT LOADING ---
+# Each loader runs in a fresh child process so its peak RSS isn't polluted by
+# the generator or by the other loader.
+
+def _peak_rss_mib():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def naive_load(path):
+    import zipfile
+    import pandas as pd
+
+    with zipfile.ZipFile(path) as archive:
+        diary = pd.read_csv(archive.open("diary.csv"))
+        reviews = pd.read_csv(archive.open("reviews.csv"))
+        pd.read_csv(archive.open("ratings.csv"))
+    return diary.merge(reviews[['Name', 'Year', 'Watched Date', 'Review']], how='left', on=['Name', 'Year', 'Watched Date'])
+
+def chunked_load(path):
+    from ltbx.export import load_export
+
+    df, error = load_export(path)
+    assert error is None, error
+    return df
+
+def _child(loader, path, queue):
+    try:
+        import pandas  # noqa: F401 - count the import in the baseline, not the load
+        baseline = _peak_rss_mib()
+        start = time.perf_counter()
+        df = loader(path)
+        elapsed = time.perf_counter() - start
+        queue.put((len(df), elapsed, _peak_rss_mib(), _peak_rss_mib() - baseline, df.memory_usage(deep=True).sum() / 2**20))
+    except BaseException as e:
+        queue.put(e)
+        raise
+
+def measure(loader, path):
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_child, args=(loader, path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and peak RSS for loading Letterboxd export ZIPs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'loader':>8} {'rows':>8} {'seconds':>8} {'peak MiB':>9} {'+load MiB':>10} {'frame MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = write_export_zip(os.path.join(tmp, f"export-{n}.zip"), n)
+            for name, loader in (("naive", naive_load), ("chunked", chunked_load)):
+                rows, elapsed, peak, delta, frame = measure(loader, path)
+                print(f"{n:>8} {name:>8} {rows:>8} {elapsed:>8.2f} {peak:>9.0f} {delta:>10.0f} {frame:>10.1f}")
+
+if __name__ == "__main__":
+    main()
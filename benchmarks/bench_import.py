@@ -0,0 +1,76 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# --- IMPORT TIME ---
+# Cold-start cost of getting at the analytics. Before the ltbx package, the
+# fetch/parse and statistics functions lived in ltbxfinal.py, so any worker
+# or script that wanted them paid for everything that file imports at the
+# top (Streamlit, pandas, Plotly, requests, BeautifulSoup). Each case runs in
+# a fresh interpreter under `python -X importtime`; the import time is the
+# sum of the cumulative times of the top-level imports the statement made
+# (the interpreter's own startup imports are left out), and wall is the
+# whole process, startup included.
+
+CASES = [
+    ("app stack (before)", "import streamlit, pandas, plotly.express, plotly.graph_objects, requests, bs4"),
+    ("import ltbx", "import ltbx"),
+    ("import ltbx.feed", "import ltbx.feed"),
+]
+# What `import ltbx` must not pull in
+HEAVY = ["streamlit", "pandas", "numpy", "plotly", "requests", "pyarrow", "PIL", "bs4"]
+
+def importtime(statement):
+    # (top-level module -> cumulative us, wall seconds) for one cold run
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+    return modules, wall
+
+def measure(statement, repeat, startup):
+    # (median import ms, median wall ms, heaviest top-level imports of the last run)
+    totals, walls = [], []
+    for _ in range(repeat):
+        modules, wall = importtime(statement)
+        modules = {name: us for name, us in modules.items() if name not in startup}
+        totals.append(sum(modules.values()) / 1000)
+        walls.append(wall * 1000)
+    heaviest = sorted(modules.items(), key=lambda item: -item[1])[:5]
+    return statistics.median(totals), statistics.median(walls), heaviest
+
+def check_light():
+    code = f"import sys, ltbx; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+    assert not loaded, f"import ltbx loaded {loaded}"
+    print("import ltbx loads none of: " + ", ".join(HEAVY))
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import time of the core package against the app's stack.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--verbose", action="store_true", help="list the heaviest imports of each case")
+    args = parser.parse_args()
+
+    check_light()
+    startup = set(importtime("pass")[0])
+    print(f"{'case':<22} {'import ms':>10} {'wall ms':>9} {'vs before':>10}")
+    before = None
+    for label, statement in CASES:
+        total, wall, heaviest = measure(statement, args.repeat, startup)
+        before = before or total
+        print(f"{label:<22} {total:>10.1f} {wall:>9.1f} {total / before:>9.1%}")
+        if args.verbose:
+            for name, us in heaviest:
+                print(f"    {name:<30} {us / 1000:>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_diary_frame, write_metadata_dump
+from ltbx.metadata import MetadataIndex, build_index, enrich
+
+# --- FILM METADATA ---
+# Builds the metadata index from a synthetic dump, then times opening it and
+# matching diaries of growing size against it, plus single-film lookups. A
+# sample of exact matches is checked against the dump, and a diary with
+# mangled titles and shifted years checks that the fuzzy stages catch them.
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def mangle(df, rng):
+    # Same films, written the way people (or other sites) write titles
+    df = df.copy()
+    names = df['Name'].to_numpy(dtype=object)
+    pick = rng.random(len(df))
+    names = np.where(pick < 0.25, np.char.upper(names.astype(str)).astype(object), names)
+    names = np.where((pick >= 0.25) & (pick < 0.5), "The " + names, names)
+    names = np.where((pick >= 0.5) & (pick < 0.75), [n.replace(" ", "-") for n in names], names)
+    df['Name'] = names
+    shift = rng.random(len(df)) < 0.3
+    df.loc[shift & (df['Year'] > 0), 'Year'] += 1
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Time building and querying the film metadata index.")
+    parser.add_argument("--films", type=int, default=1_000_000, help="rows in the synthetic dump")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=2_000, help="single-film lookups to time")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ltbx-metadata-")
+    try:
+        dump = os.path.join(workdir, "dump.tsv.gz")
+        write_metadata_dump(dump, args.films)
+        directory = os.path.join(workdir, "index")
+        start = time.perf_counter()
+        meta = build_index(dump, directory)
+        build = time.perf_counter() - start
+        print(f"built {meta['films']:,} films in {build:.1f}s ({meta['films'] / build:,.0f} films/s), "
+              f"{directory_size(directory) / 2**20:.1f} MiB on disk (dump {os.path.getsize(dump) / 2**20:.1f} MiB)")
+
+        start = time.perf_counter()
+        index = MetadataIndex(directory)
+        print(f"opened in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        import pandas as pd
+
+        source = pd.read_csv(dump, sep='\t', keep_default_na=False, nrows=5_000)
+        for row in source.sample(200, random_state=0).itertuples():
+            film = index.film(row.title, row.year)
+            assert film is not None and film['match'] == 'exact', row
+            assert film['runtime'] == (row.runtime or None) and film['director'] == row.directors, (row, film)
+            assert film['genres'] == [g for g in index.genres if g in row.genres.split(',')], (row, film)
+
+        mangled = enrich(mangle(make_diary_frame(10_000, seed=3), np.random.default_rng(3)), index)
+        dated = mangled['Year'] > 0
+        stages = mangled.loc[dated, 'Match'].value_counts(dropna=False)
+        print("mangled titles: " + ", ".join(f"{label} {count}" for label, count in stages.items()))
+        assert mangled.loc[dated, 'Match'].notna().all()
+
+        print(f"\n{'diary rows':>10} {'enrich ms':>10} {'rows/s':>12} {'matched':>8}")
+        for n in args.sizes:
+            df = make_diary_frame(n)
+            start = time.perf_counter()
+            enriched = enrich(df, index)
+            elapsed = time.perf_counter() - start
+            print(f"{n:>10} {elapsed * 1000:>10.2f} {n / elapsed:>12,.0f} {enriched['Match'].notna().mean():>8.1%}")
+
+        titles = source['title'].tolist()[:args.lookups]
+        years = source['year'].tolist()[:args.lookups]
+        start = time.perf_counter()
+        for title, year in zip(titles, years):
+            index.film(title, year)
+        elapsed = time.perf_counter() - start
+        print(f"\nsingle-film lookup: {elapsed / len(titles) * 1e6:.0f} us")
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from benchmarks.synthetic import make_rss_feed
+from ltbx import parse_rss_feed
+
+# --- BASELINE ---
+# The original two-level BeautifulSoup parser, kept here as the reference for
+# both the parity check and the timings.
+
+def legacy_parse_rss_feed(content):
+    soup = BeautifulSoup(content, "html.parser")
+    data = []
+    for item in soup.find_all('item'):
+        watched_date_tag = item.find('letterboxd:watcheddate')
+        if not watched_date_tag:
+            continue
+        title_tag = item.find('letterboxd:filmtitle')
+        year_tag = item.find('letterboxd:filmyear')
+        rating_tag = item.find('letterboxd:memberrating')
+        rewatch_tag = item.find('letterboxd:rewatch')
+        description = item.find('description')
+        poster_url = None
+        review_length = 0
+        if description:
+            desc_soup = BeautifulSoup(description.text, "html.parser")
+            img = desc_soup.find('img')
+            if img and 'src' in img.attrs:
+                poster_url = img['src']
+            for p in desc_soup.find_all('p'):
+                if p.find('img'):
+                    p.decompose()
+            review_length = len(desc_soup.get_text(strip=True).split())
+        data.append({
+            'Date': pd.to_datetime(watched_date_tag.text),
+            'Name': title_tag.text if title_tag else "Unknown",
+            'Year': int(year_tag.text) if year_tag and year_tag.text.isdigit() else 0,
+            'Rating': float(rating_tag.text) if rating_tag else 0.0,
+            'Rewatch': 'Yes' if (rewatch_tag and rewatch_tag.text == 'Yes') else 'No',
+            'Poster': poster_url,
+            'Review_Words': review_length,
+            'Has_Review': True if review_length > 5 else False
+        })
+    df = pd.DataFrame(data)
+    df['Month'] = df['Date'].dt.month_name()
+    df['Day'] = df['Date'].dt.day_name()
+    df['Decade'] = (df['Year'] // 10) * 10
+    return df
+
+def measure(fn, content, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and streaming RSS parsers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'legacy ms':>10} {'stream ms':>10} {'speedup':>8} {'legacy KiB':>11} {'stream KiB':>11}")
+    for n in args.sizes:
+        content = make_rss_feed(n)
+        expected = legacy_parse_rss_feed(content)
+        actual, error = parse_rss_feed(content)
+        assert error is None, error
+        # Month/Day became ordered categoricals, Rewatch a bool and Guid was
+        # added after the baseline was written
+        expected = expected.astype({'Month': actual['Month'].dtype, 'Day': actual['Day'].dtype})
+        expected['Rewatch'] = expected['Rewatch'] == 'Yes'
+        actual = actual.drop(columns=['Guid'])
+        pd.testing.assert_frame_equal(actual, expected)
+
+        legacy_t, legacy_mem = measure(legacy_parse_rss_feed, content, args.repeat)
+        stream_t, stream_mem = measure(parse_rss_feed, content, args.repeat)
+        print(f"{n:>8} {legacy_t * 1000:>10.2f} {stream_t * 1000:>10.2f} {legacy_t / stream_t:>7.1f}x "
+              f"{legacy_mem / 1024:>11.0f} {stream_mem / 1024:>11.0f}")
+
+if __name__ == "__main__":
+    main()
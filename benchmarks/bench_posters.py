@@ -0,0 +1,64 @@
+import argparse
+import io
+import json
+import random
+import tempfile
+import time
+
+from benchmarks.stub_server import StubServer
+from ltbx import PosterCache, fetch_rss_data
+
+# --- POSTER PROXY ---
+# Seeds the cache offline with generated full-size posters for every poster in
+# a synthetic feed, then simulates page views of the Wall of Fame and the
+# favourites column to report bytes saved and hit rates.
+
+def fake_poster(seed, size=(230, 345)):
+    from PIL import Image
+
+    rng = random.Random(seed)
+    img = Image.effect_noise(size, rng.randint(20, 80)).convert("RGB")
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes saved and hit rate of the poster thumbnail cache.")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--views", type=int, default=20, help="page views to simulate")
+    args = parser.parse_args()
+
+    with StubServer(items=args.items) as server:
+        df, error = fetch_rss_data("posterbench", base_url=server.base_url)
+    assert error is None, error
+    urls = df['Poster'].dropna().tolist()
+
+    with tempfile.TemporaryDirectory() as root:
+        seeding = PosterCache(root, offline=True)
+        original_sizes = {}
+        for i, url in enumerate(dict.fromkeys(urls)):
+            original = fake_poster(i)
+            original_sizes[url] = len(original)
+            seeding.add(url, original)
+
+        # As a fresh process would see it: empty memory LRU, warm disk
+        cache = PosterCache(root, offline=True)
+        view_times = []
+        for _ in range(args.views):
+            start = time.perf_counter()
+            thumbs = cache.thumbnails(urls)
+            sprite = cache.sprite([t for t in thumbs if t])
+            for url in df.sort_values(by=['Rating', 'Date'], ascending=[False, True]).head(5)['Poster']:
+                cache.thumbnail(url, 70)
+            view_times.append(time.perf_counter() - start)
+
+    stats = cache.stats()
+    stats['views'] = args.views
+    stats['hotlinked_bytes_per_view'] = sum(original_sizes[url] for url in urls)
+    stats['sprite_bytes'] = len(sprite)
+    stats['first_view_ms'] = round(view_times[0] * 1000, 1)
+    stats['warm_view_ms'] = round(min(view_times[1:] or view_times) * 1000, 1)
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
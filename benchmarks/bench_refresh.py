@@ -0,0 +1,126 @@
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from benchmarks.stub_server import StubServer
+from ltbx.feed import FeedCache, fetch_rss_data, parse_rss_feed
+from ltbx.http import HttpClient
+from ltbx.scheduler import RefreshScheduler
+
+# --- BACKGROUND REFRESH ---
+# Runs the refresh scheduler against the local stub in two ways:
+#   - simulated time: a fake clock steps through hours of users logging films
+#     (a few active users often, the rest rarely) while due refreshes run
+#     inline. Afterwards every cached feed must equal a full parse of what the
+#     stub serves, and the poll counts show how far idle users backed off.
+#   - real time: every user comes due at once with a worker pool and a slow
+#     stub, to show the queue draining and the refresh lag it causes.
+# Finally it times a returning visitor with and without a pre-warmed cache.
+
+class FakeClock:
+    def __init__(self, start=1_735_700_000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+def simulate(stub, users, hours, active_share, seed=0):
+    rng = random.Random(seed)
+    client = HttpClient(retries=0)
+    cache = FeedCache(ttl=float("inf"))
+    clock = FakeClock()
+    scheduler = RefreshScheduler(cache, client=client, base_url=stub.base_url, min_interval=300,
+                                 max_interval=6 * 3600, clock=clock, seed=seed)
+    names = [f"sim{i}" for i in range(users)]
+    active = set(rng.sample(names, int(users * active_share)))
+    for name in names:
+        fetch_rss_data(name, cache=cache, base_url=stub.base_url, client=client)
+        scheduler.watch(name)
+
+    polls = {name: 0 for name in names}
+    published = 0
+    start = stub.requests
+    for _ in range(int(hours * 60)):
+        clock.now += 60
+        for name in names:
+            # Active users log a film every ~2 hours, the others every ~5 days
+            if rng.random() < (1 / 120 if name in active else 1 / 7200):
+                stub.publish(name, 1)
+                published += 1
+        scheduler.run_pending()
+        for name, state in scheduler._users.items():
+            if state['refreshed_at'] == clock.now:
+                polls[name] += 1
+
+    for name in names:
+        # Catch up on whatever was logged since each user's last poll
+        scheduler.refresh(name)
+        full, _ = parse_rss_feed(stub.feed_for(name)[0])
+        pd.testing.assert_frame_equal(cache.get(name)[0]['df'], full)
+    stats = scheduler.stats()
+    per_hour = lambda group: sum(polls[n] for n in group) / max(1, len(group)) / hours
+    print(f"simulated {hours:g}h, {users} users ({len(active)} active): {published} entries logged, "
+          f"{stub.requests - start} upstream requests")
+    print(f"  polls/hour: active {per_hour(active):.2f}, idle {per_hour(set(names) - active):.2f}")
+    print(f"  outcomes: {stats['new_entries']} new entries, {stats['not_modified']} not modified, "
+          f"{stats['unchanged']} unchanged, {stats['errors']} errors")
+    print("  every cached feed matches a full parse")
+
+def drain(stub, users, workers):
+    cache = FeedCache()
+    client = HttpClient(pool_size=workers, retries=0)
+    scheduler = RefreshScheduler(cache, client=client, base_url=stub.base_url, workers=workers,
+                                 min_interval=0.0, jitter=0.0)
+    for i in range(users):
+        scheduler.watch(f"drain{i}")
+    deepest = 0
+    start = time.perf_counter()
+    scheduler.start()
+    while scheduler.refreshes < users:
+        deepest = max(deepest, scheduler.stats()['queue_depth'])
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    scheduler.stop()
+    stats = scheduler.stats()
+    print(f"drained {users} due users with {workers} workers at {stub.latency * 1000:.0f} ms/request "
+          f"in {elapsed:.2f}s: max queue depth {deepest}, lag p50 {stats['lag_p50_s']:.2f}s, "
+          f"max {stats['lag_max_s']:.2f}s")
+
+def returning_visitor(stub, rounds):
+    client = HttpClient(retries=0)
+    warm = FeedCache()
+    scheduler = RefreshScheduler(warm, client=client, base_url=stub.base_url)
+    cold, hot = [], []
+    for i in range(rounds):
+        name = f"visitor{i}"
+        start = time.perf_counter()
+        fetch_rss_data(name, cache=FeedCache(), base_url=stub.base_url, client=client)
+        cold.append(time.perf_counter() - start)
+        scheduler.refresh(name)
+        start = time.perf_counter()
+        fetch_rss_data(name, cache=warm, base_url=stub.base_url, client=client)
+        hot.append(time.perf_counter() - start)
+    cold.sort()
+    hot.sort()
+    print(f"returning visitor, median over {rounds}: cold fetch {cold[rounds // 2] * 1000:.1f} ms, "
+          f"pre-warmed {hot[rounds // 2] * 1000:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Exercise the background feed refresh against the local stub.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--hours", type=float, default=12)
+    parser.add_argument("--active", type=float, default=0.1, help="share of users logging films often")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency for the real-time runs")
+    args = parser.parse_args()
+
+    with StubServer() as stub:
+        simulate(stub, args.users, args.hours, args.active)
+    with StubServer(latency=args.latency) as stub:
+        drain(stub, args.users, args.workers)
+        returning_visitor(stub, 20)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import html
+import json
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import make_diary_frame
+from ltbx import build_report, render_html, report_data, write_bundle
+
+# --- STATIC RENDER ---
+# Per-report cost of turning an already-built report into its static bundle,
+# next to the cost of building the report itself. Rendering should be a small
+# fraction of the build, so regenerating pages for many users is dominated by
+# fetching and analytics.
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Time static HTML/JSON rendering per report.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1_000, 10_000])
+    parser.add_argument("--users", type=int, default=100, help="reports per batch for the throughput row")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'build ms':>9} {'html ms':>8} {'html+plotly ms':>15} {'json ms':>8} {'page KiB':>9}")
+    for n in args.sizes:
+        df = make_diary_frame(n)
+        build_t, report = best_of(lambda: build_report(df), args.repeat)
+        html_t, page = best_of(lambda: render_html(report, df, "bench", charts="none"), args.repeat)
+        plotly_t, _ = best_of(lambda: render_html(report, df, "bench"), args.repeat)
+        json_t, _ = best_of(lambda: json.dumps(report_data(report, "bench")), args.repeat)
+        assert "roast-box" in page and html.escape(report.roast) in page
+        print(f"{n:>8} {build_t * 1000:>9.2f} {html_t * 1000:>8.2f} {plotly_t * 1000:>15.2f} "
+              f"{json_t * 1000:>8.2f} {len(page.encode('utf-8')) / 1024:>9.1f}")
+
+    # Batch regeneration: many 50-entry reports written to disk back to back
+    reports = []
+    for seed in range(args.users):
+        df = make_diary_frame(50, seed=seed)
+        reports.append((df, build_report(df)))
+    directory = tempfile.mkdtemp(prefix="ltbx-render-")
+    try:
+        start = time.perf_counter()
+        for i, (df, report) in enumerate(reports):
+            write_bundle(directory, report, df, f"user{i}")
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+    print(f"\n{args.users} bundles written in {elapsed:.2f}s: {elapsed / args.users * 1000:.2f} ms per report "
+          f"({args.users / elapsed:.0f} reports/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import math
+import time
+
+from benchmarks.synthetic import make_diary_frame
+from ltbx import Rollups, summarize
+
+# --- ROLLUPS ---
+# Multi-year questions on a long history, answered by rescanning the diary
+# with summarize() versus from prebuilt rollups, plus the cost of folding a
+# new RSS page into the rollups versus rebuilding them. Every rollup answer is
+# checked against summarize() on the same rows first.
+
+PARITY_FIELDS = ['total', 'avg_rating', 'avg_year', 'rewatches', 'reviews', 'old_movies', 'recent_movies',
+                 'monday_count', 'fav_day', 'daily_variance', 'streak', 'max_binge', 'decade_diversity']
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def check_parity(stats, summary):
+    for field in PARITY_FIELDS:
+        a, b = getattr(stats, field), getattr(summary, field)
+        if isinstance(a, float) and isinstance(b, float):
+            assert (math.isnan(a) and math.isnan(b)) or math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9), (field, a, b)
+        else:
+            assert a == b, (field, a, b)
+    assert stats.day_counts.tolist() == summary.day_counts.tolist()
+    assert stats.rating_counts.to_dict() == summary.rating_counts.to_dict()
+    assert dict(stats.decade_counts) == dict(summary.decade_counts)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time year-by-year analytics from rollups against rescanning the diary.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--new", type=int, default=50, help="rows appended in the incremental row")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_diary_frame(args.rows)
+    rollups = Rollups.from_frame(df)
+    years = rollups.years
+    year_a, year_b = years[-2], years[-1]
+
+    check_parity(rollups.wrapped_for(), summarize(df))
+    for year in years:
+        check_parity(rollups.wrapped_for(year), summarize(df[df['Date'].dt.year == year]))
+    old, new = df.iloc[args.new:], df.iloc[:args.new]
+    check_parity(Rollups.from_frame(old).append(new).wrapped_for(), summarize(df))
+    print(f"{args.rows} rows over {len(years)} years; rollups match summarize() for all time and every year\n")
+
+    def rescan(year):
+        return summarize(df[df['Date'].dt.year == year])
+
+    rows = [
+        ("build rollups", best_of(lambda: Rollups.from_frame(df), args.repeat)[0], None),
+        (f"wrapped {year_b}", best_of(lambda: rollups.wrapped_for(year_b), args.repeat)[0],
+         best_of(lambda: rescan(year_b), args.repeat)[0]),
+        (f"compare {year_a} vs {year_b}", best_of(lambda: rollups.compare(year_a, year_b), args.repeat)[0],
+         best_of(lambda: (rescan(year_a), rescan(year_b)), args.repeat)[0]),
+        ("wrapped every year", best_of(lambda: [rollups.wrapped_for(y) for y in years], 1)[0],
+         best_of(lambda: [rescan(y) for y in years], 1)[0]),
+        ("monthly rolling trend", best_of(lambda: rollups.rolling(), args.repeat)[0], None),
+        (f"append {args.new} rows", best_of(lambda: rollups.append(new), args.repeat)[0],
+         best_of(lambda: Rollups.from_frame(df), args.repeat)[0]),
+    ]
+
+    print(f"{'question':<28} {'rollups ms':>11} {'rescan ms':>10} {'speedup':>8}")
+    for name, fast, slow in rows:
+        if slow is None:
+            print(f"{name:<28} {fast * 1000:>11.2f} {'-':>10} {'-':>8}")
+        else:
+            print(f"{name:<28} {fast * 1000:>11.2f} {slow * 1000:>10.2f} {slow / fast:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
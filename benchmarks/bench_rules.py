@@ -0,0 +1,243 @@
+import argparse
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from ltbx.analytics import calculate_cine_mbti, generate_roast, get_multi_personalities, get_soundtrack_suggestions
+from ltbx.rules import FEATURES, PERSONA_RULES, score
+
+# --- RULE ENGINE ---
+# Draws summary features for a large synthetic population (with plenty of
+# values sitting exactly on the rules' thresholds, and NaNs where a summary
+# can have them), then:
+#   - checks the analytics helpers, now on the rule tables, against the
+#     if/elif chains they replaced (kept below as the reference), with the
+#     same seeded random.Random on both sides
+#   - checks the vectorized scoring of every user against the reference:
+#     personas, MBTI code, the roast lines to pick from and the playlist
+#   - times the reference chains one user at a time against scoring all
+#     users at once, and a persona/MBTI leaderboard both ways
+
+def synthetic_features(n, seed=0):
+    # Rounded so thresholds (2.5, 3.8, 20%, 15 rewatches, 2010, ...) come up often
+    rng = np.random.default_rng(seed)
+    total = rng.integers(1, 400, n)
+    rewatches = np.minimum(rng.geometric(0.15, n) - 1, total)
+    reviews = rng.binomial(total, rng.uniform(0, 1, n))
+    avg_rating = np.round(np.clip(rng.normal(3.3, 0.8, n), 0.5, 5.0), 1)
+    avg_rating[rng.random(n) < 0.02] = np.nan  # nothing rated
+    avg_year = np.round(rng.normal(2005, 15, n))
+    daily_variance = np.round(rng.gamma(1.2, 1.0, n) * 2) / 2
+    daily_variance[rng.random(n) < 0.05] = np.nan  # a single day
+    top_year = rng.integers(1930, 2026, n).astype(float)
+    top_year[rng.random(n) < 0.03] = 0  # film without a year
+    top_year[rng.random(n) < 0.05] = np.nan  # no top film
+    return {
+        'total': total.astype(float),
+        'avg_rating': avg_rating,
+        'avg_year': avg_year,
+        'rewatches': rewatches.astype(float),
+        'rewatch_pct': np.round(rewatches / total * 100),
+        'review_pct': np.round(reviews / total * 100),
+        'decade_diversity': rng.integers(1, 11, n).astype(float),
+        'old_movies': rng.binomial(total, 0.05).astype(float),
+        'recent_movies': rng.binomial(total, 0.08).astype(float),
+        'monday_count': rng.binomial(total, 1 / 7 * 0.3).astype(float),
+        'daily_variance': daily_variance,
+        'top_year': top_year,
+    }
+
+def summary_at(columns, i):
+    # What the analytics helpers read from a WrappedSummary, for user i
+    values = {name: columns[name][i] for name in FEATURES}
+    top_year = values.pop('top_year')
+    return SimpleNamespace(top_movie=None if top_year != top_year else {'Year': top_year}, **values)
+
+# --- REFERENCE: the chains the rule tables replaced ---
+
+def reference_personas(total, avg_rating, rewatch_pct, diversity_score, review_pct):
+    personas = []
+    if total < 5:
+        personas.append(("The Casual Viewer", "Just dipping your toes in the cinematic waters."))
+        return personas
+    if avg_rating > 4.0:
+        personas.append(("The Generous Spirit", "5 stars for everyone! You love movies and they love you."))
+    elif avg_rating < 2.8:
+        personas.append(("The Harsh Critic", "Hard to please? Or maybe you just have impeccable taste."))
+    if rewatch_pct > 30:
+        personas.append(("The Comfort Seeker", "Why risk a bad movie when you can watch a masterpiece again?"))
+    elif rewatch_pct < 5:
+        personas.append(("The Explorer", "Always seeking something new. No looking back."))
+    if diversity_score > 6:
+        personas.append(("The Time Traveler", "From the classics to the modern era, you see it all."))
+    if review_pct > 50:
+        personas.append(("The Scribe", "You don't just watch; you document. Pen mighty!"))
+    if not personas:
+        personas.append(("The Balanced Cinephile", "A perfectly balanced diet of cinema."))
+    return personas
+
+def reference_roast_lines(summary):
+    comments = []
+    avg = summary.avg_rating
+    if avg > 4.5:
+        comments.append("You know 2.5 stars exists, right? Not everything is a masterpiece.")
+        comments.append("You're the person who claps when the plane lands, aren't you?")
+    elif avg < 2.5:
+        comments.append("Who hurt you? Seriously, do you even like movies?")
+        comments.append("I bet you're fun at parties. 'Actually, the book was better.'")
+        comments.append("You woke up and chose violence with these ratings.")
+    elif avg > 3.8:
+        comments.append("A little generous with the stars, are we?")
+    if summary.rewatches > 15:
+        comments.append("Comfort movies are a cry for help. We hear you.")
+        comments.append("Trying to relive the past won't fix the present.")
+        comments.append("We get it, you really like that one movie.")
+    elif summary.rewatches == 0:
+        comments.append("Commitment issues? You never call a movie back.")
+    if summary.old_movies > 15:
+        comments.append("We get it, you own a turntable and hate CGI.")
+        comments.append("Born in the wrong generation? Or just pretentious?")
+    elif summary.recent_movies > 20:
+        comments.append("Recency bias is a hell of a drug.")
+    if summary.monday_count > 5:
+        comments.append("Watching movies on Monday? Avoiding responsibilities like a pro.")
+    if not comments:
+        comments.append("Your taste is so painfully average, I can't even roast it.")
+        comments.append("You exist. You watch movies. That's about it.")
+        comments.append("Honestly? A pretty respectable list. Boring, but respectable.")
+    return comments
+
+def reference_mbti(summary):
+    p1 = "I" if summary.rewatch_pct > 20 else "E"
+    p2 = "S" if summary.avg_year > 2010 else "N"
+    p3 = "T" if summary.avg_rating < 3.2 else "F"
+    p4 = "P" if summary.daily_variance > 1.5 else "J"
+    return f"{p1}{p2}{p3}{p4}"
+
+def reference_soundtrack(mbti_code, summary, rng):
+    pools = {
+        "N": [("Heroes", "David Bowie"), ("Dreams", "Fleetwood Mac"), ("Space Oddity", "David Bowie"), ("There Is a Light", "The Smiths")],
+        "S": [("Blinding Lights", "The Weeknd"), ("Midnight City", "M83"), ("As It Was", "Harry Styles"), ("Espresso", "Sabrina Carpenter")],
+        "T": [("Paranoid Android", "Radiohead"), ("Psycho Killer", "Talking Heads"), ("Where Is My Mind?", "Pixies"), ("Tame Impala", "New Person")],
+        "F": [("Dancing Queen", "ABBA"), ("Mr. Brightside", "The Killers"), ("Dog Days Are Over", "Florence + The Machine"), ("Cruel Summer", "Taylor Swift")],
+        "I": [("Fast Car", "Tracy Chapman"), ("Landslide", "Fleetwood Mac"), ("Vienna", "Billy Joel"), ("Mystery of Love", "Sufjan Stevens")],
+        "E": [("Time to Pretend", "MGMT"), ("Paper Planes", "M.I.A."), ("Maps", "Yeah Yeah Yeahs"), ("Electric Feel", "MGMT")]
+    }
+    suggestions = []
+    if "E" in mbti_code: suggestions.extend(rng.sample(pools["E"], 1))
+    else: suggestions.extend(rng.sample(pools["I"], 1))
+    if "N" in mbti_code: suggestions.extend(rng.sample(pools["N"], 1))
+    else: suggestions.extend(rng.sample(pools["S"], 1))
+    if "T" in mbti_code: suggestions.extend(rng.sample(pools["T"], 1))
+    else: suggestions.extend(rng.sample(pools["F"], 1))
+    top_movie = summary.top_movie
+    if top_movie is not None:
+        year = top_movie['Year']
+        if year < 1980: suggestions.append(("California Dreamin'", "The Mamas & The Papas"))
+        elif year < 1990: suggestions.append(("Everybody Wants to Rule the World", "Tears for Fears"))
+        elif year < 2000: suggestions.append(("Smells Like Teen Spirit", "Nirvana"))
+        elif year < 2010: suggestions.append(("Mr. Brightside", "The Killers"))
+        else: suggestions.append(("bad guy", "Billie Eilish"))
+    avg_rating = summary.avg_rating
+    if avg_rating < 2.5: suggestions.append(("Creep", "Radiohead"))
+    elif avg_rating > 4.5: suggestions.append(("Walking on Sunshine", "Katrina and the Waves"))
+    return list(dict.fromkeys(suggestions))[:5]
+
+class FixedPicks:
+    # Stands in for random.Random in reference_soundtrack, sampling with the
+    # uniform draws score() made for one user
+    def __init__(self, draws):
+        self.draws = iter(draws)
+
+    def sample(self, pool, k):
+        return [pool[int(next(self.draws) * len(pool))]]
+
+# --- CHECKS ---
+
+def check_helpers(columns, n):
+    # The analytics helpers (single user, on the rule tables) against the chains
+    for i in range(n):
+        summary = summary_at(columns, i)
+        args = (summary.total, summary.avg_rating, summary.rewatch_pct, summary.decade_diversity, summary.review_pct)
+        assert get_multi_personalities(*args) == reference_personas(*args), i
+        assert generate_roast(None, summary, rng=random.Random(i)) == random.Random(i).choice(reference_roast_lines(summary)), i
+        code = reference_mbti(summary)
+        assert calculate_cine_mbti(None, summary)[0] == code, i
+        for probe in (code, "ISTP", "ENFJ"):
+            assert (get_soundtrack_suggestions(probe, None, summary, rng=random.Random(i))
+                    == reference_soundtrack(probe, summary, random.Random(i))), (i, probe)
+
+def check_scores(scores, columns, n):
+    # Every user's vectorized outcome against the chains
+    codes = scores.mbti_codes()
+    for i in range(n):
+        summary = summary_at(columns, i)
+        args = (summary.total, summary.avg_rating, summary.rewatch_pct, summary.decade_diversity, summary.review_pct)
+        assert scores.personas(i) == reference_personas(*args), i
+        lines = reference_roast_lines(summary)
+        assert scores.roast_lines(i) == lines and scores.roast(i) in lines, i
+        assert scores.mbti(i) == codes[i] == reference_mbti(summary), i
+        assert scores.playlist(i) == reference_soundtrack(codes[i], summary, FixedPicks(scores.song_picks[i])), i
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the persona/roast/MBTI rule engine.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--check", type=int, default=100_000, help="users checked one by one against the chains")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    columns = synthetic_features(args.users, seed=args.seed)
+    check = min(args.check, args.users)
+
+    start = time.perf_counter()
+    check_helpers(columns, check)
+    print(f"analytics helpers match the if/elif chains on {check:,} users ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    scores = score(columns, seed=args.seed)
+    vectorized = time.perf_counter() - start
+    check_scores(scores, columns, check)
+    again = score(columns, seed=args.seed)
+    assert np.array_equal(again.roast_pick, scores.roast_pick) and np.array_equal(again.song_picks, scores.song_picks)
+    print(f"vectorized scores match on {check:,} users; same seed, same roasts and playlists\n")
+
+    # Reference: the chains one user at a time, as a batch job would run them
+    lists = {name: columns[name].tolist() for name in FEATURES}
+    start = time.perf_counter()
+    personas, mbti = Counter(), Counter()
+    for i in range(args.users):
+        summary = SimpleNamespace(**{name: lists[name][i] for name in FEATURES})
+        summary.top_movie = None if summary.top_year != summary.top_year else {'Year': summary.top_year}
+        personas.update(title for title, _ in reference_personas(
+            summary.total, summary.avg_rating, summary.rewatch_pct, summary.decade_diversity, summary.review_pct))
+        reference_roast_lines(summary)
+        mbti[reference_mbti(summary)] += 1
+    chains = time.perf_counter() - start
+
+    start = time.perf_counter()
+    leaderboard = score(columns, seed=args.seed)
+    vector_personas = {title: count for (title, _), count in leaderboard.persona_matches.counts().items()}
+    vector_mbti = {code: count for code, count in leaderboard.mbti_counts().items() if count}
+    board = time.perf_counter() - start
+    assert vector_personas == dict(personas) and vector_mbti == dict(mbti)
+
+    start = time.perf_counter()
+    sample = min(100_000, args.users)
+    for i in range(sample):
+        scores.roast(i)
+        scores.playlist(i)
+    decode = (time.perf_counter() - start) / sample
+
+    print(f"{'users':>10} {'chains s':>9} {'score s':>8} {'speedup':>8} {'leaderboard s':>14} {'decode us/user':>15}")
+    print(f"{args.users:>10,} {chains:>9.2f} {vectorized:>8.2f} {chains / vectorized:>7.0f}x {board:>14.2f} "
+          f"{decode * 1e6:>15.1f}")
+    top = max(vector_personas, key=vector_personas.get)
+    print(f"\nmost common persona: {top} ({vector_personas[top]:,} users); "
+          f"most common MBTI: {max(vector_mbti, key=vector_mbti.get)}; "
+          f"{len(PERSONA_RULES.conditions)} persona conditions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.stub_server import StubServer
+from benchmarks.synthetic import make_diary_pages
+from ltbx.feed import fetch_rss_data
+from ltbx.http import HttpClient
+from ltbx.scrape import DiaryScraper, merge_entries, parse_diary_page
+
+# --- DIARY PAGES ---
+# Records a synthetic 2,000-entry diary as HTML pages, then:
+#   - checks parse_diary_page against a BeautifulSoup CSS-selector reference
+#     on every page and compares their speed
+#   - serves the pages from the local stub (with per-request latency) and
+#     times deep fetches of the whole diary at a few pool sizes, with and
+#     without a rate limit, plus a single-year fetch that stops early
+#   - merges the result with the user's RSS feed and checks the overlap is
+#     deduplicated
+
+USERNAME = "deep"
+
+def reference_parse(content):
+    soup = BeautifulSoup(content, "html.parser")
+    rows = []
+    for tr in soup.select("tr.diary-entry-row"):
+        day = tr.select_one("td.td-day a")["href"].rstrip("/").split("/")[-3:]
+        year = tr.select_one("td.td-released span").get_text(strip=True)
+        rating = tr.select_one("td.td-rating input.rateit-field")
+        rows.append({
+            'Date': "-".join(day),
+            'Name': tr.select_one("td.td-film-details h3 a").get_text(strip=True),
+            'Year': int(year) if year else 0,
+            'Rating': int(rating["value"]) / 2 if rating else 0.0,
+            'Rewatch': "icon-status-off" not in tr.select_one("td.td-rewatch")["class"],
+            'Has_Review': tr.select_one("td.td-review a.icon-review") is not None,
+        })
+    return rows
+
+def record(directory, entries):
+    # Seeded like the stub's synthetic feed for the same user, so the feed's
+    # 50 entries are the newest of the diary
+    seed = int(hashlib.md5(USERNAME.encode()).hexdigest()[:8], 16)
+    pages = make_diary_pages(entries, seed=seed, username=USERNAME)
+    os.makedirs(os.path.join(directory, USERNAME, "diary"))
+    for i, content in enumerate(pages, 1):
+        with open(os.path.join(directory, USERNAME, "diary", f"page-{i}.html"), "wb") as f:
+            f.write(content)
+    return pages
+
+def main():
+    parser = argparse.ArgumentParser(description="Time deep diary fetches against recorded pages.")
+    parser.add_argument("--entries", type=int, default=2_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per request")
+    parser.add_argument("--rate", type=float, default=10.0, help="pages/s for the rate-limited run")
+    parser.add_argument("--year", type=int, default=2023)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="ltbx-diary-")
+    try:
+        pages = record(directory, args.entries)
+        print(f"recorded {len(pages)} pages ({sum(map(len, pages)) / 2**20:.1f} MiB) for {args.entries} entries")
+
+        keys = ['Date', 'Name', 'Year', 'Rating', 'Rewatch', 'Has_Review']
+        start = time.perf_counter()
+        ours = [parse_diary_page(content)[0] for content in pages]
+        fast = time.perf_counter() - start
+        start = time.perf_counter()
+        reference = [reference_parse(content) for content in pages]
+        slow = time.perf_counter() - start
+        for mine, theirs in zip(ours, reference):
+            assert [{k: row[k] for k in keys} for row in mine] == theirs
+        unique = len({(row['Date'], row['Name'], row['Year']) for rows in ours for row in rows})
+        print(f"page extraction: {len(pages) / fast:,.0f} pages/s (BeautifulSoup selectors "
+              f"{len(pages) / slow:,.0f} pages/s, {slow / fast:.0f}x), rows identical\n")
+
+        with StubServer(feeds_dir=directory, latency=args.latency) as stub:
+            print(f"{'workers':>8} {'rate':>6} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'entries':>8}")
+            runs = [(workers, 0.0) for workers in args.workers] + [(max(args.workers), args.rate)]
+            for workers, rate in runs:
+                scraper = DiaryScraper(client=HttpClient(pool_size=workers, retries=0), base_url=stub.base_url,
+                                       workers=workers, rate=rate)
+                start = time.perf_counter()
+                df, error = scraper.fetch(USERNAME)
+                elapsed = time.perf_counter() - start
+                assert error is None and len(df) == unique
+                stats = scraper.stats()
+                print(f"{workers:>8} {rate or '-':>6} {stats['pages']:>6} {elapsed:>8.2f} "
+                      f"{stats['pages'] / elapsed:>8.1f} {len(df):>8}")
+
+            scraper = DiaryScraper(client=HttpClient(pool_size=max(args.workers), retries=0), base_url=stub.base_url,
+                                   workers=max(args.workers), rate=0)
+            start = time.perf_counter()
+            year_df, error = scraper.fetch(USERNAME, year=args.year)
+            elapsed = time.perf_counter() - start
+            assert error is None and (year_df['Date'].dt.year == args.year).all()
+            assert len(year_df) == int((df['Date'].dt.year == args.year).sum())
+            print(f"\n{args.year} only: {len(year_df)} entries from {scraper.stats()['pages']} of {len(pages)} "
+                  f"pages in {elapsed:.2f}s")
+
+            rss, error = fetch_rss_data(USERNAME, base_url=stub.base_url, client=HttpClient(retries=0))
+            assert error is None
+            merged = merge_entries(rss, df)
+            assert len(merged) == len(df) and merged['Poster'].notna().sum() == len(rss)
+            print(f"merged with the {len(rss)}-entry feed: {len(merged)} entries, "
+                  f"{len(rss)} overlapping rows kept from the feed")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
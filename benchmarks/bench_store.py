@@ -0,0 +1,49 @@
+import argparse
+import tempfile
+import time
+
+from benchmarks.stub_server import StubServer
+from ltbx import DiaryStore, fetch_rss_data
+
+# --- COLD FETCH VS WARM STORE ---
+# Cold: download and parse the feed from the local stub. Warm: read the same
+# user back from the diary store, before and after compaction.
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cold fetch+parse with loading from the diary store.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1_000, 10_000])
+    parser.add_argument("--segments", type=int, default=10, help="merges before compaction")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'cold ms':>9} {'segmented ms':>13} {'compacted ms':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as root:
+        store = DiaryStore(root)
+        for n in args.sizes:
+            username = f"bench{n}"
+            with StubServer(items=n) as server:
+                cold_t, (df, error) = best_of(lambda: fetch_rss_data(username, base_url=server.base_url), args.repeat)
+            assert error is None, error
+
+            # Build up history the way repeat visits would, a slice at a time
+            step = max(1, len(df) // args.segments)
+            for start in range(0, len(df), step):
+                store.merge(username, df.iloc[start:start + step])
+            segmented_t, stored = best_of(lambda: store.load(username), args.repeat)
+            assert len(stored) == len(df), (len(stored), len(df))
+
+            store.compact(username)
+            compacted_t, _ = best_of(lambda: store.load(username), args.repeat)
+            print(f"{n:>8} {cold_t * 1000:>9.1f} {segmented_t * 1000:>13.1f} {compacted_t * 1000:>13.1f} "
+                  f"{cold_t / compacted_t:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_diary_frame
+from ltbx import daily_counts, compute_streaks
+
+# --- BASELINE ---
+# The original calculate_stats: sorted python dates walked in a loop, plus a
+# separate groupby for the binge day.
+
+def legacy_stats(df):
+    dates = sorted(df['Date'].dt.date.unique())
+    longest_streak = current_streak = 1
+    for i in range(1, len(dates)):
+        if (dates[i] - dates[i-1]).days == 1:
+            current_streak += 1
+        else:
+            longest_streak = max(longest_streak, current_streak)
+            current_streak = 1
+    streak = max(longest_streak, current_streak)
+    daily = df.groupby(df['Date'].dt.date).size()
+    return streak, daily.max(), daily.idxmax().strftime('%b %d')
+
+def vectorized_stats(df):
+    streaks = compute_streaks(daily_counts(df['Date']))
+    return streaks.streak, streaks.max_binge, streaks.binge_date
+
+def random_diary(rng):
+    # Small diaries with clustered days, so runs, gaps and ties are all common
+    start = pd.Timestamp("2024-01-01") + pd.Timedelta(days=rng.randint(0, 300))
+    days = [start + pd.Timedelta(days=rng.randint(0, rng.choice([3, 10, 60]))) for _ in range(rng.randint(1, 80))]
+    return pd.DataFrame({'Date': days})
+
+def check(cases, seed):
+    rng = random.Random(seed)
+    for _ in range(cases):
+        df = random_diary(rng)
+        expected = legacy_stats(df)
+        actual = vectorized_stats(df)
+        assert actual == expected, (df['Date'].tolist(), expected, actual)
+        streaks = compute_streaks(daily_counts(df['Date']))
+        assert (streaks.end - streaks.start).days + 1 == streaks.streak
+    print(f"parity: {cases} random diaries match the loop implementation")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the loop streak with the ordinal run-length version.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", type=int, default=500, help="random parity cases to run first")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    check(args.check, args.seed)
+    print(f"{'rows':>10} {'loop ms':>9} {'numpy ms':>9} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_diary_frame(n)
+        timings = []
+        for fn in (legacy_stats, vectorized_stats):
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = fn(df)
+                best = min(best, time.perf_counter() - start)
+            timings.append((best, result))
+        (loop_t, expected), (numpy_t, actual) = timings
+        assert expected == actual, (expected, actual)
+        print(f"{n:>10} {loop_t * 1000:>9.1f} {numpy_t * 1000:>9.1f} {loop_t / numpy_t:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
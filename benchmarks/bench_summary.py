@@ -0,0 +1,101 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_diary_frame
+from ltbx import (
+    summarize,
+    get_multi_personalities,
+    generate_roast,
+    calculate_cine_mbti,
+    get_soundtrack_suggestions,
+)
+
+# --- BASELINE ---
+# How main() assembled the report before WrappedSummary: every section
+# filtering, grouping and sorting the diary on its own.
+
+def legacy_report(df):
+    total_movies = len(df)
+    avg_rating = df['Rating'].mean()
+    rewatches = df[df['Rewatch'] == 'Yes'].shape[0]
+    rewatch_pct = (rewatches / total_movies) * 100
+    review_pct = (df['Has_Review'].sum() / total_movies) * 100
+    decade_counts = df['Decade'].value_counts()
+
+    dates = sorted(df['Date'].dt.date.unique())
+    longest_streak = current_streak = 1
+    for i in range(1, len(dates)):
+        if (dates[i] - dates[i-1]).days == 1:
+            current_streak += 1
+        else:
+            longest_streak = max(longest_streak, current_streak)
+            current_streak = 1
+    streak = max(longest_streak, current_streak)
+    daily_counts = df.groupby(df['Date'].dt.date).size()
+    max_binge = daily_counts.max()
+
+    personas = get_multi_personalities(total_movies, avg_rating, rewatch_pct, len(decade_counts), review_pct)
+    # generate_roast
+    df['Rating'].mean()
+    df[df['Rewatch'] == 'Yes'].shape[0]
+    df[df['Year'] < 1980].shape[0]
+    df[df['Year'] > 2020].shape[0]
+    df[df['Day'] == 'Monday'].shape[0]
+    # calculate_cine_mbti
+    rewatch_rate = (df[df['Rewatch'] == 'Yes'].shape[0] / len(df)) * 100
+    avg_year = df['Year'].mean()
+    df['Rating'].mean()
+    daily_variance = df.groupby(df['Date'].dt.date).size().var()
+    # main() sections
+    df['Day'].value_counts().idxmax()
+    df.loc[df['Name'].str.len().idxmax()]
+    valid_years = df[df['Year'] > 0]
+    valid_years.loc[valid_years['Year'].idxmin()]
+    valid_years.loc[valid_years['Year'].idxmax()]
+    df['Rating'].value_counts().sort_index()
+    df['Day'].value_counts()
+    top = df.sort_values(by=['Rating', 'Date'], ascending=[False, True]).head(5)
+    # get_soundtrack_suggestions
+    df.sort_values(by=['Rating', 'Date'], ascending=[False, True]).iloc[0]
+    df['Rating'].mean()
+    return streak, max_binge, rewatch_rate, avg_year, daily_variance, personas, top
+
+def summary_report(df):
+    summary = summarize(df)
+    personas = get_multi_personalities(summary.total, summary.avg_rating, summary.rewatch_pct,
+                                       summary.decade_diversity, summary.review_pct)
+    generate_roast(df, summary)
+    mbti_code, _ = calculate_cine_mbti(df, summary)
+    get_soundtrack_suggestions(mbti_code, df, summary)
+    return summary, personas
+
+def best_of(fn, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare repeated DataFrame scans with a single WrappedSummary pass.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"{'rows':>10} {'legacy ms':>10} {'summary ms':>11} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_diary_frame(n)
+        # The legacy code predates the bool Rewatch column
+        legacy_t, legacy = best_of(legacy_report, df.assign(Rewatch=np.where(df['Rewatch'], 'Yes', 'No')), args.repeat)
+        summary_t, (summary, personas) = best_of(summary_report, df, args.repeat)
+        assert (legacy[0], legacy[1]) == (summary.streak, summary.max_binge)
+        assert abs(legacy[2] - summary.rewatch_pct) < 1e-9 and legacy[5] == personas
+        print(f"{n:>10} {legacy_t * 1000:>10.1f} {summary_t * 1000:>11.1f} {legacy_t / summary_t:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
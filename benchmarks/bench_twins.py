@@ -0,0 +1,92 @@
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from ltbx.twins import TRAIT_DIM, TasteVector, TwinIndex
+
+# --- CINEMATIC TWINS ---
+# Builds twin indexes over synthetic populations (10k to 1M users, 50 films
+# each drawn from a long-tailed catalogue) and times adding users and top-k
+# searches. On the smallest population every search is first checked against
+# a brute-force scan over all users (the first ten searches per metric).
+
+CATALOGUE = 50_000
+FILMS_PER_USER = 50
+
+def synthetic_population(n, seed=0):
+    # Yields (username, TasteVector); popularity is Zipf-like, so a few films
+    # are in a large share of diaries and most are rare
+    rng = np.random.default_rng(seed)
+    popularity = 1 / np.arange(1, CATALOGUE + 1) ** 0.9
+    popularity /= popularity.sum()
+    keys = [f"Film {i}|{1930 + i % 95}" for i in range(CATALOGUE)]
+    for start in range(0, n, 10_000):
+        size = min(10_000, n - start)
+        picks = rng.choice(CATALOGUE, size=(size, FILMS_PER_USER), p=popularity)
+        ratings = rng.choice([0.0, 1.0, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0], size=(size, FILMS_PER_USER))
+        traits = rng.random((size, TRAIT_DIM)).astype(np.float32)
+        traits /= np.linalg.norm(traits, axis=1, keepdims=True)
+        for i in range(size):
+            films = np.unique(picks[i])
+            weights = np.where(ratings[i, :len(films)] > 0, 0.5 + ratings[i, :len(films)] / 5, 1.0)
+            weights = (weights / np.linalg.norm(weights)).astype(np.float32)
+            yield f"user{start + i}", TasteVector([keys[f] for f in films], weights, traits[i])
+
+def brute_force(vectors, query, k, trait_weight, metric):
+    q = dict(zip(vectors[query].films, vectors[query].weights))
+    scores = []
+    for username, vector in vectors.items():
+        if username == query:
+            continue
+        other = dict(zip(vector.films, vector.weights))
+        if metric == "cosine":
+            films = sum(float(w) * float(other[f]) for f, w in q.items() if f in other)
+        else:
+            shared = len(q.keys() & other.keys())
+            films = shared / (len(q) + len(other) - shared)
+        traits = float(np.dot(vectors[query].traits, vector.traits))
+        scores.append(((1 - trait_weight) * films + trait_weight * traits, username))
+    scores.sort(key=lambda item: -item[0])
+    return [username for _, username in scores[:k]]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time twin index builds and searches.")
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'users':>9} {'add us/user':>12} {'rebuilds':>9} {'cosine ms':>10} {'jaccard ms':>11} {'postings':>11}")
+    for n in args.users:
+        index = TwinIndex()
+        check = n == min(args.users)
+        vectors = {} if check else None
+        start = time.perf_counter()
+        for username, vector in synthetic_population(n):
+            index.add_vector(username, vector)
+            if check:
+                vectors[username] = vector
+        add = time.perf_counter() - start
+
+        queries = [f"user{i}" for i in np.random.default_rng(1).choice(n, args.queries, replace=False)]
+        timings = {}
+        for metric in ("cosine", "jaccard"):
+            times = []
+            for i, query in enumerate(queries):
+                start = time.perf_counter()
+                twins = index.twins(query, args.k, metric)
+                times.append(time.perf_counter() - start)
+                if check and i < 10:
+                    expected = brute_force(vectors, query, args.k, index.trait_weight, metric)
+                    assert [t.username for t in twins] == expected, (metric, query)
+            timings[metric] = statistics.median(times)
+        stats = index.stats()
+        print(f"{n:>9} {add / n * 1e6:>12.1f} {stats['rebuilds']:>9} {timings['cosine'] * 1000:>10.2f} "
+              f"{timings['jaccard'] * 1000:>11.2f} {stats['postings']:>11}")
+        if check:
+            print(f"{'':>9} searches match a brute-force scan")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+import sys
+
+from benchmarks.run import compare, load_results, print_comparison
+
+# --- COMPARE RUNS ---
+# Diffs two results files from benchmarks.run, e.g. main vs. a PR in CI:
+#
+#   python -m benchmarks.compare baseline.json current.json --threshold 0.15
+#
+# Exits 1 when any benchmark got slower than the threshold allows.
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    return 1 if print_comparison(rows, args.threshold) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from websockets.sync.client import connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from benchmarks.stub_server import StubServer
+from ltbx.executor import BUSY_MESSAGE
+
+# --- LOAD TEST ---
+# How many people can use one app instance at once. Starts the app with
+# `streamlit run` against the local stub (with per-request latency standing in
+# for Letterboxd), then for each level of concurrency opens that many sessions
+# over the app's websocket, the way browsers would, each one repeating
+#   enter a username -> Generate -> rerun (any widget interaction)
+# back to back for a fixed time. A session is a real server-side session:
+# its own script thread, session state and widget ids, so this exercises the
+# same code path as a browser, minus the drawing.
+#
+# AppTest can't do this: its sessions share one process-wide script runner
+# and aren't safe to run from several threads, so it only measures a single
+# user. Here the only thing in the app process is the app.
+#
+# For each level it reports the latency of interactions (from sending the
+# widget change to the script finishing), completed interactions per second,
+# how many were turned away as busy, the CPU use of the server and its
+# worker processes, and their RSS growth per session (read from /proc, so
+# Linux only). Latency percentiles cover the interactions that were served.
+# The saturation point is the last level that still added at least 10%
+# throughput with p95 under the SLO; past it, more sessions only queue.
+#
+# --executor both runs the sweep with the shared pools and admission control
+# (LTBX_EXECUTOR=1) and without them, and compares their tail latencies.
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ltbxfinal.py")
+USERNAME_LABEL = "Username (Public account only)"
+GENERATE_LABEL = "Generate"
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+class AppServer:
+    # `streamlit run` in a subprocess, pointed at base_url for Letterboxd
+    def __init__(self, base_url, port=None, env=None):
+        self.port = port or free_port()
+        self.base_url = base_url
+        self.env = env or {}
+        self.proc = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def start(self, timeout=60):
+        env = dict(os.environ, LETTERBOXD_BASE_URL=self.base_url, **self.env)
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+             "--server.port", str(self.port), "--server.enableXsrfProtection", "false",
+             "--browser.gatherUsageStats", "false"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.5).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.stop()
+        raise RuntimeError(f"streamlit didn't start on port {self.port}")
+
+    def stop(self):
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait()
+            self.proc = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def pids(self):
+        # The server and every process it started (the executor's workers)
+        pids, todo = [], [self.proc.pid]
+        while todo:
+            pid = todo.pop()
+            pids.append(pid)
+            try:
+                for task in os.listdir(f"/proc/{pid}/task"):
+                    with open(f"/proc/{pid}/task/{task}/children") as f:
+                        todo.extend(int(child) for child in f.read().split())
+            except OSError:
+                pass
+        return pids
+
+    def cpu_seconds(self):
+        # utime + stime from /proc/<pid>/stat (fields 14 and 15)
+        total = 0
+        for pid in self.pids():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rpartition(')')[2].split()
+            except OSError:
+                continue
+            total += int(fields[11]) + int(fields[12])
+        return total / os.sysconf("SC_CLK_TCK")
+
+    def rss_bytes(self):
+        total = 0
+        for pid in self.pids():
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    total += next((int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:")), 0)
+            except OSError:
+                continue
+        return total
+
+class Session:
+    # One browser tab: a websocket and the widget ids the app sent it
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.ws = None
+        self.widgets = {}
+
+    def __enter__(self):
+        self.ws = connect(self.url, subprotocols=["streamlit"], max_size=None, open_timeout=self.timeout).__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.ws.close()
+
+    def run(self, widget_states=()):
+        # Sends a rerun with these widget values and reads until the script
+        # finishes; returns (seconds, status) with status 'ok', 'busy' (the
+        # app turned the request away) or 'error'
+        back = BackMsg()
+        back.rerun_script.query_string = ""
+        back.rerun_script.widget_states.widgets.extend(widget_states)
+        start = time.perf_counter()
+        self.ws.send(back.SerializeToString())
+        status = "ok"
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(self.ws.recv(timeout=self.timeout))
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                name = element.WhichOneof("type")
+                inner = getattr(element, name)
+                if name == "alert" and BUSY_MESSAGE in inner.body:
+                    status = "busy"
+                elif name == "exception" or (name == "alert" and inner.format == inner.ERROR):
+                    status = "error"
+                elif getattr(inner, "id", "") and getattr(inner, "label", ""):
+                    self.widgets[(name, inner.label)] = inner.id
+            elif kind == "script_finished":
+                if msg.script_finished != msg.FINISHED_SUCCESSFULLY:
+                    status = "error"
+                return time.perf_counter() - start, status
+
+    def generate(self, username):
+        name = WidgetState(id=self.widgets[("text_input", USERNAME_LABEL)], string_value=username)
+        button = WidgetState(id=self.widgets[("button", GENERATE_LABEL)], trigger_value=True)
+        return self.run([name, button])
+
+    def rerun(self, username):
+        # What any widget interaction costs once a report is on screen
+        return self.run([WidgetState(id=self.widgets[("text_input", USERNAME_LABEL)], string_value=username)])
+
+def user_loop(url, index, deadline, users, seed, timeout, think, results):
+    rng = random.Random(seed * 1_000_003 + index)
+    try:
+        with Session(url, timeout) as session:
+            session.run()
+            while time.monotonic() < deadline:
+                username = f"load{rng.randrange(users)}"
+                for step in (session.generate, session.rerun):
+                    seconds, status = step(username)
+                    results.append((step.__name__, seconds, status, time.monotonic()))
+                if think:
+                    time.sleep(rng.expovariate(1 / think))
+    except Exception:
+        results.append(("session", 0.0, "error", time.monotonic()))
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+def run_level(server, sessions, duration, users, seed, timeout, think):
+    results = []
+    peak = rss_before = server.rss_bytes()
+    cpu_before = server.cpu_seconds()
+    start = time.monotonic()
+    deadline = start + duration
+    threads = [threading.Thread(target=user_loop, args=(server.url, i, deadline, users, seed, timeout, think, results),
+                                daemon=True) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        peak = max(peak, server.rss_bytes())
+        time.sleep(0.2)
+    elapsed = time.monotonic() - start
+    cpu = server.cpu_seconds() - cpu_before
+
+    # Interactions still running at the deadline finish late; only count the
+    # ones that completed within it towards throughput
+    done = [r for r in results if r[2] == "ok"]
+    latencies = [r[1] for r in done]
+    return {
+        'sessions': sessions,
+        'interactions': len(done),
+        'throughput': sum(1 for r in done if r[3] <= deadline) / duration,
+        'busy': sum(1 for r in results if r[2] == "busy"),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'generate_p95_ms': percentile([r[1] for r in done if r[0] == "generate"], 95) * 1000,
+        'errors': sum(1 for r in results if r[2] == "error"),
+        'cpu_pct': cpu / elapsed * 100,
+        'rss_mib': peak / 2**20,
+        'rss_per_session_mib': max(0, peak - rss_before) / sessions / 2**20,
+    }
+
+def saturation(levels, slo_ms, min_gain=0.1):
+    # The last level that still scaled, and the first one over the SLO
+    best = levels[0]
+    for prev, level in zip(levels, levels[1:]):
+        if level['throughput'] < prev['throughput'] * (1 + min_gain) or level['p95_ms'] > slo_ms:
+            break
+        best = level
+    over_slo = next((level for level in levels if level['p95_ms'] > slo_ms), None)
+    return best, over_slo
+
+def sweep(args, executor):
+    with StubServer(latency=args.latency) as stub, \
+            AppServer(stub.base_url, env={'LTBX_EXECUTOR': "1" if executor else "0"}) as server:
+        # Pays for the app's first imports and cache set-up before timing
+        with Session(server.url, args.timeout) as session:
+            session.run()
+            session.generate("warmup")
+        print(f"executor {'on' if executor else 'off'}: app on port {server.port}, stub latency "
+              f"{args.latency * 1000:.0f} ms, {args.users} usernames, {args.duration:g}s per level\n")
+        print(f"{'sessions':>8} {'done':>6} {'/s':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'gen p95':>8} "
+              f"{'busy':>5} {'errors':>6} {'cpu %':>6} {'rss MiB':>8} {'MiB/sess':>8}")
+        levels = []
+        for sessions in args.sessions:
+            level = run_level(server, sessions, args.duration, args.users, args.seed, args.timeout, args.think)
+            levels.append(level)
+            print(f"{sessions:>8} {level['interactions']:>6} {level['throughput']:>6.1f} {level['p50_ms']:>8.0f} "
+                  f"{level['p95_ms']:>8.0f} {level['p99_ms']:>8.0f} {level['generate_p95_ms']:>8.0f} "
+                  f"{level['busy']:>5} {level['errors']:>6} {level['cpu_pct']:>6.0f} {level['rss_mib']:>8.0f} "
+                  f"{level['rss_per_session_mib']:>8.1f}")
+
+    best, over_slo = saturation(levels, args.slo_ms)
+    print(f"\nsaturates at {best['sessions']} concurrent sessions ({best['throughput']:.1f} interactions/s, "
+          f"p95 {best['p95_ms']:.0f} ms)")
+    if over_slo is not None:
+        print(f"p95 is over {args.slo_ms:.0f} ms from {over_slo['sessions']} sessions\n")
+    else:
+        print(f"p95 stayed under {args.slo_ms:.0f} ms at every level\n")
+    return levels
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the app with many concurrent sessions over its websocket.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=20, help="seconds per level")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds per request")
+    parser.add_argument("--users", type=int, default=1000, help="distinct usernames the sessions pick from")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds between interactions (0 = none)")
+    parser.add_argument("--slo-ms", type=float, default=2000, help="p95 latency target")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before an interaction counts as failed")
+    parser.add_argument("--executor", choices=["on", "off", "both"], default="on",
+                        help="run with the shared pools and admission control, without, or both")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    runs = {mode: sweep(args, mode == "on") for mode in (["off", "on"] if args.executor == "both" else [args.executor])}
+    if len(runs) == 2:
+        print(f"{'sessions':>8} {'p95 off':>8} {'p95 on':>8} {'p99 off':>8} {'p99 on':>8} {'/s off':>7} {'/s on':>7} "
+              f"{'busy on':>8}")
+        for off, on in zip(runs["off"], runs["on"]):
+            print(f"{off['sessions']:>8} {off['p95_ms']:>8.0f} {on['p95_ms']:>8.0f} {off['p99_ms']:>8.0f} "
+                  f"{on['p99_ms']:>8.0f} {off['throughput']:>7.1f} {on['throughput']:>7.1f} {on['busy']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_diary_frame, write_export_zip
+from benchmarks.stub_server import StubServer
+from ltbx import (
+    fetch_rss_data,
+    load_export,
+    summarize,
+    calculate_stats,
+    calculate_cine_mbti,
+    generate_roast,
+    get_soundtrack_suggestions,
+    build_report,
+)
+
+# --- BENCHMARK SUITE ---
+# Times the hot paths at diary sizes from a single RSS page up to a million
+# entries and writes the results as JSON, so CI can keep a baseline and flag
+# slowdowns:
+#
+#   python -m benchmarks.run -o current.json
+#   python -m benchmarks.run -o current.json --baseline baseline.json --threshold 0.15
+#
+# Each case is (setup, fn): setup(n) builds the input once and is not timed,
+# fn(input) is what gets timed. The analytics cases call the helpers the way
+# a standalone caller would, without a precomputed summary.
+
+SIZES = [50, 1_000, 10_000, 100_000, 1_000_000]
+NOISE_FLOOR = 0.0005  # seconds; smaller differences never count as regressions
+
+class _Feeds:
+    # fetch_rss_data against the local stub, one synthetic feed per size
+    def __init__(self):
+        self.server = None
+
+    def setup(self, n):
+        if self.server is None:
+            self.server = StubServer().start()
+        self.server.items = n
+        username = f"bench{n}"
+        self.server.feed_for(username)  # generate outside the timed region
+        return username
+
+    def fetch(self, username):
+        df, error = fetch_rss_data(username, base_url=self.server.base_url)
+        assert error is None, error
+        return df
+
+    def close(self):
+        if self.server is not None:
+            self.server.stop()
+
+def _export_setup(n):
+    path = os.path.join(tempfile.mkdtemp(prefix="ltbx-bench-"), f"export-{n}.zip")
+    return write_export_zip(path, n)
+
+def _load_export(path):
+    df, error = load_export(path)
+    assert error is None, error
+    return df
+
+def _diary(n):
+    return make_diary_frame(n)
+
+def _mbti_and_playlist(df):
+    mbti_code, _ = calculate_cine_mbti(df)
+    return get_soundtrack_suggestions(mbti_code, df)
+
+def make_cases(feeds):
+    # name -> (setup, fn, largest size worth running)
+    return {
+        'fetch_rss_data': (feeds.setup, feeds.fetch, 100_000),
+        'load_export': (_export_setup, _load_export, 1_000_000),
+        'summarize': (_diary, summarize, 1_000_000),
+        'calculate_stats': (_diary, calculate_stats, 1_000_000),
+        'calculate_cine_mbti': (_diary, calculate_cine_mbti, 1_000_000),
+        'generate_roast': (_diary, generate_roast, 1_000_000),
+        'get_soundtrack_suggestions': (_diary, _mbti_and_playlist, 1_000_000),
+        'build_report': (_diary, build_report, 1_000_000),
+    }
+
+def time_case(fn, data, repeat, budget):
+    # Best and median of up to `repeat` runs, stopping early once the budget
+    # (seconds) is spent so the million-row sizes stay affordable
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat:
+        start = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() - started > budget:
+            break
+    return {'best': min(timings), 'median': statistics.median(timings), 'runs': len(timings)}
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    import numpy
+    import pandas
+
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+    }
+
+def run(cases, sizes, repeat, budget, out=sys.stderr):
+    results = {}
+    for name, (setup, fn, largest) in cases.items():
+        for n in sizes:
+            if n > largest:
+                continue
+            random.seed(0)
+            data = setup(n)
+            timing = time_case(fn, data, repeat, budget)
+            results[f"{name}[{n}]"] = dict(timing, case=name, size=n)
+            print(f"{name + f'[{n}]':<36} best {timing['best'] * 1000:>10.2f} ms  "
+                  f"median {timing['median'] * 1000:>10.2f} ms  ({timing['runs']} runs)", file=out)
+    return results
+
+def compare(baseline, current, threshold):
+    # Rows of (key, baseline s, current s, ratio, regressed) for every result
+    # present in both runs; compares best-of times
+    rows = []
+    for key, result in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        ratio = result['best'] / before['best'] if before['best'] else float('inf')
+        regressed = ratio > 1 + threshold and result['best'] - before['best'] > NOISE_FLOOR
+        rows.append((key, before['best'], result['best'], ratio, regressed))
+    return rows
+
+def print_comparison(rows, threshold, out=sys.stderr):
+    print(f"\n{'benchmark':<36} {'baseline ms':>12} {'current ms':>12} {'change':>8}", file=out)
+    for key, before, after, ratio, regressed in rows:
+        flag = "  SLOWER" if regressed else ""
+        print(f"{key:<36} {before * 1000:>12.2f} {after * 1000:>12.2f} {(ratio - 1) * 100:>+7.1f}%{flag}", file=out)
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{regressions} regression(s) beyond {threshold:.0%}", file=out)
+    return regressions
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and optionally compare against a baseline.")
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--cases", nargs="+", help="only run these cases")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--max-size", type=int, default=100_000, help="skip sizes above this (default 100000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=10.0, help="seconds to spend per case and size")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before failing (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    feeds = _Feeds()
+    cases = make_cases(feeds)
+    if args.cases:
+        unknown = set(args.cases) - set(cases)
+        if unknown:
+            parser.error(f"unknown cases: {', '.join(sorted(unknown))} (choose from {', '.join(cases)})")
+        cases = {name: cases[name] for name in args.cases}
+    sizes = [n for n in args.sizes if n <= args.max_size]
+
+    try:
+        current = {'environment': environment(), 'results': run(cases, sizes, args.repeat, args.budget)}
+    finally:
+        feeds.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        rows = compare(load_results(args.baseline), current, args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
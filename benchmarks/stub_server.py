@@ -0,0 +1,196 @@
+import argparse
+import hashlib
+import http.server
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from benchmarks.synthetic import make_diary_pages, make_rss_feed, publish_rss_items
+
+# --- LOCAL LETTERBOXD STUB ---
+# Serves /<username>/rss/ from a directory of recorded feeds (<username>.xml)
+# or, failing that, a synthetic feed seeded by the username. Supports ETag
+# revalidation and an artificial per-request latency. publish(username, n)
+# logs n new entries on a feed, for exercising background refreshes.
+#
+# Diary pages (/<username>/films/diary/page/<n>/) are served the same way:
+# recorded ones from <feeds_dir>/<username>/diary/page-<n>.html, otherwise a
+# synthetic diary of diary_entries entries whose newest 50 are the feed's.
+#
+# Fault injection, for exercising retries and the circuit breaker: a share of
+# requests can fail with a 5xx/429 (error_rate, error_status, retry_after) or
+# be slowed down (slow_rate, slow_latency), and fail_next(n) makes exactly the
+# next n requests fail.
+
+class StubServer:
+    def __init__(self, host="127.0.0.1", port=0, feeds_dir=None, items=50, diary_entries=2000, latency=0.0,
+                 error_rate=0.0, error_status=503, retry_after=None, slow_rate=0.0, slow_latency=2.0, seed=0):
+        self.feeds_dir = feeds_dir
+        self.items = items
+        self.diary_entries = diary_entries
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.requests = 0
+        self.faults = 0
+        self._fail_next = 0
+        self._published = 0
+        self._rng = random.Random(seed)
+        self._feeds = {}
+        self._diaries = {}
+        self._lock = threading.Lock()
+        self._httpd = http.server.ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def feed_for(self, username):
+        with self._lock:
+            if username not in self._feeds:
+                path = os.path.join(self.feeds_dir, f"{username}.xml") if self.feeds_dir else None
+                if path and os.path.exists(path):
+                    with open(path, "rb") as f:
+                        content = f.read()
+                else:
+                    seed = int(hashlib.md5(username.encode()).hexdigest()[:8], 16)
+                    content = make_rss_feed(self.items, seed=seed)
+                self._feeds[username] = (content, '"%s"' % hashlib.md5(content).hexdigest())
+            return self._feeds[username]
+
+    def diary_page(self, username, page):
+        # Page content, or None past the last page
+        with self._lock:
+            if username not in self._diaries:
+                recorded = os.path.join(self.feeds_dir, username, "diary") if self.feeds_dir else None
+                if recorded and os.path.isdir(recorded):
+                    pages = []
+                    while os.path.exists(os.path.join(recorded, f"page-{len(pages) + 1}.html")):
+                        with open(os.path.join(recorded, f"page-{len(pages) + 1}.html"), "rb") as f:
+                            pages.append(f.read())
+                else:
+                    seed = int(hashlib.md5(username.encode()).hexdigest()[:8], 16)
+                    pages = make_diary_pages(self.diary_entries, seed=seed, username=username)
+                self._diaries[username] = pages
+            pages = self._diaries[username]
+            return pages[page - 1] if 1 <= page <= len(pages) else None
+
+    def publish(self, username, count=1):
+        # New entries on top of the feed (a new ETag with them)
+        self.feed_for(username)
+        with self._lock:
+            self._published += 1
+            content = publish_rss_items(self._feeds[username][0], count, seed=self._published)
+            self._feeds[username] = (content, '"%s"' % hashlib.md5(content).hexdigest())
+
+    def fail_next(self, count=1):
+        with self._lock:
+            self._fail_next += count
+
+    def _pick_fault(self):
+        with self._lock:
+            if self._fail_next:
+                self._fail_next -= 1
+                fault = "error"
+            elif self.error_rate and self._rng.random() < self.error_rate:
+                fault = "error"
+            elif self.slow_rate and self._rng.random() < self.slow_rate:
+                fault = "slow"
+            else:
+                return None
+            self.faults += 1
+            return fault
+
+    def _handler(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                fault = server._pick_fault()
+                if fault == "error":
+                    headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else {}
+                    return self._send(server.error_status, b"upstream error", headers)
+                if fault == "slow":
+                    time.sleep(server.slow_latency)
+                parts = [p for p in urlparse(self.path).path.split("/") if p]
+                if parts[1:3] == ["films", "diary"]:
+                    page = int(parts[4]) if parts[3:4] == ["page"] and parts[4:5] and parts[4].isdigit() else 1
+                    content = server.diary_page(parts[0].lower(), page)
+                    if content is None:
+                        return self._send(404, b"not found")
+                    return self._send(200, content, {"Content-Type": "text/html; charset=utf-8"})
+                if len(parts) != 2 or parts[1] != "rss":
+                    return self._send(404, b"not found")
+                content, etag = server.feed_for(parts[0].lower())
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, b"")
+                self._send(200, content, {"ETag": etag, "Content-Type": "application/rss+xml"})
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve canned Letterboxd RSS feeds locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--feeds-dir", help="directory of recorded <username>.xml feeds")
+    parser.add_argument("--items", type=int, default=50, help="entries per synthetic feed")
+    parser.add_argument("--diary-entries", type=int, default=2000, help="entries per synthetic diary")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to sleep per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds sent with injected errors")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = StubServer(port=args.port, feeds_dir=args.feeds_dir, items=args.items,
+                        diary_entries=args.diary_entries, latency=args.latency,
+                        error_rate=args.error_rate, error_status=args.error_status, retry_after=args.retry_after,
+                        slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    print(f"Serving on {server.base_url} (set LETTERBOXD_BASE_URL to use it)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import argparse
+import csv
+import io
+import os
+import random
+import re
+import datetime
+import zipfile
+from xml.sax.saxutils import escape
+
+# --- SYNTHETIC LETTERBOXD DATA ---
+# Deterministic generators for feeds shaped like the real thing: rewatches,
+# written reviews, unrated entries, films with no year and the odd non-diary
+# item (lists) that the parser has to skip.
+
+TITLE_WORDS = [
+    "Night", "City", "Heat", "Blue", "Dream", "Road", "House", "Girl", "Man", "Last",
+    "Summer", "Ghost", "Paris", "Love", "Killer", "Time", "River", "Star", "Dark", "Red",
+]
+REVIEW_WORDS = [
+    "the", "film", "camera", "score", "performance", "pacing", "ending", "perfect", "boring",
+    "cinema", "actually", "lead", "shot", "scene", "again", "masterpiece", "slow", "funny",
+]
+RATINGS = [0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0]
+GENRES = ["Drama", "Comedy", "Thriller", "Horror", "Romance", "Action", "Documentary", "Animation",
+          "Crime", "Science Fiction", "Fantasy", "Mystery", "Adventure", "Family", "War", "Music",
+          "History", "Western", "TV Movie"]
+COUNTRIES = ["USA", "UK", "France", "Japan", "South Korea", "Italy", "Germany", "India", "Hong Kong", "Mexico"]
+LANGUAGES = ["English", "French", "Japanese", "Korean", "Italian", "German", "Hindi", "Cantonese", "Spanish"]
+
+def make_entries(n, seed=0, end_date=datetime.date(2024, 12, 31), advance=0.6):
+    # advance: chance that an entry moves back to an earlier day
+    rng = random.Random(seed)
+    day = end_date
+    entries = []
+    for i in range(n):
+        if rng.random() < advance:
+            day -= datetime.timedelta(days=rng.choice([1, 1, 1, 2, 3, 7]))
+        title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 4)))
+        review = ""
+        if rng.random() < 0.3:
+            review = " ".join(rng.choice(REVIEW_WORDS) for _ in range(rng.randint(3, 120)))
+        entries.append({
+            'id': i,
+            'date': day,
+            'title': title,
+            'year': 0 if rng.random() < 0.02 else rng.randint(1920, 2024),
+            'rating': None if rng.random() < 0.15 else rng.choice(RATINGS),
+            'rewatch': rng.random() < 0.15,
+            'review': review,
+            'poster': f"https://a.ltrbxd.com/resized/film-poster/{i}-0-230-0-345-crop.jpg",
+        })
+    return entries
+
+def _rss_item(entry):
+    parts = [
+        "<item>",
+        f"<title>{escape(entry['title'])}</title>",
+        f"<link>https://letterboxd.com/bench/film/{entry['id']}/</link>",
+        f'<guid isPermaLink="false">letterboxd-{"review" if entry["review"] else "watch"}-{entry["id"]}</guid>',
+        f"<pubDate>{entry['date'].strftime('%a, %d %b %Y')} 12:00:00 +0000</pubDate>",
+        f"<letterboxd:watchedDate>{entry['date'].isoformat()}</letterboxd:watchedDate>",
+        f"<letterboxd:rewatch>{'Yes' if entry['rewatch'] else 'No'}</letterboxd:rewatch>",
+        f"<letterboxd:filmTitle>{escape(entry['title'])}</letterboxd:filmTitle>",
+    ]
+    if entry['year']:
+        parts.append(f"<letterboxd:filmYear>{entry['year']}</letterboxd:filmYear>")
+    if entry['rating'] is not None:
+        parts.append(f"<letterboxd:memberRating>{entry['rating']}</letterboxd:memberRating>")
+    parts.append(f"<tmdb:movieId>{entry['id']}</tmdb:movieId>")
+    body = f"<p>{escape(entry['review'])}</p>" if entry['review'] else f"<p>Watched on {entry['date'].strftime('%A %B %d, %Y')}.</p>"
+    parts.append(f'<description><![CDATA[ <p><img src="{entry["poster"]}"/></p> {body} ]]></description>')
+    parts.append("<dc:creator>bench</dc:creator>")
+    parts.append("</item>")
+    return "".join(parts)
+
+def make_diary_frame(n, seed=0, end_date="2024-12-31"):
+    # The parsed-diary schema directly, generated column-wise so that
+    # million-row frames take seconds rather than minutes
+    import numpy as np
+    import pandas as pd
+    from ltbx.feed import add_calendar_columns
+
+    rng = np.random.default_rng(seed)
+    # Spread over at most 30 years, so big diaries mean more films per day
+    span = min(int(n * 1.5) + 1, 365 * 30)
+    offsets = np.sort(rng.integers(0, span, size=n))
+    dates = pd.Timestamp(end_date) - pd.to_timedelta(offsets, unit="D")
+    years = rng.integers(1920, 2025, size=n)
+    years[rng.random(n) < 0.02] = 0
+    ratings = rng.choice(RATINGS, size=n)
+    ratings[rng.random(n) < 0.15] = 0.0
+    review_words = np.where(rng.random(n) < 0.3, rng.integers(3, 120, size=n), 6)
+    titles = np.array(diary_titles(), dtype=object)
+
+    df = pd.DataFrame({
+        'Date': dates,
+        'Name': titles[rng.integers(0, len(titles), size=n)],
+        'Year': years,
+        'Rating': ratings,
+        'Rewatch': rng.random(n) < 0.15,
+        'Poster': None,
+        'Review_Words': review_words,
+    })
+    df['Has_Review'] = df['Review_Words'] > 5
+    return add_calendar_columns(df)
+
+def diary_titles():
+    # The titles make_diary_frame draws from
+    return [" ".join(TITLE_WORDS[j] for j in range(k % 4 + 1)) + f" {k}" for k in range(1000)]
+
+def write_metadata_dump(path, n, seed=0):
+    # A film metadata dump in the layout ltbx.metadata builds from (TSV,
+    # gzipped when the path ends in .gz). The first rows cover every
+    # (title, year) make_diary_frame can produce, so diaries match fully;
+    # the rest are other films.
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    titles = np.array(diary_titles(), dtype=object)
+    years = np.arange(1920, 2025)
+    covered = pd.DataFrame({'title': np.repeat(titles, len(years)), 'year': np.tile(years, len(titles))})
+    extra = max(0, n - len(covered))
+    others = pd.DataFrame({
+        'title': [f"{TITLE_WORDS[k % 20]} {TITLE_WORDS[k // 20 % 20]} {k}" for k in range(1000, 1000 + extra)],
+        'year': rng.integers(1900, 2025, size=extra),
+    })
+    dump = pd.concat([covered, others], ignore_index=True).iloc[:n]
+    m = len(dump)
+    genre_ids = rng.integers(0, len(GENRES), size=(m, 3))
+    counts = rng.integers(1, 4, size=m)
+    dump['genres'] = [",".join(dict.fromkeys(GENRES[g] for g in row[:c])) for row, c in zip(genre_ids, counts)]
+    dump['runtime'] = np.where(rng.random(m) < 0.03, 0, rng.integers(70, 200, size=m))
+    dump['directors'] = [f"Director {d}" for d in rng.integers(0, max(1, m // 5), size=m)]
+    dump['countries'] = np.array(COUNTRIES, dtype=object)[rng.integers(0, len(COUNTRIES), size=m)]
+    dump['languages'] = np.array(LANGUAGES, dtype=object)[rng.integers(0, len(LANGUAGES), size=m)]
+    dump.to_csv(path, sep='\t', index=False, quoting=csv.QUOTE_NONE)
+    return path
+
+RSS_HEADER = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/" '
+    'xmlns:letterboxd="https://letterboxd.com" xmlns:tmdb="https://themoviedb.org">'
+    "<channel><title>Letterboxd - bench</title>"
+)
+RSS_FOOTER = "</channel></rss>"
+# A list post, which has no watched date and must be skipped
+LIST_ITEM = "<item><title>My list</title><guid>letterboxd-list-1</guid><description><![CDATA[<p>A list</p>]]></description></item>"
+
+def make_rss_feed(n, seed=0):
+    entries = make_entries(n, seed)
+    items = [_rss_item(e) for e in entries]
+    items.insert(len(items) // 2, LIST_ITEM)
+    return (RSS_HEADER + "".join(items) + RSS_FOOTER).encode("utf-8")
+
+def publish_rss_items(content, count, seed=0):
+    # The feed after `count` new diary entries are logged: they go on top, a
+    # day apart after the newest watched date, and as many of the oldest items
+    # fall off the end so the feed keeps its length
+    text = content.decode("utf-8")
+    start, end = text.index("<item>"), text.rindex("</channel>")
+    items = ["<item>" + part for part in text[start:end].split("<item>")[1:]]
+    newest = max(datetime.date.fromisoformat(d) for d in re.findall(r"<letterboxd:watchedDate>([^<]+)<", text))
+    entries = make_entries(count, seed=seed)
+    for i, e in enumerate(entries):
+        e['id'] = 10_000_000 + seed * 1_000 + i
+        e['date'] = newest + datetime.timedelta(days=count - i)
+    items = [_rss_item(e) for e in entries] + items[:len(items) - count]
+    return (text[:start] + "".join(items) + text[end:]).encode("utf-8")
+
+DIARY_PAGE_SIZE = 50
+
+def _diary_row(username, entry):
+    # One row of a Letterboxd diary page, with the markup the scraper keys on
+    day = entry['date']
+    slug = "-".join(entry['title'].lower().split()) + f"-{entry['id']}"
+    rating = int(entry['rating'] * 2) if entry['rating'] is not None else 0
+    stars = "★" * (rating // 2) + ("½" if rating % 2 else "")
+    review = (f'<a href="/{username}/film/{slug}/" class="has-icon icon-review icon-16 tooltip" '
+              f'title="Open review"><span class="icon"></span>Review</a>') if entry['review'] else ""
+    return (
+        f'<tr class="diary-entry-row viewing-poster-container" data-viewing-id="{entry["id"]}">'
+        f'<td class="td-calendar"><div class="date"><strong><a class="month" '
+        f'href="/{username}/films/diary/for/{day:%Y/%m}/">{day:%b}</a></strong> <small>{day:%Y}</small></div></td>'
+        f'<td class="td-day diary-day center"><a href="/{username}/films/diary/for/{day:%Y/%m/%d}/">{day.day}</a></td>'
+        f'<td class="td-film-details"><div class="really-lazy-load poster film-poster linked-film-poster" '
+        f'data-film-id="{entry["id"]}" data-film-slug="{slug}" data-target-link="/film/{slug}/">'
+        f'<img src="https://s.ltrbxd.com/static/img/empty-poster-35.png" class="image" width="35" height="52" '
+        f'alt="{escape(entry["title"])}"/></div>'
+        f'<h3 class="headline-3 prettify"><a href="/{username}/film/{slug}/">{escape(entry["title"])}</a></h3></td>'
+        f'<td class="td-released center"><span>{entry["year"] or ""}</span></td>'
+        f'<td class="td-rating rating-green"><div class="hide-for-owner"><span class="rating rated-{rating}">{stars}</span></div>'
+        f'<input type="hidden" class="rateit-field" value="{rating}"/></td>'
+        f'<td class="td-like center diary-like"></td>'
+        f'<td class="td-rewatch center{"" if entry["rewatch"] else " icon-status-off"}"><span class="rewatch"></span></td>'
+        f'<td class="td-review center">{review}</td>'
+        f'<td class="td-actions film-actions"></td>'
+        f'</tr>'
+    )
+
+def make_diary_pages(n, seed=0, username="bench"):
+    # The user's diary as the paginated HTML Letterboxd serves at
+    # /<username>/films/diary/page/<n>/, newest first. The entries are the
+    # ones make_rss_feed(50, seed) has, so the feed covers the first page.
+    entries = make_entries(n, seed)
+    last = max(1, -(-n // DIARY_PAGE_SIZE))
+    pages = []
+    for page in range(1, last + 1):
+        rows = "".join(_diary_row(username, e) for e in entries[(page - 1) * DIARY_PAGE_SIZE:page * DIARY_PAGE_SIZE])
+        links = "".join(f'<li class="paginate-page"><a href="/{username}/films/diary/page/{p}/">{p}</a></li>'
+                        for p in sorted({1, max(1, page - 1), page, min(last, page + 1), last}) if p != page)
+        pages.append((
+            f'<!DOCTYPE html><html lang="en"><head><title>{username}’s film diary • Letterboxd</title></head>'
+            f'<body class="diary"><div id="content"><section class="section">'
+            f'<table class="table film-table" id="diary-table"><thead><tr><th>Month</th><th>Day</th>'
+            f'<th>Film</th><th>Released</th><th>Rating</th><th>Like</th><th>Rewatch</th><th>Review</th></tr></thead>'
+            f'<tbody>{rows}</tbody></table>'
+            f'<div class="pagination"><div class="paginate-pages"><ul>{links}</ul></div></div>'
+            f'</section></div></body></html>'
+        ).encode("utf-8"))
+    return pages
+
+def _iter_entries(n, seed):
+    # make_entries in 10k blocks, so a pass over a million entries never holds
+    # more than one block; each call replays exactly the same entries
+    rng = random.Random(seed)
+    end_date = datetime.date(2024, 12, 31)
+    # Like make_diary_frame, stay within ~30 years (an entry moves back 2.5
+    # days on average), so huge diaries log more films per day
+    advance = min(0.6, 365 * 30 / (n * 2.5))
+    for block_start in range(0, n, 10_000):
+        block = make_entries(min(10_000, n - block_start), seed=rng.random(), end_date=end_date, advance=advance)
+        for e in block:
+            e['id'] += block_start
+            yield e
+        end_date = block[-1]['date']
+
+def write_rss_feed(path, n, seed=0):
+    # Same shape as make_rss_feed, streamed to disk so a million-item feed
+    # never has to fit in memory (the entries differ: they come in blocks)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(RSS_HEADER)
+        for e in _iter_entries(n, seed):
+            if e['id'] == n // 2:
+                f.write(LIST_ITEM)
+            f.write(_rss_item(e))
+        f.write(RSS_FOOTER)
+    return path
+
+def _write_csv(archive, name, header, rows):
+    with archive.open(name, "w") as raw:
+        out = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        writer = csv.writer(out)
+        writer.writerow(header)
+        writer.writerows(rows)
+        out.flush()
+
+def write_export_zip(path, n, seed=0):
+    # A Letterboxd data export: diary.csv, reviews.csv and ratings.csv with the
+    # real column layout, streamed into the archive one file at a time.
+    def base_row(e):
+        rating = "" if e['rating'] is None else e['rating']
+        return [e['date'].isoformat(), e['title'], e['year'] or "", f"https://boxd.it/{e['id']:x}",
+                rating, "Yes" if e['rewatch'] else ""]
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        _write_csv(archive, "diary.csv",
+                   ["Date", "Name", "Year", "Letterboxd URI", "Rating", "Rewatch", "Tags", "Watched Date"],
+                   (base_row(e) + ["", e['date'].isoformat()] for e in _iter_entries(n, seed)))
+        _write_csv(archive, "reviews.csv",
+                   ["Date", "Name", "Year", "Letterboxd URI", "Rating", "Rewatch", "Review", "Tags", "Watched Date"],
+                   (base_row(e) + [e['review'], "", e['date'].isoformat()] for e in _iter_entries(n, seed) if e['review']))
+        # ratings.csv holds one (latest) rating per film
+        ratings = {}
+        for e in _iter_entries(n, seed):
+            if e['rating'] is not None:
+                ratings.setdefault((e['title'], e['year'] or ""), [e['date'].isoformat(), e['title'], e['year'] or "", "", e['rating']])
+        _write_csv(archive, "ratings.csv", ["Date", "Name", "Year", "Letterboxd URI", "Rating"], ratings.values())
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic Letterboxd RSS feeds and data exports.")
+    parser.add_argument("directory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--kinds", nargs="+", choices=["rss", "export"], default=["rss", "export"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    for n in args.sizes:
+        if "rss" in args.kinds:
+            path = write_rss_feed(os.path.join(args.directory, f"rss-{n}.xml"), n, args.seed)
+            print(f"{path}  {os.path.getsize(path) / 2**20:.1f} MiB")
+        if "export" in args.kinds:
+            path = write_export_zip(os.path.join(args.directory, f"export-{n}.zip"), n, args.seed)
+            print(f"{path}  {os.path.getsize(path) / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
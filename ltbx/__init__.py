@@ -0,0 +1,55 @@
+# Core Letterboxd Wrapped logic: feed fetching/parsing and the analytics behind
+# every report section. Nothing in here imports Streamlit, and heavy libraries
+# (pandas, Plotly, pyarrow, Pillow) are only imported by the functions using them.
+
+from ltbx.feed import (
+    LETTERBOXD_BASE_URL,
+    FeedCache,
+    USERNAME_RE,
+    valid_username,
+    check_username,
+    fetch_rss_data,
+    parse_rss_feed,
+    scan_feed,
+    extract_description,
+)
+from ltbx.summary import WrappedSummary, StreakStats, summarize, daily_counts, compute_streaks
+from ltbx.analytics import (
+    calculate_stats,
+    get_multi_personalities,
+    generate_roast,
+    calculate_cine_mbti,
+    get_soundtrack_suggestions,
+)
+from ltbx.export import load_export
+from ltbx.store import DiaryStore, STORE_DIR
+from ltbx.posters import PosterCache
+from ltbx.charts import (
+    StaticChartCache,
+    STATIC_CHARTS,
+    CHART_CONFIG,
+    chart_fingerprint,
+    rating_trend_figure,
+    rating_distribution_figure,
+    day_rhythm_figure,
+    monthly_trend_figure,
+)
+from ltbx.report import (
+    WrappedReport,
+    REPORT_CACHE_SIZE,
+    REPORT_CACHE_TTL,
+    build_report,
+    report_fingerprint,
+)
+from ltbx.tracing import Tracer, tracer, PROFILE
+from ltbx.theme import REPORT_CSS
+from ltbx.render import render_html, report_data, write_bundle
+from ltbx.http import HttpClient, HostRateLimiter, CircuitBreaker, SingleFlight, UpstreamUnavailable, default_client
+from ltbx.rollups import Rollups, PeriodStats
+from ltbx.community import Community, QuantileSketch, COMMUNITY_PATH, percentile_lines
+from ltbx.twins import TwinIndex, TasteVector, Twin, TWIN_INDEX_PATH, encode as encode_taste
+from ltbx.metadata import MetadataIndex, MetadataSummary, METADATA_INDEX, build_index as build_metadata_index, enrich, summarize_metadata
+from ltbx.scheduler import RefreshScheduler, REFRESH_ENABLED
+from ltbx.scrape import DiaryScraper, parse_diary_page, merge_entries
+from ltbx.executor import Executor, BoundedPool, ExecutorBusy, Cancelled, EXECUTOR_ENABLED, BUSY_MESSAGE
+from ltbx.rules import RuleTable, Scores, FEATURES, feature_columns, summary_features, score as score_users
@@ -0,0 +1,49 @@
+import random
+
+from ltbx.summary import summarize, daily_counts, compute_streaks
+from ltbx.rules import (
+    PERSONA_RULES,
+    ROAST_RULES,
+    MBTI_RULES,
+    MBTI_MEANING,
+    playlist,
+    summary_features,
+)
+
+# --- ANALYTICS ---
+# Each helper takes the diary DataFrame and, optionally, its WrappedSummary.
+# Callers that render several sections should build the summary once and pass
+# it along; otherwise it is computed on the spot. The roast and playlist pick
+# at random; pass rng (a random.Random) to make the pick reproducible.
+#
+# What each one says is declared as rule tables in ltbx.rules; these are the
+# single-user entry points to them. ltbx.rules.score runs the same tables
+# over many users at once.
+
+def calculate_stats(df):
+    if df.empty:
+        return 0, 0, "N/A"
+    streaks = compute_streaks(daily_counts(df['Date']))
+    return streaks.streak, streaks.max_binge, streaks.binge_date
+
+def get_multi_personalities(total, avg_rating, rewatch_pct, diversity_score, review_pct):
+    return PERSONA_RULES.evaluate({'total': total, 'avg_rating': avg_rating, 'rewatch_pct': rewatch_pct,
+                                   'decade_diversity': diversity_score, 'review_pct': review_pct})
+
+def generate_roast(df, summary=None, rng=None):
+    summary = summary or summarize(df)
+    rng = rng or random
+    comments = [line for lines in ROAST_RULES.evaluate(summary_features(summary)) for line in lines]
+    return rng.choice(comments)
+
+def calculate_cine_mbti(df, summary=None):
+    summary = summary or summarize(df)
+    code = "".join(MBTI_RULES.evaluate(summary_features(summary)))
+    return code, dict(MBTI_MEANING)
+
+def get_soundtrack_suggestions(mbti_code, df, summary=None, rng=None):
+    summary = summary or summarize(df)
+    # Dominant traits from the MBTI letters, then the top film's era and the
+    # ratings' mood; repeats are dropped keeping the order, so a seeded rng
+    # gives the same playlist
+    return playlist(mbti_code, summary_features(summary), rng)
@@ -0,0 +1,128 @@
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from ltbx.tracing import tracer
+
+# --- CHARTS ---
+# The report charts. All of them are shown with staticPlot anyway, so
+# they can optionally be rendered server-side once into SVG/PNG and cached
+# under a fingerprint of the data they're drawn from plus the chart theme.
+# Reruns and repeat visitors for the same diary then skip building the figure
+# and the browser never has to load Plotly. Rendering needs kaleido (and the
+# Chrome it drives); without it the cache reports itself unavailable and the
+# app falls back to regular Plotly charts.
+
+STATIC_CHARTS = os.environ.get("LTBX_STATIC_CHARTS", "") == "1"
+CHART_FORMAT = os.environ.get("LTBX_CHART_FORMAT", "svg")
+CHART_CACHE_DIR = os.environ.get("LTBX_CHART_CACHE_DIR")
+CHART_CONFIG = {'staticPlot': True, 'displayModeBar': False}
+
+# Bump the theme name whenever colours or layout below change, so cached
+# images from the old look aren't served
+CHART_THEME = "letterboxd-dark-1"
+CHART_SIZES = {'trend': (900, 380), 'ratings': (600, 420), 'rhythm': (600, 420), 'monthly': (900, 380)}
+
+def rating_trend_figure(df):
+    import plotly.graph_objects as go
+
+    df_trend = df.sort_values(by='Date').reset_index(drop=True)
+    df_trend['Rolling_Avg'] = df_trend['Rating'].rolling(window=5, min_periods=1).mean()
+
+    fig_trend = go.Figure()
+    fig_trend.add_trace(go.Scatter(x=df_trend['Date'], y=df_trend['Rating'], mode='markers', name='Rating', marker=dict(color='#40bcf4', size=8, opacity=0.6)))
+    fig_trend.add_trace(go.Scatter(x=df_trend['Date'], y=df_trend['Rolling_Avg'], mode='lines', name='Trend (5-film avg)', line=dict(color='#00e054', width=3)))
+    fig_trend.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#fff", yaxis=dict(range=[0, 5.5], title="Stars"), margin=dict(t=10, b=10), showlegend=False)
+    return fig_trend
+
+def rating_distribution_figure(rating_counts):
+    import plotly.graph_objects as go
+
+    colors = ['#ff8000' if r >= 4 else '#40bcf4' if r >= 2.5 else '#667788' for r in rating_counts.index]
+    fig_rating = go.Figure(data=[go.Bar(x=rating_counts.index, y=rating_counts.values, marker_color=colors, text=rating_counts.values, textposition='auto')])
+    fig_rating.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#fff", margin=dict(t=20, b=20), xaxis=dict(tickmode='linear', tick0=0.5, dtick=0.5, title="Stars"), yaxis=dict(showgrid=False, visible=False))
+    return fig_rating
+
+def day_rhythm_figure(day_counts):
+    import plotly.graph_objects as go
+
+    fig_radar = go.Figure(data=go.Scatterpolar(r=day_counts.values, theta=list(day_counts.index), fill='toself', line_color='#00e054'))
+    fig_radar.update_layout(polar=dict(bgcolor="#1f252d", radialaxis=dict(visible=True, gridcolor="#456"), angularaxis=dict(color="#fff")), paper_bgcolor="rgba(0,0,0,0)", font_color="#fff", margin=dict(t=20, b=20, l=40, r=40))
+    return fig_radar
+
+def monthly_trend_figure(trend):
+    # trend is Rollups.rolling(): films per month as bars, rolling average rating as a line
+    import plotly.graph_objects as go
+
+    months = trend.index.to_timestamp()
+    fig_monthly = go.Figure()
+    fig_monthly.add_trace(go.Bar(x=months, y=trend['films'], name='Films', marker_color='#40bcf4', opacity=0.6))
+    fig_monthly.add_trace(go.Scatter(x=months, y=trend['avg_rating_rolling'], mode='lines', name='Avg rating (rolling)', line=dict(color='#00e054', width=3), yaxis='y2'))
+    fig_monthly.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#fff", yaxis=dict(title="Films", showgrid=False), yaxis2=dict(range=[0, 5.5], title="Stars", overlaying='y', side='right'), margin=dict(t=10, b=10), showlegend=False)
+    return fig_monthly
+
+def chart_fingerprint(df, theme=CHART_THEME):
+    # Every chart is drawn from Date and Rating only
+    import pandas as pd
+
+    hashed = pd.util.hash_pandas_object(df[['Date', 'Rating']], index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes() + theme.encode("utf-8")).hexdigest()
+
+class StaticChartCache:
+    def __init__(self, fmt=CHART_FORMAT, root=CHART_CACHE_DIR, max_entries=256):
+        self.fmt = fmt
+        self.root = root
+        self.max_entries = max_entries
+        self.available = True
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key[0]}-{key[1]}.{self.fmt}")
+
+    def render(self, name, fingerprint, build):
+        # Image bytes for chart `name`, building and rendering the figure only
+        # on a miss. Returns None when static rendering isn't possible here.
+        key = (fingerprint, name)
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return self._images[key]
+        if self.root and os.path.exists(self._path(key)):
+            with open(self._path(key), "rb") as f:
+                image = f.read()
+            self.hits += 1
+        else:
+            if not self.available:
+                return None
+            width, height = CHART_SIZES.get(name, (700, 400))
+            try:
+                with tracer.span("charts.render", chart=name, format=self.fmt):
+                    image = build().to_image(format=self.fmt, width=width, height=height)
+            except Exception:
+                # kaleido (or its browser) is missing; stop trying
+                self.available = False
+                return None
+            self.renders += 1
+            if self.root:
+                os.makedirs(self.root, exist_ok=True)
+                with open(self._path(key), "wb") as f:
+                    f.write(image)
+        with self._lock:
+            self._images[key] = image
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+        return image
+
+    def data_uri(self, image):
+        mime = "image/svg+xml" if self.fmt == "svg" else f"image/{self.fmt}"
+        return f"data:{mime};base64," + base64.b64encode(image).decode("ascii")
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._images), 'hits': self.hits, 'renders': self.renders, 'available': self.available}
@@ -0,0 +1,276 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from ltbx.feed import FeedCache
+
+# --- COMMUNITY PERCENTILES ---
+# "You rate higher than 82% of users": where one user's summary sits among
+# everyone the deployment has seen. For each metric the community keeps a KLL
+# quantile sketch instead of every user's value, so memory stays at a few
+# hundred numbers per metric whether it has seen a hundred users or ten
+# million. Ranks are within 1-2% of exact at the default k=200, and exact
+# until a metric has seen more than k values.
+#
+# A sketch can't reliably forget a value, so re-ingesting a user replaces
+# their earlier numbers only while those haven't been compacted yet and the
+# user is among the last COMMUNITY_RECENT seen. Otherwise they count twice,
+# which at this scale moves no percentile noticeably.
+#
+# Lookups search a sorted, cumulative-weight view of the sketch (O(log n));
+# the view is rebuilt lazily after updates. Set LTBX_COMMUNITY_PATH to keep
+# the community on disk between restarts; batch.py --community feeds the same
+# file.
+
+COMMUNITY_PATH = os.environ.get("LTBX_COMMUNITY_PATH")
+COMMUNITY_MIN_USERS = int(os.environ.get("LTBX_COMMUNITY_MIN_USERS", 50))
+COMMUNITY_RECENT = 10_000
+COMMUNITY_SAVE_INTERVAL = 60  # seconds between saves from the app
+
+# The inputs to get_multi_personalities and calculate_cine_mbti, plus streak
+METRICS = ['total', 'avg_rating', 'rewatch_pct', 'decade_diversity', 'review_pct', 'daily_variance', 'streak']
+
+def summary_vector(summary):
+    # {metric: float} for one WrappedSummary; NaN (no ratings, a single day) is left out
+    vector = {}
+    for metric in METRICS:
+        value = float(getattr(summary, metric))
+        if value == value:
+            vector[metric] = value
+    return vector
+
+class QuantileSketch:
+    # KLL sketch: level h holds items that each stand for 2**h values. When a
+    # level outgrows its capacity it is sorted and every other item (random
+    # offset) moves up a level, halving its size. Capacities shrink by 2/3
+    # per level below the top, so the total stays under 3k items.
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self.levels = [[]]
+        self._rng = random.Random(seed)
+        self._view = None
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(8, int(self.k * (2 / 3) ** depth))
+
+    def add(self, value):
+        self.levels[0].append(float(value))
+        self.count += 1
+        self._view = None
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def extend(self, values):
+        for value in values:
+            self.add(value)
+
+    def _compress(self):
+        for level in range(len(self.levels)):
+            items = self.levels[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            items.sort()
+            keep = [items.pop()] if len(items) % 2 else []
+            self.levels[level + 1].extend(items[self._rng.randint(0, 1)::2])
+            self.levels[level] = keep
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._view = None
+        while any(len(items) >= self._capacity(level) for level, items in enumerate(self.levels)):
+            self._compress()
+        return self
+
+    @property
+    def size(self):
+        return sum(len(items) for items in self.levels)
+
+    def _sorted(self):
+        # (values, cumulative weights) over every retained item, in value order
+        view = self._view
+        if view is None:
+            import numpy as np
+
+            values = np.fromiter((v for items in self.levels for v in items), dtype=np.float64, count=self.size)
+            weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.int64)
+                                      for level, items in enumerate(self.levels)])
+            order = np.argsort(values, kind='stable')
+            view = self._view = (values[order], np.cumsum(weights[order]))
+        return view
+
+    def rank(self, value):
+        # Share of values below `value`, ties counting half, in [0, 1]
+        import numpy as np
+
+        values, cumulative = self._sorted()
+        if not len(values):
+            return float('nan')
+        total = cumulative[-1]
+        lo = np.searchsorted(values, value, side='left')
+        hi = np.searchsorted(values, value, side='right')
+        below = cumulative[lo - 1] if lo else 0
+        through = cumulative[hi - 1] if hi else 0
+        return float((below + through) / 2 / total)
+
+    def quantile(self, q):
+        import numpy as np
+
+        values, cumulative = self._sorted()
+        if not len(values):
+            return float('nan')
+        index = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(values[min(index, len(values) - 1)])
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'levels': self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data['k'])
+        sketch.count = data['count']
+        sketch.levels = [list(items) for items in data['levels']] or [[]]
+        return sketch
+
+class Community:
+    def __init__(self, path=None, k=200, recent=COMMUNITY_RECENT):
+        self.path = path
+        self.k = k
+        self.sketches = {metric: QuantileSketch(k) for metric in METRICS}
+        self.users = 0
+        self.replaced = 0
+        self._recent = OrderedDict()  # normalized username -> their last vector
+        self._max_recent = recent
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def ingest(self, username, summary):
+        # Adds (or, if seen recently, replaces) one user's numbers
+        vector = summary_vector(summary)
+        key = FeedCache.normalize(username) if username else None
+        with self._lock:
+            previous = self._recent.pop(key, None) if key else None
+            if previous == vector:
+                self._recent[key] = vector
+                return
+            if previous is not None:
+                self.replaced += 1
+                self._forget(previous)
+            else:
+                self.users += 1
+            for metric, value in vector.items():
+                self.sketches[metric].add(value)
+            if key:
+                self._recent[key] = vector
+                while len(self._recent) > self._max_recent:
+                    self._recent.popitem(last=False)
+            self._dirty = True
+
+    def _forget(self, previous):
+        # Drops one earlier vector by taking its values out of level 0 when
+        # they're still there; values already compacted stay (see above)
+        for metric, value in previous.items():
+            sketch = self.sketches[metric]
+            if value in sketch.levels[0]:
+                sketch.levels[0].remove(value)
+                sketch.count -= 1
+                sketch._view = None
+
+    def percentiles(self, summary):
+        # {metric: 0-100 share of users below this summary}; empty until the
+        # community has COMMUNITY_MIN_USERS users
+        vector = summary_vector(summary)
+        with self._lock:
+            if self.users < COMMUNITY_MIN_USERS:
+                return {}
+            return {metric: round(self.sketches[metric].rank(value) * 100, 1)
+                    for metric, value in vector.items() if self.sketches[metric].count}
+
+    def merge(self, other):
+        with self._lock:
+            for metric in METRICS:
+                self.sketches[metric].merge(other.sketches[metric])
+            self.users += other.users
+            self._dirty = True
+        return self
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': self.users,
+                'replaced': self.replaced,
+                'recent': len(self._recent),
+                'retained': {metric: sketch.size for metric, sketch in self.sketches.items()},
+            }
+
+    # --- persistence ---
+
+    def to_dict(self):
+        with self._lock:
+            return {'users': self.users, 'k': self.k,
+                    'sketches': {metric: sketch.to_dict() for metric, sketch in self.sketches.items()}}
+
+    def _load(self, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.users = data['users']
+        self.k = data['k']
+        for metric, sketch in data['sketches'].items():
+            if metric in self.sketches:
+                self.sketches[metric] = QuantileSketch.from_dict(sketch)
+
+    def save(self, path=None):
+        path = path or self.path
+        data = self.to_dict()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        return path
+
+    def maybe_save(self, interval=COMMUNITY_SAVE_INTERVAL):
+        # Saves to self.path when there are changes and `interval` seconds have passed
+        if self.path and self._dirty and time.monotonic() - self._saved_at >= interval:
+            self.save()
+
+# How the app words each percentile: (phrase, whether higher is better)
+PERCENTILE_PHRASES = {
+    'total': ("You log more films than {p}% of users", True),
+    'avg_rating': ("You rate higher than {p}% of users", True),
+    'rewatch_pct': ("You rewatch more than {p}% of users", True),
+    'decade_diversity': ("Your taste spans more decades than {p}% of users", True),
+    'review_pct': ("You review more than {p}% of users", True),
+    'daily_variance': ("Your watching is steadier than {p}% of users", False),
+    'streak': ("Your streak is longer than {p}% of users", True),
+}
+TOP_PHRASES = {'streak': "Your streak is in the top {top}%"}  # used from the 75th percentile up
+
+def percentile_lines(percentiles):
+    lines = []
+    for metric, (phrase, higher) in PERCENTILE_PHRASES.items():
+        if metric not in percentiles:
+            continue
+        p = percentiles[metric] if higher else 100 - percentiles[metric]
+        if metric in TOP_PHRASES and p >= 75:
+            phrase = TOP_PHRASES[metric]
+        lines.append(phrase.format(p=round(p), top=max(1, round(100 - p))))
+    return lines
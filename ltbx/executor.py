@@ -0,0 +1,223 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from ltbx.feed import fetch_rss_data, parse_rss_feed
+from ltbx.tracing import tracer
+
+# --- EXECUTOR ---
+# Generate does three kinds of work: waiting on Letterboxd, parsing the feed,
+# and building the report. Run on the session's own script thread, a slow
+# feed holds that thread for the whole HTTP timeout, and parsing and
+# analytics fight every other session in the server process for the GIL.
+# Here they go to two shared pools instead:
+#   - io: a thread pool for network waits (feeds, diary pages)
+#   - cpu: a process pool for parsing and report building, each worker with
+#     its own poster cache (on the same disk directory) and metadata index
+#
+# Both are bounded: a pool takes at most `workers` running plus `queue`
+# waiting jobs, and past that a request is turned away straight away with
+# ExecutorBusy ("busy, retry shortly") rather than joining a queue it would
+# time out in. The caller waits in short slices and checks `cancelled`
+# between them; once it says so (the user closed the tab), a job still
+# queued is dropped and one already running finishes for nobody.
+#
+# Each pool records how long jobs waited for a worker and how busy the
+# workers were, for the debug panel and the load test.
+
+EXECUTOR_ENABLED = os.environ.get("LTBX_EXECUTOR", "1") == "1"
+IO_WORKERS = int(os.environ.get("LTBX_IO_WORKERS", 16))
+IO_QUEUE = int(os.environ.get("LTBX_IO_QUEUE", 32))
+CPU_WORKERS = int(os.environ.get("LTBX_CPU_WORKERS", os.cpu_count() or 1))
+CPU_QUEUE = int(os.environ.get("LTBX_CPU_QUEUE", 4 * CPU_WORKERS))
+CANCEL_POLL = 0.1  # seconds between cancellation checks while waiting
+BUSY_MESSAGE = "Lots of people are generating their Wrapped right now. Please retry in a few seconds."
+
+class ExecutorBusy(Exception):
+    pass
+
+class Cancelled(Exception):
+    pass
+
+def _timed(fn, args, kwargs, origin=None):
+    # Runs in the worker: (started, finished, result, error, spans),
+    # wall-clock so times from a worker process line up with the submitting
+    # one. origin is the submitting process's pid when it is tracing; in a
+    # different process the job's spans are captured and returned for it.
+    spans = None
+    started = time.time()
+    try:
+        if origin is not None and origin != os.getpid():
+            with tracer.capture() as spans:
+                result, error = fn(*args, **kwargs), None
+        else:
+            result, error = fn(*args, **kwargs), None
+    except Exception as e:
+        result, error = None, e
+    return started, time.time(), result, error, spans
+
+class BoundedPool:
+    def __init__(self, name, executor, workers, queue):
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running
+        self._waits = deque(maxlen=1000)  # seconds from submit to start
+        self._started_at = time.time()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.busy_seconds = 0.0
+
+    def run(self, fn, args=(), kwargs=None, cancelled=None):
+        # fn(*args, **kwargs) on a worker; raises ExecutorBusy when the pool
+        # is full, Cancelled once cancelled() is true, or whatever fn raised
+        with self._lock:
+            if self._pending >= self.workers + self.queue:
+                self.rejected += 1
+                raise ExecutorBusy(BUSY_MESSAGE)
+            self._pending += 1
+            self.submitted += 1
+        submitted = time.time()
+        with tracer.span(f"executor.{self.name}", job=getattr(fn, '__name__', 'job')):
+            try:
+                future = self._executor.submit(_timed, fn, args, kwargs or {},
+                                               os.getpid() if tracer.enabled else None)
+            except Exception:
+                with self._lock:
+                    self._pending -= 1
+                raise
+            future.add_done_callback(lambda f: self._done(f, submitted))
+            while not wait([future], timeout=CANCEL_POLL)[0]:
+                if cancelled is not None and cancelled():
+                    future.cancel()
+                    with self._lock:
+                        self.cancelled += 1
+                    raise Cancelled()
+            _, _, result, error, spans = future.result()
+            if spans:
+                tracer.merge(spans)
+        if error is not None:
+            raise error
+        return result
+
+    def _done(self, future, submitted):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                # The worker itself died (a killed process), not the job
+                self.failed += 1
+                return
+            started, finished, _, error, _ = future.result()
+            self._waits.append(max(0.0, started - submitted))
+            self.busy_seconds += finished - started
+            if error is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            uptime = time.time() - self._started_at
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue,
+                'pending': self._pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'cancelled': self.cancelled,
+                'wait_p50_ms': round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+                'wait_p95_ms': round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+                'utilization': round(self.busy_seconds / (self.workers * uptime), 3) if uptime else 0.0,
+            }
+
+# --- WORKER PROCESS JOBS ---
+# Module-level so they pickle by name. Resources that hold locks, files or
+# maps can't be sent to a worker, so each worker process opens its own.
+
+_worker_resources = {}
+
+def _worker_poster_cache():
+    from ltbx.posters import PosterCache
+
+    if 'posters' not in _worker_resources:
+        _worker_resources['posters'] = PosterCache()
+    return _worker_resources['posters']
+
+def _worker_metadata():
+    from ltbx.metadata import METADATA_INDEX, MetadataIndex
+
+    if 'metadata' not in _worker_resources:
+        _worker_resources['metadata'] = MetadataIndex(METADATA_INDEX) if METADATA_INDEX else None
+    return _worker_resources['metadata']
+
+def _warm_worker():
+    # Pays for the imports when the pool starts rather than on a user's first job
+    import ltbx.report  # noqa: F401
+    return os.getpid()
+
+def report_job(df, fingerprint, rollups=None, posters=True):
+    from ltbx.report import build_report
+
+    return build_report(df, fingerprint, poster_cache=_worker_poster_cache() if posters else None,
+                        rollups=rollups, metadata=_worker_metadata())
+
+class Executor:
+    def __init__(self, io_workers=IO_WORKERS, io_queue=IO_QUEUE, cpu_workers=CPU_WORKERS, cpu_queue=CPU_QUEUE,
+                 processes=True):
+        # processes=False runs the cpu pool on threads (same limits, no offload)
+        if processes:
+            # Not forked: the app process has threads (Streamlit's, our pools)
+            # whose locks a fork would copy mid-use
+            cpu = ProcessPoolExecutor(max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            cpu = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="ltbx-cpu")
+        self.io = BoundedPool("io", ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="ltbx-io"),
+                              io_workers, io_queue)
+        self.cpu = BoundedPool("cpu", cpu, cpu_workers, cpu_queue)
+
+    def start(self):
+        # Starts every worker process up front
+        futures = [self.cpu._executor.submit(_warm_worker) for _ in range(self.cpu.workers)]
+        wait(futures)
+        return self
+
+    def stop(self):
+        self.io.shutdown()
+        self.cpu.shutdown()
+
+    def parse_feed(self, content, known_guids=None):
+        return self.cpu.run(parse_rss_feed, (content, known_guids))
+
+    def fetch_feed(self, username, cache=None, base_url=None, known_guids=None, client=None, cancelled=None):
+        # fetch_rss_data with the download on the io pool and the parse on
+        # the cpu pool
+        return self.io.run(fetch_rss_data, (username,),
+                           {'cache': cache, 'base_url': base_url, 'known_guids': known_guids, 'client': client,
+                            'parse': self.parse_feed},
+                           cancelled=cancelled)
+
+    def deep_fetch(self, scraper, username, year=None, cancelled=None):
+        # DiaryScraper.fetch on the io pool; it stops requesting pages once cancelled
+        return self.io.run(scraper.fetch, (username, year), {'cancelled': cancelled}, cancelled=cancelled)
+
+    def build_report(self, df, fingerprint, rollups=None, cancelled=None):
+        return self.cpu.run(report_job, (df, fingerprint, rollups), cancelled=cancelled)
+
+    def stats(self):
+        return {'io': self.io.stats(), 'cpu': self.cpu.stats()}
@@ -0,0 +1,136 @@
+import argparse
+import os
+import sys
+import zipfile
+
+from ltbx.feed import add_calendar_columns
+from ltbx.tracing import tracer
+
+# --- LETTERBOXD DATA EXPORT ---
+# Loads the diary from the ZIP that Settings > Data > Export gives you, into
+# the same schema fetch_rss_data produces. The CSVs are streamed straight out
+# of the archive in chunks with compact dtypes, and review text is reduced to
+# a word count chunk by chunk, so memory stays proportional to the diary
+# itself rather than to the size of the reviews.
+
+EXPORT_CHUNK_SIZE = 5_000
+
+DIARY_COLUMNS = ['Name', 'Year', 'Rating', 'Rewatch', 'Watched Date']
+REVIEW_COLUMNS = ['Name', 'Year', 'Review', 'Watched Date']
+RATING_COLUMNS = ['Name', 'Year', 'Rating']
+CSV_DTYPES = {'Name': 'string', 'Year': 'Int16', 'Rating': 'float32', 'Rewatch': 'category', 'Review': 'string'}
+
+def _find_member(archive, filename):
+    # Exports sometimes come re-zipped inside a folder, so match on basename
+    for name in archive.namelist():
+        if os.path.basename(name) == filename:
+            return name
+    return None
+
+def _read_chunks(archive, filename, columns):
+    member = _find_member(archive, filename)
+    if member is None:
+        return
+    import pandas as pd
+
+    with archive.open(member) as f:
+        dtypes = {c: CSV_DTYPES[c] for c in columns if c in CSV_DTYPES}
+        for chunk in pd.read_csv(f, usecols=columns, dtype=dtypes, chunksize=EXPORT_CHUNK_SIZE):
+            yield chunk
+
+def _entry_key(chunk):
+    return list(zip(chunk['Name'], chunk['Year'].fillna(0).astype('int16'), chunk['Watched Date']))
+
+def _year_mask(chunk, year):
+    return chunk['Watched Date'].str.startswith(str(year)).fillna(False)
+
+def load_export(source, year=None):
+    # source: path or file-like object of the export ZIP. Returns (df, error)
+    # like fetch_rss_data; year keeps only entries watched in that year.
+    with tracer.span("export.load", year=year):
+        return _load_export(source, year)
+
+def _load_export(source, year):
+    import numpy as np
+    import pandas as pd
+
+    try:
+        with zipfile.ZipFile(source) as archive:
+            if _find_member(archive, 'diary.csv') is None:
+                return None, "No diary.csv found in the export ZIP."
+
+            review_words = {}
+            for chunk in _read_chunks(archive, 'reviews.csv', REVIEW_COLUMNS):
+                if year is not None:
+                    chunk = chunk[_year_mask(chunk, year)]
+                words = chunk['Review'].fillna('').str.split().str.len().astype('int32')
+                for key, count in zip(_entry_key(chunk), words):
+                    review_words[key] = max(count, review_words.get(key, 0))
+
+            # Current rating per film, used where a diary entry wasn't rated
+            latest_ratings = {}
+            for chunk in _read_chunks(archive, 'ratings.csv', RATING_COLUMNS):
+                chunk = chunk.dropna(subset=['Rating'])
+                latest_ratings.update(zip(zip(chunk['Name'], chunk['Year'].fillna(0).astype('int16')), chunk['Rating']))
+
+            frames = []
+            for chunk in _read_chunks(archive, 'diary.csv', DIARY_COLUMNS):
+                chunk = chunk.dropna(subset=['Watched Date'])
+                if year is not None:
+                    chunk = chunk[_year_mask(chunk, year)]
+                if chunk.empty:
+                    continue
+                years = chunk['Year'].fillna(0).astype('int16')
+                keys = _entry_key(chunk)
+                ratings = chunk['Rating'].to_numpy(dtype='float32', na_value=np.nan, copy=True)
+                missing = np.isnan(ratings)
+                if missing.any():
+                    ratings[missing] = [latest_ratings.get((k[0], k[1]), 0.0) for k, m in zip(keys, missing) if m]
+                frames.append(pd.DataFrame({
+                    'Date': pd.to_datetime(chunk['Watched Date'], format='%Y-%m-%d'),
+                    'Name': chunk['Name'].astype(object),
+                    'Year': years.to_numpy(),
+                    'Rating': ratings,
+                    'Rewatch': (chunk['Rewatch'].astype(object) == 'Yes').to_numpy(),
+                    'Poster': None,
+                    'Review_Words': np.array([review_words.get(k, 0) for k in keys], dtype='int32'),
+                }))
+
+        if not frames:
+            return None, "No diary entries found in export." if year is None else f"No diary entries found for {year}."
+
+        df = pd.concat(frames, ignore_index=True)
+        df['Name'] = df['Name'].astype('category')
+        df['Has_Review'] = df['Review_Words'] > 5
+        add_calendar_columns(df)
+        # Newest first, matching the order of the RSS feed
+        df = df.sort_values('Date', ascending=False, kind='stable').reset_index(drop=True)
+        return df, None
+
+    except zipfile.BadZipFile:
+        return None, "That file isn't a valid ZIP archive."
+    except Exception as e:
+        return None, f"Error reading export: {str(e)}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load a Letterboxd data export into the Wrapped diary schema.")
+    parser.add_argument("export", help="path to the export ZIP")
+    parser.add_argument("--year", type=int, help="only keep entries watched in this year")
+    parser.add_argument("-o", "--output", help="write the diary to .parquet or .csv")
+    args = parser.parse_args(argv)
+
+    df, error = load_export(args.export, year=args.year)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    print(f"{len(df)} entries, {df['Date'].min():%Y-%m-%d} to {df['Date'].max():%Y-%m-%d}, "
+          f"{df.memory_usage(deep=True).sum() / 1024:.0f} KiB in memory")
+    if args.output:
+        if args.output.endswith(".parquet"):
+            df.to_parquet(args.output, index=False)
+        else:
+            df.to_csv(args.output, index=False)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
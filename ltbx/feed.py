@@ -0,0 +1,347 @@
+import io
+import os
+import re
+import html
+import time
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from ltbx.tracing import tracer
+
+# pandas and requests are imported where they're used so that importing the
+# package stays cheap for workers that only need part of it.
+
+# --- FEED CACHE ---
+# Process-wide cache of parsed feeds keyed by normalized username. Entries are
+# served straight from memory until the TTL runs out, then revalidated with a
+# conditional GET so an unchanged feed (304) reuses the already-parsed DataFrame.
+# While Letterboxd is failing, expired entries are served as they are.
+
+LETTERBOXD_BASE_URL = os.environ.get("LETTERBOXD_BASE_URL", "https://letterboxd.com")
+FEED_CACHE_TTL = float(os.environ.get("LTBX_FEED_CACHE_TTL", 900))
+FEED_CACHE_SIZE = int(os.environ.get("LTBX_FEED_CACHE_SIZE", 512))
+
+# Usernames go into Letterboxd URLs and into file paths (the diary store,
+# HTML bundles), so anything but what Letterboxd allows is turned away before
+# either: a '../' would otherwise fetch one user's feed and write elsewhere.
+USERNAME_RE = re.compile(r'[A-Za-z0-9_-]+')
+
+def valid_username(username):
+    return isinstance(username, str) and USERNAME_RE.fullmatch(FeedCache.normalize(username)) is not None
+
+def check_username(username):
+    # The normalized username; ValueError if it isn't a valid one
+    if not valid_username(username):
+        raise ValueError(f"'{username}' isn't a valid Letterboxd username")
+    return FeedCache.normalize(username)
+
+class FeedCache:
+    def __init__(self, ttl=FEED_CACHE_TTL, max_entries=FEED_CACHE_SIZE, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale = 0  # served past their TTL because upstream was failing
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(username):
+        return username.strip().strip('/').lower()
+
+    def get(self, key):
+        # Returns (entry, fresh) and bumps the LRU position, or (None, False)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            self._entries.move_to_end(key)
+            return entry, (self.clock() - entry['stored_at']) < self.ttl
+
+    def put(self, key, df, etag=None, last_modified=None):
+        with self._lock:
+            self._entries[key] = {
+                'df': df,
+                'etag': etag,
+                'last_modified': last_modified,
+                'stored_at': self.clock(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def touch(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['stored_at'] = self.clock()
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.revalidations
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'upstream_requests': self.misses + self.revalidations,
+                'hit_rate': (self.hits + self.revalidations) / lookups if lookups else 0.0,
+            }
+
+# --- FETCHING ---
+
+def fetch_rss_data(username, cache=None, base_url=None, known_guids=None, client=None, parse=None):
+    # known_guids: items already stored elsewhere, which are left out of the
+    # result. With a cache the whole feed still goes through it (TTL,
+    # revalidation, single-flight) and they are filtered out afterwards;
+    # without one the parser skips them.
+    # client: an ltbx.http.HttpClient, the shared default one if not given.
+    # parse: parse(content, known_guids) -> (df, error) in place of
+    # parse_rss_feed, e.g. to run it on another process (ltbx.executor).
+    from ltbx.http import default_client
+
+    if not valid_username(username):
+        return None, f"'{username}' isn't a valid Letterboxd username"
+    base_url = (base_url or LETTERBOXD_BASE_URL).rstrip('/')
+    key = FeedCache.normalize(username)
+    url = f"{base_url}/{key}/rss/"
+
+    entry, fresh = cache.get(key) if cache is not None else (None, False)
+    if fresh:
+        cache.record('hits')
+        return _unknown(entry['df'], known_guids), None
+
+    client = client or default_client()
+    parse = parse or parse_rss_feed
+    if known_guids and cache is None:
+        return _download(url, username, key, entry, cache, client, known_guids, parse)
+    # Concurrent requests for the same feed share one download
+    df, error = client.flights.do(url, lambda: _download(url, username, key, entry, cache, client, None, parse))
+    return (_unknown(df, known_guids) if df is not None else None), error
+
+def _unknown(df, known_guids):
+    # A copy of df without the rows whose guid is in known_guids
+    if not known_guids or 'Guid' not in df:
+        return df.copy()
+    return df[~df['Guid'].isin(known_guids)].reset_index(drop=True)
+
+def _download(url, username, key, entry, cache, client, known_guids, parse):
+    from ltbx.executor import ExecutorBusy
+
+    headers = {}
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    try:
+        with tracer.span("feed.fetch", username=key, conditional=bool(headers)) as span:
+            response = client.get(url, headers=headers)
+            span.set(status=response.status_code, bytes=len(response.content))
+        if response.status_code == 304 and entry is not None:
+            cache.touch(key)
+            cache.record('revalidations')
+            return entry['df'].copy(), None
+        if entry is not None and (response.status_code >= 500 or response.status_code == 429):
+            # Letterboxd is struggling; an old copy beats an error page
+            cache.record('stale')
+            return entry['df'].copy(), None
+        if cache is not None:
+            cache.record('misses')
+        if response.status_code != 200:
+            return None, feed_error(username, response.status_code)
+
+        with tracer.span("feed.parse", username=key):
+            df, error = parse(response.content, known_guids)
+        if error:
+            return None, error
+        if cache is not None and not known_guids:
+            cache.put(key, df, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            df = df.copy()
+        return df, None
+
+    except Exception as e:
+        if entry is not None:
+            cache.record('stale')
+            return entry['df'].copy(), None
+        if isinstance(e, ExecutorBusy):
+            raise
+        return None, feed_error(username, error=e)
+
+def feed_error(username, status=None, error=None):
+    # What a user is told when their feed couldn't be fetched
+    from ltbx.http import UpstreamUnavailable
+
+    if isinstance(error, UpstreamUnavailable):
+        return "Letterboxd isn't responding right now. Please try again in a minute."
+    if error is not None:
+        return f"Error fetching RSS: {str(error)}"
+    return f"Could not find user '{username}' (Status: {status})"
+
+# --- RSS PARSING ---
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+
+# The feed is read in a single streaming pass: each <item> is turned into a row
+# as soon as its closing tag arrives and is then cleared, so we never hold the
+# whole tree. Tags are matched on their lower-cased local name, which keeps the
+# parser indifferent to the namespace URI Letterboxd declares for its prefix.
+
+_IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_SRC_ATTR_RE = re.compile(r'(?<![\w-])src\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+_IMG_PARAGRAPH_RE = re.compile(r'<p\b[^>]*>(?:(?!</p\s*>).)*?<img\b.*?(?:</p\s*>|$)', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]*>')
+
+def extract_description(description):
+    # Poster URL and review word count from an item's description HTML,
+    # without building a DOM. The poster sits in its own <p>, which is dropped
+    # before counting words so it doesn't count towards the review.
+    poster_url = None
+    img = _IMG_TAG_RE.search(description)
+    if img:
+        src = _SRC_ATTR_RE.search(img.group(0))
+        if src:
+            poster_url = html.unescape(next(g for g in src.groups() if g is not None))
+
+    text = _IMG_PARAGRAPH_RE.sub('', description)
+    text_content = ''.join(html.unescape(chunk).strip() for chunk in _TAG_RE.split(text))
+    return poster_url, len(text_content.split())
+
+def add_calendar_columns(df):
+    import pandas as pd
+
+    # Month/Day as ordered categoricals so counts come out in calendar order
+    # and take a byte per row instead of a string
+    df['Month'] = pd.Categorical(df['Date'].dt.month_name(), categories=MONTH_ORDER, ordered=True)
+    df['Day'] = pd.Categorical(df['Date'].dt.day_name(), categories=DAY_ORDER, ordered=True)
+    df['Decade'] = (df['Year'] // 10) * 10
+    return df
+
+def repeated_entries(df, existing=None):
+    # Mask of the rows of df already in `existing` or earlier in df. Two rows
+    # with guids are the same entry only if the guids match, so a same-day
+    # rewatch (another viewing) is kept; a row without one (from a data
+    # export) matches any row on watched date, title and year.
+    import numpy as np
+
+    guids, keys, guidless_keys = set(), set(), set()
+
+    def rows(frame):
+        dates = frame['Date'].dt.strftime('%Y-%m-%d')
+        entry = (dates + '|' + frame['Name'].astype(str) + '|' + frame['Year'].astype(str)).tolist()
+        guid = frame['Guid'].tolist() if 'Guid' in frame else [None] * len(frame)
+        return zip([g if isinstance(g, str) and g else None for g in guid], entry)
+
+    def add(guid, key):
+        keys.add(key)
+        if guid is None:
+            guidless_keys.add(key)
+        else:
+            guids.add(guid)
+
+    if existing is not None:
+        for guid, key in rows(existing):
+            add(guid, key)
+    repeated = []
+    for guid, key in rows(df):
+        seen = key in keys if guid is None else guid in guids or key in guidless_keys
+        repeated.append(seen)
+        if not seen:
+            add(guid, key)
+    return np.array(repeated, dtype=bool)
+
+def _local_name(tag):
+    return tag.rpartition('}')[2].lower()
+
+def scan_feed(content):
+    # (guid, pubDate) of every diary item, in feed order, without parsing
+    # descriptions, dates or building a frame; cheap enough to run on every
+    # background refresh just to see whether anything is new
+    items = []
+    for _, item in ET.iterparse(io.BytesIO(content), events=('end',)):
+        if _local_name(item.tag) != 'item':
+            continue
+        fields = {}
+        for child in item:
+            fields.setdefault(_local_name(child.tag), child.text or '')
+        item.clear()
+        if 'watcheddate' in fields:
+            items.append((fields.get('guid') or None, fields.get('pubdate') or None))
+    return items
+
+def parse_rss_feed(content, known_guids=None):
+    import pandas as pd
+
+    known_guids = known_guids or ()
+    try:
+        guids, dates, names, years, ratings, rewatches, posters, review_words = [], [], [], [], [], [], [], []
+        skipped = 0
+
+        for _, item in ET.iterparse(io.BytesIO(content), events=('end',)):
+            if _local_name(item.tag) != 'item':
+                continue
+
+            fields = {}
+            for child in item:
+                fields.setdefault(_local_name(child.tag), child.text or '')
+            item.clear()
+
+            if 'watcheddate' not in fields:
+                continue
+            guid = fields.get('guid') or None
+            if guid in known_guids:
+                skipped += 1
+                continue
+
+            year = fields.get('filmyear', '')
+            poster_url, review_length = None, 0
+            if 'description' in fields:
+                poster_url, review_length = extract_description(fields['description'])
+
+            guids.append(guid)
+            dates.append(fields['watcheddate'])
+            names.append(fields.get('filmtitle', "Unknown"))
+            years.append(int(year) if year.isdigit() else 0)
+            ratings.append(float(fields['memberrating']) if 'memberrating' in fields else 0.0)
+            rewatches.append(fields.get('rewatch') == 'Yes')
+            posters.append(poster_url)
+            review_words.append(review_length)
+
+        if not dates and not skipped:
+            return None, "No diary entries found in RSS feed."
+
+        df = pd.DataFrame({
+            'Guid': guids,
+            'Date': pd.to_datetime(dates),
+            'Name': names,
+            'Year': years,
+            'Rating': ratings,
+            'Rewatch': pd.Series(rewatches, dtype=bool),
+            'Poster': posters,
+            'Review_Words': review_words,
+        })
+        df['Has_Review'] = df['Review_Words'] > 5
+        add_calendar_columns(df)
+
+        return df, None
+
+    except Exception as e:
+        return None, f"Error parsing RSS: {str(e)}"
@@ -0,0 +1,252 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from ltbx.tracing import tracer
+
+# --- SHARED HTTP CLIENT ---
+# One place for talking to Letterboxd:
+#   - a pooled keep-alive Session, so repeat fetches reuse connections
+#   - retries with jittered exponential backoff on connection errors, 429 and
+#     5xx, honouring Retry-After (never retrying sooner than it says, and
+#     giving up at once when it asks for more than RETRY_AFTER_MAX seconds)
+#   - single-flight: concurrent callers asking for the same key share one
+#     in-flight download instead of each hitting upstream
+#   - a circuit breaker per host: after a run of failed (or too slow) calls it
+#     opens and requests fail fast with UpstreamUnavailable until a cooldown
+#     has passed, so callers can serve stale data instead of waiting
+#
+# It is thread-based like the rest of the app: Streamlit runs each session's
+# script in its own thread and batch.py uses a thread pool.
+
+HTTP_TIMEOUT = float(os.environ.get("LTBX_HTTP_TIMEOUT", 10))
+HTTP_RETRIES = int(os.environ.get("LTBX_HTTP_RETRIES", 2))
+HTTP_POOL_SIZE = 32
+RETRY_AFTER_MAX = float(os.environ.get("LTBX_RETRY_AFTER_MAX", 10))
+BREAKER_THRESHOLD = int(os.environ.get("LTBX_BREAKER_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.environ.get("LTBX_BREAKER_COOLDOWN", 30))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class UpstreamUnavailable(Exception):
+    pass
+
+class HostRateLimiter:
+    # Spaces requests to the same host at least 1/rate seconds apart
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class CircuitBreaker:
+    # closed -> open after `threshold` consecutive failures; open -> half-open
+    # once `cooldown` seconds have passed, letting one trial call through;
+    # the trial's outcome closes or re-opens it. Calls slower than
+    # `slow_call` seconds count as failures.
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, slow_call=None, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.slow_call = slow_call if slow_call is not None else HTTP_TIMEOUT / 2
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and self.clock() - self.opened_at >= self.cooldown:
+                self.state = "half-open"
+                self._trial = False
+            if self.state == "closed":
+                return True
+            if self.state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok, elapsed=0.0):
+        with self._lock:
+            if ok and elapsed <= self.slow_call:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = self.clock()
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'trips': self.trips, 'rejected': self.rejected}
+
+class SingleFlight:
+    # do(key, fn): the first caller for a key runs fn; callers arriving while
+    # it runs wait and get the same result (or exception)
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+            else:
+                self.coalesced += 1
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        try:
+            call['result'] = fn()
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+        return call['result']
+
+class HttpClient:
+    def __init__(self, pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, backoff=0.5, timeout=HTTP_TIMEOUT,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN, before_request=None,
+                 retry_after_max=RETRY_AFTER_MAX):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.retry_after_max = retry_after_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.before_request = before_request  # e.g. a rate limiter's wait(url)
+        self.flights = SingleFlight()
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def breaker(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown,
+                                                      slow_call=self.timeout / 2)
+            return self._breakers[host]
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def fetch(self, url, headers=None, stream=False, allow_redirects=True):
+        # Returns (response, attempts). Raises UpstreamUnavailable when the
+        # host's breaker is open, or the last error once retries run out.
+        # With stream=True only the headers have been read; the caller reads
+        # the body and closes the response.
+        import requests
+
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise UpstreamUnavailable(f"{urlparse(url).netloc} is failing; not retrying for now")
+        try:
+            return self._attempts(url, headers, breaker, stream, allow_redirects)
+        except requests.RequestException:
+            raise  # recorded by _attempts
+        except BaseException:
+            # Anything else still settles the call with the breaker, or a
+            # half-open one would wait for its trial's outcome forever
+            breaker.record(False)
+            raise
+
+    def _attempts(self, url, headers, breaker, stream, allow_redirects):
+        import requests
+
+        for attempt in range(self.retries + 1):
+            if self.before_request is not None:
+                self.before_request(url)
+            self._count('requests')
+            # Only the request itself counts towards slow_call, not the rate
+            # limiter's wait or the backoff before it
+            started = time.monotonic()
+            try:
+                with tracer.span("http.get", url=url, attempt=attempt + 1) as span:
+                    response = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream,
+                                                allow_redirects=allow_redirects)
+                    span.set(status=response.status_code)
+            except requests.RequestException:
+                if attempt == self.retries:
+                    self._count('failures')
+                    breaker.record(False)
+                    raise
+                delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    ok = response.status_code < 500 and response.status_code != 429
+                    if not ok:
+                        self._count('failures')
+                    breaker.record(ok, time.monotonic() - started)
+                    return response, attempt + 1
+                response.close()
+                retry_after = response.headers.get("Retry-After", "")
+                if not retry_after.isdigit():
+                    delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                elif float(retry_after) > self.retry_after_max:
+                    # Not worth holding the caller's thread for; it gets the
+                    # error response now
+                    self._count('failures')
+                    breaker.record(False)
+                    return response, attempt + 1
+                else:
+                    # Retry-After is a floor: the jitter only ever adds to it
+                    delay = float(retry_after) + random.uniform(0, self.backoff)
+            self._count('retries')
+            time.sleep(delay)
+
+    def get(self, url, headers=None):
+        return self.fetch(url, headers)[0]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            breakers = dict(self._breakers)
+        stats['coalesced'] = self.flights.coalesced
+        stats['breakers'] = {host: breaker.stats() for host, breaker in breakers.items()}
+        return stats
+
+_default_client = None
+_default_lock = threading.Lock()
+
+def default_client():
+    # The process-wide client fetch_rss_data uses when none is passed
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
@@ -0,0 +1,336 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import unicodedata
+from dataclasses import dataclass
+
+from ltbx.tracing import tracer
+
+# --- FILM METADATA ---
+# Genres, runtime, director, country and language for diary rows, joined from
+# a local bulk dump instead of per-film network calls. The dump is a TSV
+# (optionally .gz) with a header row:
+#
+#   title  year  genres  runtime  directors  countries  languages
+#
+# where genres/directors/countries/languages are comma-separated; only the
+# first director, country and language are kept. `build` turns it into an
+# index directory that loads by memory-mapping, so a worker opens it in
+# milliseconds and only touches the pages its lookups hit:
+#
+#   keys.npy        sorted 64-bit hashes of (normalized title, year)
+#   films.npy       one fixed-size record per key, in key order
+#   loose_keys.npy  hashes of (loosely normalized title, year), sorted, with
+#   loose_rows.npy  the films.npy row each one points to
+#   directors.bin + directors_offsets.npy   UTF-8 director names
+#   meta.json       genre/country/language vocabularies and build info
+#
+# Lookups try, in order: the exact title and year; the same title a year
+# either side (release vs festival years); then a loose title ignoring case,
+# accents, punctuation and a leading article, at the year and a year either
+# side. Films without a year are left unmatched. Everything is vectorized,
+# so a whole diary is matched with a few binary searches per stage.
+#
+#   python -m ltbx.metadata build dump.tsv.gz metadata/
+#   python -m ltbx.metadata lookup metadata/ "In the Mood for Love" 2000
+
+METADATA_INDEX = os.environ.get("LTBX_METADATA_INDEX")
+DUMP_COLUMNS = ['title', 'year', 'genres', 'runtime', 'directors', 'countries', 'languages']
+MAX_GENRES = 64  # genres are stored as a bitmask
+FILM_DTYPE = [('year', '<i2'), ('runtime', '<u2'), ('genres', '<u8'), ('director', '<i4'),
+              ('country', '<u2'), ('language', '<u2')]
+
+SPACES = re.compile(r'\s+')
+LEADING_ARTICLE = re.compile(r'^(the|a|an) ')
+TRAILING_ARTICLE = re.compile(r', (the|a|an)$')
+NON_ALNUM = re.compile(r'[^a-z0-9]')
+
+def _normalize(title, loose=False):
+    title = SPACES.sub(' ', str(title).lower().strip())
+    if loose:
+        title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+        title = NON_ALNUM.sub('', TRAILING_ARTICLE.sub('', LEADING_ARTICLE.sub('', title)))
+    return title
+
+def _keys(titles, years, loose=False):
+    # uint64 hash per (title, year); pandas' hash is seeded with a fixed key,
+    # so the same pair hashes the same in every process
+    import numpy as np
+    import pandas as pd
+
+    joined = [f"{_normalize(title, loose)}\x1f{year}" for title, year in zip(titles, np.asarray(years).tolist())]
+    return pd.util.hash_array(np.array(joined, dtype=object))
+
+def _first(values):
+    # First entry of each comma-separated field
+    return values.str.split(',', n=1).str[0].str.strip()
+
+def _vocabulary(values):
+    # Ids for a column of labels, most common first; id 0 is "unknown"
+    counts = values[values != ''].value_counts()
+    vocabulary = [''] + counts.index.tolist()
+    ids = {label: i for i, label in enumerate(vocabulary)}
+    return vocabulary, values.map(ids).fillna(0)
+
+def build_index(dump_path, directory):
+    # Builds the index directory from a dump; returns its meta.json contents
+    import numpy as np
+    import pandas as pd
+
+    with tracer.span("metadata.build") as span:
+        dump = pd.read_csv(dump_path, sep='\t', dtype=str, keep_default_na=False, quoting=csv.QUOTE_NONE)
+        missing = set(DUMP_COLUMNS) - set(dump.columns)
+        if missing:
+            raise ValueError(f"{dump_path} is missing columns: {', '.join(sorted(missing))}")
+        years = pd.to_numeric(dump['year'], errors='coerce').fillna(0).astype(np.int16).to_numpy()
+
+        # One film per key: the first occurrence in the dump wins
+        keys = _keys(dump['title'].tolist(), years)
+        order = np.argsort(keys, kind='stable')
+        keys, first = np.unique(keys[order], return_index=True)
+        rows = order[first]
+        dump = dump.iloc[rows].reset_index(drop=True)
+        years = years[rows]
+
+        genres = dump['genres'].str.split(',').explode().str.strip()
+        genres = genres[genres != '']
+        genre_vocabulary = genres.value_counts().index[:MAX_GENRES].tolist()
+        bits = genres.map({genre: i for i, genre in enumerate(genre_vocabulary)}).dropna()
+        masks = np.zeros(len(dump), dtype=np.uint64)
+        np.bitwise_or.at(masks, bits.index.to_numpy(), np.uint64(1) << bits.to_numpy().astype(np.uint64))
+
+        countries, country_ids = _vocabulary(_first(dump['countries']))
+        languages, language_ids = _vocabulary(_first(dump['languages']))
+        director_names = _first(dump['directors'])
+        directors = director_names[director_names != ''].unique()
+        director_ids = pd.Series(np.arange(len(directors), dtype=np.int32), index=directors)
+        encoded = [name.encode("utf-8") for name in directors]
+        offsets = np.concatenate([[0], np.cumsum([len(b) for b in encoded], dtype=np.int64)])
+
+        films = np.zeros(len(dump), dtype=FILM_DTYPE)
+        films['year'] = years
+        films['runtime'] = pd.to_numeric(dump['runtime'], errors='coerce').fillna(0).clip(0, 65535).to_numpy()
+        films['genres'] = masks
+        films['director'] = director_names.map(director_ids).fillna(-1).to_numpy()
+        films['country'] = country_ids.to_numpy()
+        films['language'] = language_ids.to_numpy()
+
+        loose = _keys(dump['title'].tolist(), years, loose=True)
+        loose_order = np.argsort(loose, kind='stable')
+        loose_keys, loose_first = np.unique(loose[loose_order], return_index=True)
+
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "keys.npy"), keys)
+        np.save(os.path.join(directory, "films.npy"), films)
+        np.save(os.path.join(directory, "loose_keys.npy"), loose_keys)
+        np.save(os.path.join(directory, "loose_rows.npy"), loose_order[loose_first].astype(np.int32))
+        np.save(os.path.join(directory, "directors_offsets.npy"), offsets)
+        with open(os.path.join(directory, "directors.bin"), "wb") as f:
+            f.write(b"".join(encoded))
+        meta = {
+            'films': len(films),
+            'dump_rows': int(len(order)),
+            'genres': genre_vocabulary,
+            'countries': countries,
+            'languages': languages,
+            'directors': len(directors),
+            'source': os.path.basename(str(dump_path)),
+        }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        span.set(films=len(films))
+    return meta
+
+def _find(sorted_keys, keys):
+    # Position of each key in sorted_keys, or -1
+    import numpy as np
+
+    if not len(sorted_keys):
+        return np.full(len(keys), -1, dtype=np.int64)
+    positions = np.searchsorted(sorted_keys, keys)
+    positions[positions == len(sorted_keys)] = 0
+    return np.where(sorted_keys[positions] == keys, positions, -1)
+
+class MetadataIndex:
+    def __init__(self, directory):
+        import numpy as np
+
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        # Plain ndarray views of the maps: slicing a np.memmap is much slower
+        load = lambda name: np.load(os.path.join(directory, name), mmap_mode='r').view(np.ndarray)
+        self.keys = load("keys.npy")
+        self.films = load("films.npy")
+        self.loose_keys = load("loose_keys.npy")
+        self.loose_rows = load("loose_rows.npy")
+        self.director_offsets = load("directors_offsets.npy")
+        self.directors = np.memmap(os.path.join(directory, "directors.bin"), dtype=np.uint8, mode='r').view(np.ndarray) \
+            if self.meta['directors'] else np.zeros(0, np.uint8)
+        self.genres = self.meta['genres']
+        self.countries = self.meta['countries']
+        self.languages = self.meta['languages']
+        self.counters = {'lookups': 0, 'exact': 0, 'year±1': 0, 'loose': 0}
+        self._genre_names = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, names, years):
+        # (row per entry or -1, how it matched: 'exact', 'year±1', 'loose' or None)
+        import numpy as np
+        import pandas as pd
+
+        # Each distinct (title, year) is looked up once; diaries repeat a lot
+        years = np.asarray(years, dtype=np.int64)
+        entries = len(years)
+        if entries > 1:
+            codes, pairs = pd.factorize(pd.MultiIndex.from_arrays([pd.Series(names), years]))
+            names = pairs.get_level_values(0).tolist()
+            years = pairs.get_level_values(1).to_numpy(dtype=np.int64)
+        else:
+            codes, names = np.zeros(entries, dtype=np.int64), list(names)
+        rows = np.full(len(names), -1, dtype=np.int64)
+        match = np.full(len(names), None, dtype=object)
+        dated = years > 0
+        stages = [
+            ('exact', self.keys, None, False, (0,)),
+            ('year±1', self.keys, None, False, (-1, 1)),
+            ('loose', self.loose_keys, self.loose_rows, True, (0, -1, 1)),
+        ]
+        for label, sorted_keys, pointers, loose, shifts in stages:
+            for shift in shifts:
+                todo = np.flatnonzero((rows < 0) & dated)
+                if not len(todo):
+                    break
+                found = _find(sorted_keys, _keys([names[i] for i in todo], years[todo] + shift, loose=loose))
+                hit = found >= 0
+                rows[todo[hit]] = found[hit] if pointers is None else pointers[found[hit]]
+                match[todo[hit]] = label
+        rows, match = rows[codes], match[codes]
+        for label in ('exact', 'year±1', 'loose'):
+            self.counters[label] += int((match == label).sum())
+        self.counters['lookups'] += entries
+        return rows, match
+
+    def director(self, i):
+        if i < 0:
+            return None
+        return bytes(self.directors[self.director_offsets[i]:self.director_offsets[i + 1]]).decode("utf-8")
+
+    def genre_names(self, mask):
+        names = self._genre_names.get(mask)
+        if names is None:
+            names = self._genre_names[mask] = tuple(g for i, g in enumerate(self.genres) if int(mask) >> i & 1)
+        return names
+
+    def film(self, title, year):
+        # Metadata for one film as a dict, or None
+        rows, match = self.lookup([title], [year])
+        if rows[0] < 0:
+            return None
+        film = self.films[rows[0]]
+        return {
+            'year': int(film['year']),
+            'runtime': int(film['runtime']) or None,
+            'genres': list(self.genre_names(film['genres'])),
+            'director': self.director(int(film['director'])),
+            'country': self.countries[film['country']] or None,
+            'language': self.languages[film['language']] or None,
+            'match': match[0],
+        }
+
+    def stats(self):
+        return dict(self.counters, films=len(self))
+
+def enrich(df, index):
+    # df plus Runtime (minutes, NaN when unknown), Genres (tuple), Director,
+    # Country, Language and Match columns
+    import numpy as np
+
+    with tracer.span("metadata.enrich", rows=len(df)) as span:
+        rows, match = index.lookup(df['Name'], df['Year'].to_numpy())
+        found = rows >= 0
+        films = index.films[np.where(found, rows, 0)] if len(index) else np.zeros(len(df), dtype=FILM_DTYPE)
+        runtime = films['runtime'].astype(np.float64)
+        runtime[~found | (runtime == 0)] = np.nan
+        lookup_label = lambda vocabulary: np.array([None] + vocabulary[1:], dtype=object)
+        countries = lookup_label(index.countries)[films['country']]
+        languages = lookup_label(index.languages)[films['language']]
+        director_ids = np.where(found, films['director'], -1)
+        names = {i: index.director(int(i)) for i in np.unique(director_ids)}
+        genre_masks = np.where(found, films['genres'], 0)
+        genres = {mask: index.genre_names(mask) for mask in np.unique(genre_masks)}
+
+        out = df.copy()
+        out['Runtime'] = runtime
+        out['Genres'] = [genres[mask] for mask in genre_masks]
+        out['Director'] = [names[i] for i in director_ids]
+        out['Country'] = np.where(found, countries, None)
+        out['Language'] = np.where(found, languages, None)
+        out['Match'] = match
+        span.set(matched=int(found.sum()))
+        return out
+
+@dataclass(frozen=True)
+class MetadataSummary:
+    matched: int
+    total: int
+    minutes: int
+    avg_runtime: float
+    genre_counts: object
+    director_counts: object
+    country_counts: object
+    language_counts: object
+    longest_film: object  # row with Name, Year and Runtime, or None
+
+    @property
+    def hours(self):
+        return self.minutes / 60
+
+    @property
+    def match_pct(self):
+        return (self.matched / self.total) * 100 if self.total else 0
+
+def summarize_metadata(enriched):
+    matched = enriched[enriched['Match'].notna()]
+    runtimes = matched['Runtime'].dropna()
+    genres = matched['Genres'].explode().dropna()
+    return MetadataSummary(
+        matched=len(matched),
+        total=len(enriched),
+        minutes=int(runtimes.sum()),
+        avg_runtime=float(runtimes.mean()) if len(runtimes) else float('nan'),
+        genre_counts=genres.value_counts(),
+        director_counts=matched['Director'].dropna().value_counts(),
+        country_counts=matched['Country'].dropna().value_counts(),
+        language_counts=matched['Language'].dropna().value_counts(),
+        longest_film=matched.loc[runtimes.idxmax()] if len(runtimes) else None,
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the film metadata index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build an index directory from a TSV dump")
+    build.add_argument("dump")
+    build.add_argument("directory")
+    lookup = sub.add_parser("lookup", help="look up one film")
+    lookup.add_argument("directory")
+    lookup.add_argument("title")
+    lookup.add_argument("year", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        meta = build_index(args.dump, args.directory)
+        print(f"indexed {meta['films']} films ({meta['dump_rows']} dump rows, {len(meta['genres'])} genres, "
+              f"{meta['directors']} directors) into {args.directory}")
+        return 0
+    film = MetadataIndex(args.directory).film(args.title, args.year)
+    print(json.dumps(film, ensure_ascii=False, indent=2) if film else "not found")
+    return 0 if film else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
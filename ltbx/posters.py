@@ -0,0 +1,310 @@
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from ltbx.tracing import tracer
+
+# --- POSTER THUMBNAILS ---
+# Instead of every browser hotlinking full-size posters from Letterboxd's CDN,
+# the server fetches each poster once, shrinks it to the widths the app's CSS
+# actually displays and keeps the result in a content-addressed disk cache
+# fronted by an in-memory LRU. Pages then embed the thumbnails (or one sprite
+# sheet for the whole wall) directly.
+#
+# Poster URLs come out of feed content, so they are only fetched from the
+# image CDNs in POSTER_HOSTS, through the shared HTTP client (and its circuit
+# breaker), without following redirects. Bodies are read up to
+# POSTER_MAX_BYTES and images over POSTER_MAX_PIXELS are never decoded.
+#
+# Layout: <root>/objects/<aa>/<sha256 of thumbnail>.jpg
+#         <root>/urls/<aa>/<sha256 of url>-<width>.json  -> {"digest", "original_bytes"}
+
+POSTER_CACHE_DIR = os.environ.get("LTBX_POSTER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ltbx-posters"))
+POSTER_OFFLINE = os.environ.get("LTBX_POSTERS_OFFLINE", "") == "1"
+POSTER_WIDTHS = (100, 70)  # .poster-img on desktop and on phones
+SPRITE_FIT = (100, 150)  # one sprite cell, 2:3 like the posters
+SPRITE_CACHE_SIZE = 64
+FAILURE_RETRY_AFTER = 600  # seconds before a poster that failed is tried again
+POSTER_HOSTS = frozenset(host.strip().lower() for host in os.environ.get(
+    "LTBX_POSTER_HOSTS", "a.ltrbxd.com,s.ltrbxd.com,image.tmdb.org").split(",") if host.strip())
+POSTER_MAX_BYTES = int(os.environ.get("LTBX_POSTER_MAX_BYTES", 5 * 1024 * 1024))
+POSTER_MAX_PIXELS = 4000 * 6000
+
+def allowed_url(url, hosts=POSTER_HOSTS):
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and (parsed.hostname or "").lower() in hosts
+
+def _open_image(image_bytes):
+    # Refuses decompression bombs before any pixel data is decoded
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = POSTER_MAX_PIXELS
+    img = Image.open(io.BytesIO(image_bytes))
+    if img.width * img.height > POSTER_MAX_PIXELS:
+        img.close()
+        raise ValueError(f"image of {img.width}x{img.height} is over {POSTER_MAX_PIXELS} pixels")
+    return img
+
+class PosterCache:
+    def __init__(self, root=POSTER_CACHE_DIR, memory_entries=1024, offline=POSTER_OFFLINE, workers=8, client=None,
+                 hosts=POSTER_HOSTS, max_bytes=POSTER_MAX_BYTES, clock=time.monotonic):
+        # client: an ltbx.http.HttpClient, the shared default one if not given
+        self.root = root
+        self.memory_entries = memory_entries
+        self.offline = offline
+        self.workers = workers
+        self.client = client
+        self.hosts = hosts
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._memory = OrderedDict()
+        self._failed = OrderedDict()  # url -> when to try it again, soonest first
+        self._pool = None
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'fetches': 0,
+            'failures': 0,
+            'refused': 0,
+            'bytes_fetched': 0,
+            'bytes_served': 0,
+            'bytes_saved': 0,
+        }
+
+    # --- storage ---
+
+    def _url_path(self, url, width):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, "urls", key[:2], f"{key}-{width}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.jpg")
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _remember_failure(self, url):
+        # Drops the entries whose retry time has passed, and past
+        # memory_entries the oldest ones, so bad URLs can't pile up
+        now = self.clock()
+        with self._lock:
+            self._failed.pop(url, None)
+            while self._failed and (next(iter(self._failed.values())) <= now
+                                    or len(self._failed) >= self.memory_entries):
+                self._failed.popitem(last=False)
+            self._failed[url] = now + FAILURE_RETRY_AFTER
+
+    def _from_memory(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _from_disk(self, url, width):
+        try:
+            with open(self._url_path(url, width), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._object_path(meta['digest']), "rb") as f:
+                return f.read(), meta['original_bytes']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    # --- thumbnails ---
+
+    @staticmethod
+    def resize(image_bytes, width):
+        from PIL import Image
+
+        with _open_image(image_bytes) as img:
+            img = img.convert("RGB")
+            height = max(1, round(img.height * width / img.width))
+            out = io.BytesIO()
+            img.resize((width, height), Image.LANCZOS).save(out, "JPEG", quality=82, optimize=True)
+            return out.getvalue()
+
+    def add(self, url, image_bytes):
+        # Stores thumbnails of an original image for every display width; this
+        # is also how fixtures are seeded for offline use
+        for width in POSTER_WIDTHS:
+            thumb = self.resize(image_bytes, width)
+            digest = hashlib.sha256(thumb).hexdigest()
+            if not os.path.exists(self._object_path(digest)):
+                self._write_atomic(self._object_path(digest), thumb)
+            meta = {'digest': digest, 'original_bytes': len(image_bytes)}
+            self._write_atomic(self._url_path(url, width), json.dumps(meta).encode("utf-8"))
+            self._remember((url, width), (thumb, len(image_bytes)))
+
+    def _fetch(self, url):
+        from ltbx.http import default_client
+
+        client = self.client or default_client()
+        response, _ = client.fetch(url, stream=True, allow_redirects=False)
+        with response:
+            if response.status_code != 200:
+                raise ValueError(f"status {response.status_code}")
+            length = response.headers.get('Content-Length', '')
+            if length.isdigit() and int(length) > self.max_bytes:
+                raise ValueError(f"poster of {length} bytes is over {self.max_bytes}")
+            body = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                body += chunk
+                if len(body) > self.max_bytes:
+                    raise ValueError(f"poster is over {self.max_bytes} bytes")
+            return bytes(body)
+
+    def thumbnail(self, url, width=POSTER_WIDTHS[0]):
+        # JPEG bytes of the poster at the given width, or None if unavailable
+        if not url:
+            return None
+        key = (url, width)
+        entry = self._from_memory(key)
+        if entry is not None:
+            self._count('memory_hits')
+        else:
+            entry = self._from_disk(url, width)
+            if entry is not None:
+                self._count('disk_hits')
+                self._remember(key, entry)
+            elif self.offline or self.clock() < self._failed.get(url, 0):
+                self._count('failures')
+                return None
+            elif not allowed_url(url, self.hosts):
+                self._count('refused')
+                return None
+            else:
+                try:
+                    original = self._fetch(url)
+                    self.add(url, original)
+                except Exception:
+                    self._count('failures')
+                    self._remember_failure(url)
+                    return None
+                with self._lock:
+                    self._failed.pop(url, None)
+                self._count('fetches')
+                self._count('bytes_fetched', len(original))
+                entry = self._from_memory(key) or self._from_disk(url, width)
+
+        thumb, original_bytes = entry
+        self._count('bytes_served', len(thumb))
+        self._count('bytes_saved', max(0, original_bytes - len(thumb)))
+        return thumb
+
+    def thumbnails(self, urls, width=POSTER_WIDTHS[0]):
+        # Same as thumbnail() for many posters, fetching misses concurrently
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ltbx-posters")
+            pool = self._pool
+        with tracer.span("posters.thumbnails", count=len(urls)):
+            return list(pool.map(lambda url: self.thumbnail(url, width), urls))
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    @staticmethod
+    def data_uri(image_bytes):
+        return "data:image/jpeg;base64," + base64.b64encode(image_bytes).decode("ascii")
+
+    def sprite(self, thumbs, fit=SPRITE_FIT):
+        # One JPEG holding the given thumbnails side by side in fit-sized cells,
+        # so a whole wall of posters is a single image. Cell i sits at
+        # background-position i / (len - 1) * 100% when scaled to the sheet.
+        if not thumbs:
+            return None
+        key = hashlib.sha256(b"".join(hashlib.sha256(t).digest() for t in thumbs)).hexdigest()
+        with self._lock:
+            if key in self._sprites:
+                self._sprites.move_to_end(key)
+                return self._sprites[key]
+        with tracer.span("posters.sprite", count=len(thumbs)):
+            sheet = self._build_sprite(thumbs, fit)
+        with self._lock:
+            self._sprites[key] = sheet
+            while len(self._sprites) > SPRITE_CACHE_SIZE:
+                self._sprites.popitem(last=False)
+        return sheet
+
+    @staticmethod
+    def _build_sprite(thumbs, fit):
+        from PIL import Image
+
+        sheet = Image.new("RGB", (fit[0] * len(thumbs), fit[1]), (20, 24, 28))
+        for i, thumb in enumerate(thumbs):
+            with _open_image(thumb) as img:
+                img = img.convert("RGB")
+                if img.width != fit[0]:
+                    img = img.resize((fit[0], max(1, round(img.height * fit[0] / img.width))))
+                sheet.paste(img.crop((0, 0, fit[0], min(img.height, fit[1]))), (i * fit[0], 0))
+        out = io.BytesIO()
+        sheet.save(out, "JPEG", quality=82, optimize=True)
+        return out.getvalue()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['failed_urls'] = len(self._failed)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['fetches'] + stats['failures']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the poster thumbnail cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed = sub.add_parser("seed", help="load fixtures from a directory with a manifest.json of {url: filename}")
+    seed.add_argument("directory")
+    warm = sub.add_parser("warm", help="fetch and cache every poster URL listed in a file")
+    warm.add_argument("urls")
+    parser.add_argument("--root", default=POSTER_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    cache = PosterCache(args.root)
+    if args.command == "seed":
+        with open(os.path.join(args.directory, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        for url, filename in manifest.items():
+            with open(os.path.join(args.directory, filename), "rb") as f:
+                cache.add(url, f.read())
+        print(f"seeded {len(manifest)} posters into {args.root}")
+    else:
+        with open(args.urls, encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+        cache.thumbnails(urls)
+        print(json.dumps(cache.stats(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
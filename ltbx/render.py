@@ -0,0 +1,274 @@
+import datetime
+import html
+import json
+import os
+import tempfile
+from string import Template
+
+from ltbx.feed import check_username
+from ltbx.charts import CHART_CONFIG, rating_trend_figure, rating_distribution_figure, day_rhythm_figure
+from ltbx.posters import PosterCache
+from ltbx.theme import REPORT_CSS
+from ltbx.tracing import tracer
+
+# --- STATIC REPORTS ---
+# Renders a WrappedReport into a self-contained HTML page (same sections and
+# styles as the Streamlit app) plus a JSON file with the underlying numbers,
+# so reports can be generated ahead of time and served by any static file
+# server. The templates below are compiled once at import; rendering a report
+# is string substitution only.
+#
+# Charts: "plotly" embeds the figures for plotly.js (loaded from the CDN),
+# "static" inlines images from a StaticChartCache when it can render them
+# (falling back to plotly), "none" leaves them out.
+#
+# Bundle layout: <directory>/<username>/index.html and data.json
+
+PAGE_CSS = """
+    body { margin: 0; background-color: #14181c; color: #9ab; font-family: 'Helvetica', sans-serif; }
+    main { max-width: 1100px; margin: 0 auto; padding: 30px 20px; }
+    hr { border: none; border-top: 1px solid #2c3440; margin: 30px 0; }
+    .caption { color: #678; font-size: 0.9em; }
+    .grid-2, .grid-3, .grid-4 { display: grid; gap: 16px; }
+    .grid-2 { grid-template-columns: repeat(2, 1fr); }
+    .grid-3 { grid-template-columns: repeat(3, 1fr); }
+    .grid-4 { grid-template-columns: repeat(4, 1fr); }
+    @media only screen and (max-width: 700px) {
+        .grid-2, .grid-3 { grid-template-columns: 1fr; }
+        .grid-4 { grid-template-columns: repeat(2, 1fr); }
+    }
+    .metric { background-color: #2c3440; border: 1px solid #456; padding: 15px; border-radius: 8px; }
+    .metric-label { color: #00e054; font-weight: bold; font-size: 0.9em; }
+    .metric-value { color: #fff; font-size: 2em; margin-top: 5px; }
+    .superlative { padding: 15px; border-radius: 8px; color: #fff; }
+    .superlative.info { background-color: rgba(64, 188, 244, 0.15); }
+    .superlative.success { background-color: rgba(0, 224, 84, 0.15); }
+    .superlative.warning { background-color: rgba(255, 128, 0, 0.15); }
+    .favorite { display: flex; gap: 20px; align-items: center; margin-bottom: 12px; color: #fff; }
+    .favorite img { width: 70px; border-radius: 4px; }
+    .fav-rating { color: #00e054; font-weight: bold; }
+    .chart { width: 100%; min-height: 380px; }
+    footer { text-align: center; color: #567; font-size: 0.8em; }
+"""
+
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>$title</title>
+<style>$css</style>
+</head>
+<body>
+<main>
+<h1>🎬 $title</h1>
+$personas
+<h3>📊 The Numbers</h3>
+<div class="grid-4">$metrics</div>
+<hr>
+<h2>🔥 Cinematic Roast</h2>
+<div class="roast-box">"$roast"</div>
+<hr>
+<h2>🧬 Your Movie DNA (Cine-MBTI)</h2>
+<p class="caption">A personality type based on your <strong>viewing habits</strong> (Eras, Ratings, Consistency).</p>
+$mbti
+<hr>
+<h2>⚡ Flash Stats</h2>
+<div class="grid-4">$flash</div>
+<hr>
+<h2>🎢 The Rating Rollercoaster</h2>
+<p class="caption">How your ratings have trended over these $total films.</p>
+$chart_trend
+<hr>
+<h2>🖼️ The Wall of Fame</h2>
+$posters
+<h3>🏆 Fun Superlatives</h3>
+<div class="grid-3">$superlatives</div>
+<hr>
+<div class="grid-2">
+<div><h2>⭐ Ratings Distribution</h2>$chart_ratings</div>
+<div><h2>🥁 Your Movie Rhythm</h2>$chart_rhythm</div>
+</div>
+<h3>👑 Recent Favorites</h3>
+$favorites
+<hr>
+<h2>🎵 The Soundtrack of Your Year</h2>
+<p class="caption">A dynamic playlist based on your Movie MBTI and Top Hits.</p>
+$playlist
+<hr>
+<footer>Data provided by Letterboxd public RSS feed. Not affiliated with Letterboxd.</footer>
+</main>
+$scripts
+</body>
+</html>
+""")
+
+METRIC_TEMPLATE = Template('<div class="metric"><div class="metric-label">$label</div><div class="metric-value">$value</div></div>')
+SUPERLATIVE_TEMPLATE = Template('<div class="superlative $kind"><strong>$label:</strong><br><br>$value</div>')
+FAVORITE_TEMPLATE = Template('<div class="favorite">$image<div><strong>$name</strong> ($year)<br>'
+                             '<span class="fav-rating">$rating ★</span> • Watched $watched</div></div>')
+CHART_DIV_TEMPLATE = Template('<div class="chart" id="chart-$name"></div>')
+CHART_SCRIPT_TEMPLATE = Template('<script>Plotly.newPlot("chart-$name", $figure.data, $figure.layout, $config);</script>')
+CHART_IMAGE_TEMPLATE = Template('<img src="$src" style="width: 100%;" alt="$name chart">')
+
+def _plotly_js_url():
+    from plotly.offline import get_plotlyjs_version
+
+    return f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+def _owner(username):
+    return "Your" if username in ("", "Your") else f"{username}'s"
+
+def _charts(report, df, mode, chart_cache):
+    # Returns ({name: html}, scripts html)
+    builders = {
+        'trend': lambda: rating_trend_figure(df),
+        'ratings': lambda: rating_distribution_figure(report.summary.rating_counts),
+        'rhythm': lambda: day_rhythm_figure(report.summary.day_counts),
+    }
+    if mode == "none":
+        return {name: "" for name in builders}, ""
+
+    charts, scripts = {}, []
+    for name, build in builders.items():
+        image = None
+        if mode == "static" and chart_cache is not None:
+            image = chart_cache.render(name, report.chart_key, build)
+        if image:
+            charts[name] = CHART_IMAGE_TEMPLATE.substitute(src=chart_cache.data_uri(image), name=name)
+        else:
+            charts[name] = CHART_DIV_TEMPLATE.substitute(name=name)
+            scripts.append(CHART_SCRIPT_TEMPLATE.substitute(name=name, figure=build().to_json(), config=json.dumps(CHART_CONFIG)))
+    if scripts:
+        scripts.insert(0, f'<script src="{_plotly_js_url()}" charset="utf-8"></script>')
+    return charts, "\n".join(scripts)
+
+def _metrics(report, period):
+    summary = report.summary
+    avg_year = int(summary.avg_year) if summary.oldest_film is not None else "N/A"
+    return "".join(METRIC_TEMPLATE.substitute(label=label, value=value) for label, value in (
+        ("Recent Logs" if period == "Recent" else "Logs", summary.total),
+        ("Avg Rating", f"{summary.avg_rating:.2f} ★"),
+        ("Review Rate", f"{summary.review_pct:.0f}%"),
+        ("Avg Release Year", avg_year),
+    ))
+
+def _superlatives(report):
+    summary = report.summary
+    parts = []
+    if summary.longest_title is not None:
+        parts.append(SUPERLATIVE_TEMPLATE.substitute(kind="info", label="📝 Longest Title",
+                                                     value=html.escape(str(summary.longest_title['Name']))))
+    for kind, label, film in (("success", "🕰️ Oldest Film", summary.oldest_film), ("warning", "🆕 Newest Film", summary.newest_film)):
+        if film is not None:
+            parts.append(SUPERLATIVE_TEMPLATE.substitute(kind=kind, label=label,
+                                                         value=f"{html.escape(str(film['Name']))} ({film['Year']})"))
+    return "".join(parts)
+
+def _favorites(report):
+    parts = []
+    for name, year, rating, watched, image in report.favorites:
+        if isinstance(image, bytes):
+            image = PosterCache.data_uri(image)
+        parts.append(FAVORITE_TEMPLATE.substitute(
+            image=f'<img src="{html.escape(image)}" alt="">' if image else "",
+            name=html.escape(str(name)), year=year, rating=rating, watched=watched))
+    return "".join(parts)
+
+def render_html(report, df, username="", period="Recent", charts="plotly", chart_cache=None):
+    with tracer.span("render.html", charts=charts):
+        chart_html, scripts = _charts(report, df, charts, chart_cache)
+        return PAGE_TEMPLATE.substitute(
+            title=html.escape(f"{_owner(username)} {period} Wrapped"),
+            css=REPORT_CSS + PAGE_CSS,
+            personas=report.persona_html,
+            metrics=_metrics(report, period),
+            roast=html.escape(report.roast),
+            mbti=report.mbti_html,
+            flash="".join(report.flash_html),
+            total=report.summary.total,
+            chart_trend=chart_html['trend'],
+            posters=report.posters_html,
+            superlatives=_superlatives(report),
+            chart_ratings=chart_html['ratings'],
+            chart_rhythm=chart_html['rhythm'],
+            favorites=_favorites(report),
+            playlist=report.playlist_html,
+            scripts=scripts,
+        )
+
+def _plain(value):
+    # numpy/pandas scalars and timestamps -> JSON-friendly values
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def _film(row):
+    if row is None:
+        return None
+    return {'name': str(row['Name']), 'year': _plain(row['Year'])}
+
+def report_data(report, username="", period="Recent"):
+    summary = report.summary
+    top = summary.top_movies
+    return {
+        'username': username,
+        'period': period,
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'fingerprint': report.fingerprint,
+        'stats': {
+            'total': summary.total,
+            'avg_rating': _plain(summary.avg_rating),
+            'avg_year': _plain(summary.avg_year),
+            'rewatches': summary.rewatches,
+            'rewatch_pct': _plain(summary.rewatch_pct),
+            'reviews': summary.reviews,
+            'review_pct': _plain(summary.review_pct),
+            'streak': summary.streak,
+            'streak_start': _plain(summary.streak_start),
+            'streak_end': _plain(summary.streak_end),
+            'max_binge': summary.max_binge,
+            'binge_date': summary.binge_date,
+            'fav_day': summary.fav_day,
+            'vibe': report.vibe,
+        },
+        'personas': [{'title': title, 'description': desc} for title, desc in report.personas],
+        'roast': report.roast,
+        'mbti': {'code': report.mbti_code, 'traits': {c: report.mbti_meaning[c] for c in report.mbti_code}},
+        'playlist': [{'song': song, 'artist': artist} for song, artist in report.playlist],
+        'favorites': [
+            {'name': str(name), 'year': _plain(year), 'rating': _plain(rating), 'watched': _plain(date), 'poster': poster}
+            for name, year, rating, date, poster in zip(top['Name'], top['Year'], top['Rating'], top['Date'], top['Poster'])
+        ],
+        'superlatives': {
+            'longest_title': None if summary.longest_title is None else str(summary.longest_title['Name']),
+            'oldest_film': _film(summary.oldest_film),
+            'newest_film': _film(summary.newest_film),
+        },
+        'ratings': {str(k): int(v) for k, v in summary.rating_counts.items()},
+        'days': {str(k): int(v) for k, v in summary.day_counts.items()},
+        'decades': {str(k): int(v) for k, v in summary.decade_counts.items()},
+    }
+
+def _write_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.chmod(tmp, 0o644)  # mkstemp's 0600 would hide it from the web server
+    os.replace(tmp, path)
+
+def write_bundle(directory, report, df, username, period="Recent", charts="plotly", chart_cache=None):
+    # Writes <directory>/<username>/index.html and data.json; returns both paths
+    target = os.path.join(directory, check_username(username))
+    os.makedirs(target, exist_ok=True)
+    page = render_html(report, df, username, period, charts, chart_cache)
+    with tracer.span("render.json"):
+        data = json.dumps(report_data(report, username, period), ensure_ascii=False)
+    html_path, data_path = os.path.join(target, "index.html"), os.path.join(target, "data.json")
+    _write_atomic(html_path, page)
+    _write_atomic(data_path, data)
+    return html_path, data_path
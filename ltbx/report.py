@@ -0,0 +1,213 @@
+import hashlib
+import html
+import os
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from ltbx.summary import summarize
+from ltbx.charts import chart_fingerprint
+from ltbx.rollups import Rollups
+from ltbx.metadata import enrich, summarize_metadata
+from ltbx.tracing import tracer
+from ltbx.analytics import (
+    get_multi_personalities,
+    generate_roast,
+    calculate_cine_mbti,
+    get_soundtrack_suggestions,
+)
+
+# --- REPORT ---
+# Everything the Wrapped page shows for one diary, computed in one go: the
+# summary, personas, MBTI, roast, playlist, favourites and the HTML fragments
+# for the card-style sections. The report is immutable and keyed by a
+# fingerprint of the diary, so the app can cache it and a widget rerun just
+# looks it up instead of recomputing every section. The roast and playlist
+# are drawn from an RNG seeded by the fingerprint, so the same diary always
+# gets the same ones.
+
+REPORT_CACHE_SIZE = int(os.environ.get("LTBX_REPORT_CACHE_SIZE", "64"))
+REPORT_CACHE_TTL = int(os.environ.get("LTBX_REPORT_CACHE_TTL", "3600"))
+
+@dataclass(frozen=True)
+class WrappedReport:
+    fingerprint: str
+    chart_key: str  # what the static chart cache is keyed by
+    summary: object
+    personas: list
+    mbti_code: str
+    mbti_meaning: dict
+    roast: str
+    vibe: str
+    playlist: list
+    favorites: list  # (name, year, rating, watched, image) with image as bytes or URL
+    persona_html: str
+    mbti_html: str
+    flash_html: list  # the four Flash Stats boxes
+    posters_html: str
+    playlist_html: str
+    rollups: object  # per-year Rollups for Wrapped-by-year and year-over-year
+    metadata: object  # MetadataSummary, or None without a metadata index
+    timings: dict  # section -> milliseconds spent building it
+
+def report_fingerprint(df):
+    import pandas as pd
+
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes() + ",".join(df.columns).encode("utf-8")).hexdigest()
+
+def get_vibe(summary):
+    if summary.avg_rating > 3.5: return "Positive Vibes Only"
+    if summary.avg_rating < 2.8: return "Tough Critic"
+    if summary.rewatch_pct > 50: return "Nostalgic"
+    return "Balanced"
+
+# --- HTML FRAGMENTS ---
+# No indentation inside the fragments: Markdown would render indented HTML as
+# a code block. Every value is escaped where it is put in, film names and
+# poster URLs from the feed above all, since the app and the static pages
+# both insert these fragments as they are.
+
+def _esc(value):
+    return html.escape(str(value), quote=True)
+
+def persona_html(personas):
+    entries = "".join(
+        f"""<div class="personality-entry">
+<div class="personality-title">{_esc(title)}</div>
+<div class="personality-desc">"{_esc(desc)}"</div>
+</div>"""
+        for title, desc in personas
+    )
+    return f"""<div class="personality-card">
+<div style="font-size: 1.5em; color: #9ab; margin-bottom: 20px;">Your Cinematic Archetypes</div>{entries}</div>"""
+
+def mbti_html(mbti_code, mbti_meaning):
+    letters = "".join(
+        f"<div style='text-align:center;'><div class='mbti-letter'>{_esc(char)}</div><div class='mbti-desc'>{_esc(mbti_meaning[char])}</div></div>"
+        for char in mbti_code
+    )
+    return f"<div class='mbti-container'>{letters}</div>"
+
+def _stat_box(icon, label, value, size="1.5em", note=None):
+    note = f'<div style="font-size: 0.8em;">{_esc(note)}</div>' if note is not None else ""
+    return f"""<div class="fun-stat-box"><div style="font-size: 2em;">{icon}</div><div>{_esc(label)}</div><div style="font-size: {size}; font-weight: bold; color: #fff;">{_esc(value)}</div>{note}</div>"""
+
+def flash_html(summary, vibe):
+    streak_span = f"{summary.streak_start.strftime('%b %d')} – {summary.streak_end.strftime('%b %d')}" if summary.streak > 1 else ""
+    return [
+        _stat_box("🔥", "Best Streak", f"{summary.streak} Days", note=streak_span),
+        _stat_box("🍿", "Biggest Binge", f"{summary.max_binge} Films"),
+        _stat_box("✨", "The Vibe", vibe, size="1.2em"),
+        _stat_box("📅", "Movie Night", f"{summary.fav_day}s"),
+    ]
+
+def posters_html(df, poster_cache=None):
+    # Every thumbnail we have goes into one sprite sheet; anything that
+    # couldn't be fetched (or everything, without a cache) hotlinks the original
+    wall = df[df['Poster'].notna() & (df['Poster'] != '')]
+    urls = wall['Poster'].tolist()
+    thumbs = poster_cache.thumbnails(urls) if poster_cache is not None else [None] * len(urls)
+    sprite_thumbs = [t for t in thumbs if t]
+    sprite = poster_cache.sprite(sprite_thumbs) if sprite_thumbs else None
+
+    parts = ['<div class="poster-container">']
+    if sprite:
+        parts.append(f'<style>.poster-sprite {{ background-image: url({poster_cache.data_uri(sprite)}); background-size: {len(sprite_thumbs) * 100}% 100%; }}</style>')
+    cell = 0
+    for name, year, url, thumb in zip(wall['Name'], wall['Year'], urls, thumbs):
+        title = _esc(f"{name} ({year})")
+        if thumb and sprite:
+            offset = cell / (len(sprite_thumbs) - 1) * 100 if len(sprite_thumbs) > 1 else 0
+            parts.append(f'<div class="poster-img poster-sprite" style="background-position: {offset:.4f}% 0;" title="{title}"></div>')
+            cell += 1
+        else:
+            parts.append(f'<img src="{_esc(url)}" class="poster-img" title="{title}">')
+    parts.append('</div>')
+    return "".join(parts)
+
+def playlist_html(playlist):
+    return "".join(
+        f"""<div class="song-row"><div class="song-icon">🎵</div><div class="song-info"><span class="song-title">{_esc(song)}</span><span class="song-artist">{_esc(artist)}</span></div></div>"""
+        for song, artist in playlist
+    )
+
+def _favorites(summary, poster_cache=None):
+    rows = []
+    top = summary.top_movies
+    for name, year, rating, date, poster in zip(top['Name'], top['Year'], top['Rating'], top['Date'], top['Poster']):
+        image = poster
+        if poster and poster_cache is not None:
+            image = poster_cache.thumbnail(poster, 70) or poster
+        rows.append((name, year, rating, date.strftime('%b %d'), image))
+    return rows
+
+@contextmanager
+def _section(timings, name):
+    # Times one report section into timings (ms) and traces it as report.<name>
+    started = time.perf_counter()
+    with tracer.span(f"report.{name}"):
+        yield
+    timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+def build_report(df, fingerprint=None, poster_cache=None, seed=None, rollups=None, metadata=None):
+    # seed varies the roast/playlist picks; they stay tied to the diary either way.
+    # rollups: already-built Rollups for df (e.g. kept up to date with append())
+    # metadata: a MetadataIndex to join genres, runtimes and directors from
+    with tracer.span("report.build", rows=len(df)):
+        return _build_report(df, fingerprint, poster_cache, seed, rollups, metadata)
+
+def _build_report(df, fingerprint, poster_cache, seed, rollups, metadata):
+    fingerprint = fingerprint or report_fingerprint(df)
+    rng = random.Random(int(fingerprint[:16], 16) if seed is None else f"{seed}:{fingerprint}")
+    timings = {}
+
+    with _section(timings, 'summary'):
+        summary = summarize(df)
+    with _section(timings, 'personas'):
+        personas = get_multi_personalities(summary.total, summary.avg_rating, summary.rewatch_pct,
+                                           summary.decade_diversity, summary.review_pct)
+        personas_fragment = persona_html(personas)
+    with _section(timings, 'roast'):
+        roast = generate_roast(df, summary, rng=rng)
+    with _section(timings, 'mbti'):
+        mbti_code, mbti_meaning = calculate_cine_mbti(df, summary)
+        mbti_fragment = mbti_html(mbti_code, mbti_meaning)
+    with _section(timings, 'flash'):
+        vibe = get_vibe(summary)
+        flash = flash_html(summary, vibe)
+    with _section(timings, 'posters'):
+        posters = posters_html(df, poster_cache)
+    with _section(timings, 'favorites'):
+        favorites = _favorites(summary, poster_cache)
+    with _section(timings, 'playlist'):
+        playlist = get_soundtrack_suggestions(mbti_code, df, summary, rng=rng)
+        playlist_fragment = playlist_html(playlist)
+    with _section(timings, 'rollups'):
+        rollups = rollups if rollups is not None else Rollups.from_frame(df)
+    film_metadata = None
+    if metadata is not None:
+        with _section(timings, 'metadata'):
+            film_metadata = summarize_metadata(enrich(df, metadata))
+
+    return WrappedReport(
+        fingerprint=fingerprint,
+        chart_key=chart_fingerprint(df),
+        summary=summary,
+        personas=personas,
+        mbti_code=mbti_code,
+        mbti_meaning=mbti_meaning,
+        roast=roast,
+        vibe=vibe,
+        playlist=playlist,
+        favorites=favorites,
+        persona_html=personas_fragment,
+        mbti_html=mbti_fragment,
+        flash_html=flash,
+        posters_html=posters,
+        playlist_html=playlist_fragment,
+        rollups=rollups,
+        metadata=film_metadata,
+        timings=timings,
+    )
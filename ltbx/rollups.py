@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+
+from ltbx.feed import DAY_ORDER, MONTH_ORDER
+from ltbx.summary import compute_streaks
+from ltbx.tracing import tracer
+
+# --- ROLLUPS ---
+# Per-user aggregates for full histories, so "Wrapped for 2024", "2023 vs
+# 2024" and monthly trends come from a few small tables instead of rescanning
+# every diary row. Everything stored is additive, which is what lets new
+# entries be folded in without a rebuild:
+#
+#   cells    (year, month, weekday) -> count, rating/film-year sums, rewatches,
+#            reviews, old/recent films
+#   decades  (year, decade) -> count
+#   ratings  (year, rating) -> count
+#   days     watched date -> count (streaks, binges and daily variance)
+#
+# Averages follow summarize(): unrated entries count as 0 stars and films
+# without a year as year 0.
+
+CELL_COLUMNS = ['count', 'rating_sum', 'film_year_sum', 'rewatches', 'reviews', 'old_movies', 'recent_movies']
+COMPARE_METRICS = ['total', 'avg_rating', 'avg_year', 'rewatch_pct', 'review_pct', 'decade_diversity',
+                   'streak', 'max_binge', 'daily_variance']
+
+@dataclass(frozen=True)
+class PeriodStats:
+    period: object  # a year, or None for all time
+    total: int
+    avg_rating: float
+    avg_year: float
+    rewatches: int
+    rewatch_pct: float
+    reviews: int
+    review_pct: float
+    old_movies: int
+    recent_movies: int
+    monday_count: int
+    decade_counts: object
+    day_counts: object
+    month_counts: object
+    fav_day: str
+    rating_counts: object
+    daily_variance: float
+    streak: int
+    streak_start: object
+    streak_end: object
+    max_binge: int
+    binge_date: str
+
+    @property
+    def decade_diversity(self):
+        return len(self.decade_counts)
+
+def _add(a, b):
+    # Sum two rollup tables on the union of their index, keeping int columns int
+    total = a.add(b, fill_value=0)
+    return total.astype(a.dtypes.to_dict()) if hasattr(a, 'columns') else total.astype(a.dtype)
+
+class Rollups:
+    def __init__(self, cells, decades, ratings, days):
+        self.cells = cells
+        self.decades = decades
+        self.ratings = ratings
+        self.days = days
+
+    @classmethod
+    def from_frame(cls, df):
+        with tracer.span("rollups.build", rows=len(df)):
+            return cls._from_frame(df)
+
+    @classmethod
+    def _from_frame(cls, df):
+        import numpy as np
+        import pandas as pd
+
+        dates = df['Date']
+        watched_year = dates.dt.year.to_numpy()
+        film_years = df['Year'].to_numpy().astype(np.int64)
+        ratings = df['Rating'].to_numpy().astype(np.float64)
+        frame = pd.DataFrame({
+            'year': watched_year,
+            'month': dates.dt.month.to_numpy(),
+            'weekday': dates.dt.weekday.to_numpy(),
+            'count': np.ones(len(df), dtype=np.int64),
+            'rating_sum': ratings,
+            'film_year_sum': film_years,
+            'rewatches': df['Rewatch'].to_numpy(dtype=bool).astype(np.int64),
+            'reviews': df['Has_Review'].to_numpy().astype(np.int64),
+            'old_movies': (film_years < 1980).astype(np.int64),
+            'recent_movies': (film_years > 2020).astype(np.int64),
+        })
+        cells = frame.groupby(['year', 'month', 'weekday'], sort=True)[CELL_COLUMNS].sum()
+
+        decades = pd.Series(np.ones(len(df), dtype=np.int64)).groupby(
+            [watched_year, (film_years // 10) * 10]).sum().rename_axis(['year', 'decade'])
+        rating_counts = pd.Series(np.ones(len(df), dtype=np.int64)).groupby(
+            [watched_year, ratings]).sum().rename_axis(['year', 'rating'])
+
+        days = dates.to_numpy().astype('datetime64[D]')
+        days, counts = np.unique(days[~np.isnat(days)], return_counts=True)
+        days = pd.Series(counts.astype(np.int64), index=pd.DatetimeIndex(days))
+        return cls(cells, decades, rating_counts, days)
+
+    def merge(self, other):
+        return Rollups(
+            _add(self.cells, other.cells).sort_index(),
+            _add(self.decades, other.decades).sort_index(),
+            _add(self.ratings, other.ratings).sort_index(),
+            _add(self.days, other.days).sort_index(),
+        )
+
+    def append(self, df):
+        # Rollups including the new diary rows (which must not already be in
+        # here; feed them the rows a DiaryStore merge actually added)
+        if df.empty:
+            return self
+        return self.merge(Rollups.from_frame(df))
+
+    @property
+    def total(self):
+        return int(self.cells['count'].sum())
+
+    @property
+    def token(self):
+        # Changes whenever entries are folded in, so it can stand in for the
+        # rollups in cache keys: the entry count and the last watched day
+        if not len(self.days):
+            return "0"
+        return f"{self.total}-{self.days.index.max():%Y%m%d}"
+
+    @property
+    def years(self):
+        return sorted(self.cells.index.get_level_values('year').unique().tolist())
+
+    def wrapped_for(self, year=None):
+        # PeriodStats for one watched-year, or all time when year is None
+        import pandas as pd
+
+        cells, decades, ratings, days = self.cells, self.decades, self.ratings, self.days
+        if year is not None:
+            present = year in self.years
+            cells = cells.xs(year, level='year') if present else cells.iloc[0:0].droplevel('year')
+            decades = decades.xs(year, level='year') if present else decades.iloc[0:0].droplevel('year')
+            ratings = ratings.xs(year, level='year') if present else ratings.iloc[0:0].droplevel('year')
+            days = days[days.index.year == year]
+        else:
+            decades = decades.groupby(level='decade').sum()
+            ratings = ratings.groupby(level='rating').sum()
+
+        sums = cells.sum()
+        total = int(sums['count'])
+        day_counts = cells['count'].groupby(level='weekday').sum().reindex(range(7), fill_value=0)
+        day_counts.index = pd.CategoricalIndex(DAY_ORDER, categories=DAY_ORDER, ordered=True, name='Day')
+        month_counts = cells['count'].groupby(level='month').sum().reindex(range(1, 13), fill_value=0)
+        month_counts.index = pd.CategoricalIndex(MONTH_ORDER, categories=MONTH_ORDER, ordered=True, name='Month')
+        decade_counts = decades[decades > 0].sort_values(ascending=False, kind='stable')
+        streaks = compute_streaks(days)
+
+        return PeriodStats(
+            period=year,
+            total=total,
+            avg_rating=float(sums['rating_sum'] / total) if total else float('nan'),
+            avg_year=float(sums['film_year_sum'] / total) if total else float('nan'),
+            rewatches=int(sums['rewatches']),
+            rewatch_pct=(sums['rewatches'] / total) * 100 if total else 0,
+            reviews=int(sums['reviews']),
+            review_pct=(sums['reviews'] / total) * 100 if total else 0,
+            old_movies=int(sums['old_movies']),
+            recent_movies=int(sums['recent_movies']),
+            monday_count=int(day_counts['Monday']),
+            decade_counts=decade_counts,
+            day_counts=day_counts,
+            month_counts=month_counts,
+            fav_day=day_counts.idxmax() if total else "N/A",
+            rating_counts=ratings[ratings > 0].sort_index(),
+            daily_variance=float(days.var()),
+            streak=streaks.streak,
+            streak_start=streaks.start,
+            streak_end=streaks.end,
+            max_binge=streaks.max_binge,
+            binge_date=streaks.binge_date,
+        )
+
+    def compare(self, year_a, year_b):
+        # DataFrame of COMPARE_METRICS for both years plus the change b - a
+        import pandas as pd
+
+        a, b = self.wrapped_for(year_a), self.wrapped_for(year_b)
+        rows = {metric: (getattr(a, metric), getattr(b, metric)) for metric in COMPARE_METRICS}
+        table = pd.DataFrame.from_dict(rows, orient='index', columns=[year_a, year_b])
+        table['change'] = table[year_b] - table[year_a]
+        return table
+
+    def rolling(self, window=3):
+        # Films and average rating per month across the whole history (empty
+        # months included), with `window`-month rolling versions of both
+        import pandas as pd
+
+        monthly = self.cells[['count', 'rating_sum']].groupby(level=['year', 'month']).sum()
+        monthly.index = pd.PeriodIndex.from_fields(
+            year=monthly.index.get_level_values('year').to_numpy(),
+            month=monthly.index.get_level_values('month').to_numpy(), freq='M')
+        if not monthly.empty:
+            monthly = monthly.reindex(pd.period_range(monthly.index.min(), monthly.index.max(), freq='M'), fill_value=0)
+        rolled = monthly.rolling(window, min_periods=1).sum()
+        return pd.DataFrame({
+            'films': monthly['count'],
+            'avg_rating': monthly['rating_sum'] / monthly['count'].where(monthly['count'] > 0),
+            'films_rolling': rolled['count'] / window,
+            'avg_rating_rolling': rolled['rating_sum'] / rolled['count'].where(rolled['count'] > 0),
+        })
@@ -0,0 +1,352 @@
+import operator
+import random
+
+# --- RULES ---
+# Personas, roast lines, the Cine-MBTI letters and the playlist's mood songs
+# are declared below as tables of (feature, comparator, threshold, result)
+# rules over a user's summary numbers, instead of if/elif chains. A table is
+# a list of groups; within a group the first rule that matches wins (an
+# elif chain), and a group may have a default for when none does. On top of
+# that a table can have an exclusive rule, which when it matches is the
+# whole outcome, and a fallback for when no group produced anything.
+#
+# The same tables are evaluated two ways:
+#   - one user, on scalars (RuleTable.evaluate), which is what
+#     ltbx.analytics does for a report
+#   - many users at once (score), on a column per feature: every distinct
+#     condition becomes one NumPy mask, shared by all the tables that test
+#     it, and each group's first match is picked with np.select. Results
+#     stay as small integer codes until a user's outcome is asked for, so
+#     counting personas or MBTI types over a million users never builds
+#     a Python object per user.
+#
+# NaN compares false either way, so a missing feature (no ratings, no top
+# film) matches no rule, like the comparisons in the chains did.
+
+COMPARATORS = {
+    '<': (operator.lt, 'less'),
+    '<=': (operator.le, 'less_equal'),
+    '>': (operator.gt, 'greater'),
+    '>=': (operator.ge, 'greater_equal'),
+    '==': (operator.eq, 'equal'),
+}
+
+# Summary numbers the tables read; top_year is the year of the top-rated film
+FEATURES = ['total', 'avg_rating', 'avg_year', 'rewatches', 'rewatch_pct', 'review_pct', 'decade_diversity',
+            'old_movies', 'recent_movies', 'monday_count', 'daily_variance', 'top_year']
+
+def summary_features(summary):
+    # {feature: float} for one WrappedSummary
+    features = {name: float(getattr(summary, name)) for name in FEATURES if name != 'top_year'}
+    top_movie = summary.top_movie
+    features['top_year'] = float(top_movie['Year']) if top_movie is not None else float('nan')
+    return features
+
+def feature_columns(summaries):
+    # {feature: float array} over many summaries, in order
+    import numpy as np
+
+    rows = [summary_features(summary) for summary in summaries]
+    return {name: np.array([row[name] for row in rows], dtype=float) for name in FEATURES}
+
+class RuleTable:
+    def __init__(self, groups, exclusive=None, fallback=None):
+        # groups: [(name, [(feature, comparator, threshold, result), ...], default)]
+        # exclusive: a (feature, comparator, threshold, result) rule
+        # fallback: the result when no group matched (and exclusive didn't)
+        for rule in [rule for _, rules, _ in groups for rule in rules] + ([exclusive] if exclusive else []):
+            if rule[1] not in COMPARATORS:
+                raise ValueError(f"Unknown comparator {rule[1]!r} in {rule}")
+        self.groups = groups
+        self.exclusive = exclusive
+        self.fallback = fallback
+
+    @property
+    def conditions(self):
+        # Every distinct (feature, comparator, threshold) the table tests
+        rules = [rule for _, rules, _ in self.groups for rule in rules] + ([self.exclusive] if self.exclusive else [])
+        return list(dict.fromkeys(rule[:3] for rule in rules))
+
+    @staticmethod
+    def _test(features, feature, comparator, threshold):
+        return COMPARATORS[comparator][0](features[feature], threshold)
+
+    def evaluate(self, features):
+        # The results for one user ({feature: number}), in group order
+        if self.exclusive and self._test(features, *self.exclusive[:3]):
+            return [self.exclusive[3]]
+        outcome = []
+        for _, rules, default in self.groups:
+            result = next((rule[3] for rule in rules if self._test(features, *rule[:3])), default)
+            if result is not None:
+                outcome.append(result)
+        if not outcome and self.fallback is not None:
+            outcome.append(self.fallback)
+        return outcome
+
+    def match(self, columns, masks=None):
+        # Matches for every user in columns ({feature: array}); masks caches
+        # condition -> boolean array and can be shared between tables
+        import numpy as np
+
+        masks = {} if masks is None else masks
+        for condition in self.conditions:
+            if condition not in masks:
+                feature, comparator, threshold = condition
+                masks[condition] = getattr(np, COMPARATORS[comparator][1])(columns[feature], threshold)
+        n = len(next(iter(columns.values())))
+        codes = np.empty((n, len(self.groups)), dtype=np.int8)
+        for g, (_, rules, default) in enumerate(self.groups):
+            # Rule index of the first match, len(rules) for the default, -1 for nothing
+            codes[:, g] = np.select([masks[rule[:3]] for rule in rules], np.arange(len(rules)),
+                                    len(rules) if default is not None else -1)
+        exclusive = masks[self.exclusive[:3]] if self.exclusive else np.zeros(n, dtype=bool)
+        codes[exclusive] = -1
+        fallback = ~exclusive & (codes == -1).all(axis=1) if self.fallback is not None else np.zeros(n, dtype=bool)
+        return Matches(self, codes, exclusive, fallback)
+
+class Matches:
+    # RuleTable.match over many users, kept as codes
+    def __init__(self, table, codes, exclusive, fallback):
+        self.table = table
+        self.codes = codes
+        self.exclusive = exclusive
+        self.fallback = fallback
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _result(self, group, code):
+        _, rules, default = self.table.groups[group]
+        return rules[code][3] if code < len(rules) else default
+
+    def outcome(self, i):
+        # Same as table.evaluate() on user i's features
+        if self.exclusive[i]:
+            return [self.table.exclusive[3]]
+        if self.fallback[i]:
+            return [self.table.fallback]
+        return [self._result(g, code) for g, code in enumerate(self.codes[i].tolist()) if code >= 0]
+
+    def sizes(self):
+        # Number of items in every user's results put together (the results
+        # must be sequences), e.g. how many roast lines each user has
+        import numpy as np
+
+        sizes = np.zeros(len(self.codes), dtype=np.intp)
+        for g, (_, rules, default) in enumerate(self.table.groups):
+            lengths = np.array([len(rule[3]) for rule in rules] + [len(default) if default is not None else 0, 0])
+            codes = self.codes[:, g].astype(np.intp)
+            sizes += lengths[np.where(codes < 0, len(rules) + 1, codes)]
+        if self.table.fallback is not None:
+            sizes[self.fallback] = len(self.table.fallback)
+        if self.table.exclusive:
+            sizes[self.exclusive] = len(self.table.exclusive[3])
+        return sizes
+
+    def counts(self):
+        # result -> number of users whose outcome includes it (results must be hashable)
+        import numpy as np
+
+        counts = {}
+        def add(result, count):
+            if count:
+                counts[result] = counts.get(result, 0) + int(count)
+        if self.table.exclusive:
+            add(self.table.exclusive[3], self.exclusive.sum())
+        if self.table.fallback is not None:
+            add(self.table.fallback, self.fallback.sum())
+        for g, (_, rules, default) in enumerate(self.table.groups):
+            tally = np.bincount(self.codes[:, g][self.codes[:, g] >= 0], minlength=len(rules) + 1)
+            for code, count in enumerate(tally):
+                add(self._result(g, code), count)
+        return counts
+
+# --- RULE TABLES ---
+
+PERSONA_RULES = RuleTable(
+    groups=[
+        ('rating', [
+            ('avg_rating', '>', 4.0, ("The Generous Spirit", "5 stars for everyone! You love movies and they love you.")),
+            ('avg_rating', '<', 2.8, ("The Harsh Critic", "Hard to please? Or maybe you just have impeccable taste.")),
+        ], None),
+        ('rewatch', [
+            ('rewatch_pct', '>', 30, ("The Comfort Seeker", "Why risk a bad movie when you can watch a masterpiece again?")),
+            ('rewatch_pct', '<', 5, ("The Explorer", "Always seeking something new. No looking back.")),
+        ], None),
+        ('era', [
+            ('decade_diversity', '>', 6, ("The Time Traveler", "From the classics to the modern era, you see it all.")),
+        ], None),
+        ('review', [
+            ('review_pct', '>', 50, ("The Scribe", "You don't just watch; you document. Pen mighty!")),
+        ], None),
+    ],
+    # Too few films to say more
+    exclusive=('total', '<', 5, ("The Casual Viewer", "Just dipping your toes in the cinematic waters.")),
+    fallback=("The Balanced Cinephile", "A perfectly balanced diet of cinema."),
+)
+
+# Results are tuples of lines; the roast is one line picked from all that match
+ROAST_RULES = RuleTable(
+    groups=[
+        ('rating', [
+            ('avg_rating', '>', 4.5, ("You know 2.5 stars exists, right? Not everything is a masterpiece.",
+                                      "You're the person who claps when the plane lands, aren't you?")),
+            ('avg_rating', '<', 2.5, ("Who hurt you? Seriously, do you even like movies?",
+                                      "I bet you're fun at parties. 'Actually, the book was better.'",
+                                      "You woke up and chose violence with these ratings.")),
+            ('avg_rating', '>', 3.8, ("A little generous with the stars, are we?",)),
+        ], None),
+        ('rewatch', [
+            ('rewatches', '>', 15, ("Comfort movies are a cry for help. We hear you.",
+                                    "Trying to relive the past won't fix the present.",
+                                    "We get it, you really like that one movie.")),
+            ('rewatches', '==', 0, ("Commitment issues? You never call a movie back.",)),
+        ], None),
+        ('era', [
+            ('old_movies', '>', 15, ("We get it, you own a turntable and hate CGI.",
+                                     "Born in the wrong generation? Or just pretentious?")),
+            ('recent_movies', '>', 20, ("Recency bias is a hell of a drug.",)),
+        ], None),
+        ('day', [
+            ('monday_count', '>', 5, ("Watching movies on Monday? Avoiding responsibilities like a pro.",)),
+        ], None),
+    ],
+    fallback=("Your taste is so painfully average, I can't even roast it.",
+              "You exist. You watch movies. That's about it.",
+              "Honestly? A pretty respectable list. Boring, but respectable."),
+)
+
+# One letter per axis, always: the rule's letter or the default
+MBTI_RULES = RuleTable(groups=[
+    ('comfort', [('rewatch_pct', '>', 20, "I")], "E"),
+    ('era', [('avg_year', '>', 2010, "S")], "N"),
+    ('critic', [('avg_rating', '<', 3.2, "T")], "F"),
+    ('routine', [('daily_variance', '>', 1.5, "P")], "J"),
+])
+
+MBTI_MEANING = {
+    "E": "Explorer (New Films)", "I": "Comfort (Rewatches)",
+    "S": "Modernist (Recent)", "N": "Historian (Classics)",
+    "T": "Critic (Analytic)", "F": "Fan (Emotional)",
+    "J": "Routine (Steady)", "P": "Binger (Spontaneous)"
+}
+
+# The first three songs come one from each of these pools, picked by the
+# user's MBTI letters (E or I, N or S, T or F)
+SOUNDTRACK_POOLS = {
+    "N": [("Heroes", "David Bowie"), ("Dreams", "Fleetwood Mac"), ("Space Oddity", "David Bowie"), ("There Is a Light", "The Smiths")],
+    "S": [("Blinding Lights", "The Weeknd"), ("Midnight City", "M83"), ("As It Was", "Harry Styles"), ("Espresso", "Sabrina Carpenter")],
+    "T": [("Paranoid Android", "Radiohead"), ("Psycho Killer", "Talking Heads"), ("Where Is My Mind?", "Pixies"), ("Tame Impala", "New Person")],
+    "F": [("Dancing Queen", "ABBA"), ("Mr. Brightside", "The Killers"), ("Dog Days Are Over", "Florence + The Machine"), ("Cruel Summer", "Taylor Swift")],
+    "I": [("Fast Car", "Tracy Chapman"), ("Landslide", "Fleetwood Mac"), ("Vienna", "Billy Joel"), ("Mystery of Love", "Sufjan Stevens")],
+    "E": [("Time to Pretend", "MGMT"), ("Paper Planes", "M.I.A."), ("Maps", "Yeah Yeah Yeahs"), ("Electric Feel", "MGMT")]
+}
+SOUNDTRACK_AXES = [("E", "I"), ("N", "S"), ("T", "F")]  # (letter tested for, otherwise)
+
+# Then one for the top film's era and one for the mood of the ratings
+SOUNDTRACK_RULES = RuleTable(groups=[
+    ('era', [
+        ('top_year', '<', 1980, ("California Dreamin'", "The Mamas & The Papas")),
+        ('top_year', '<', 1990, ("Everybody Wants to Rule the World", "Tears for Fears")),
+        ('top_year', '<', 2000, ("Smells Like Teen Spirit", "Nirvana")),
+        ('top_year', '<', 2010, ("Mr. Brightside", "The Killers")),
+        ('top_year', '>=', 2010, ("bad guy", "Billie Eilish")),
+    ], None),
+    ('mood', [
+        ('avg_rating', '<', 2.5, ("Creep", "Radiohead")),
+        ('avg_rating', '>', 4.5, ("Walking on Sunshine", "Katrina and the Waves")),
+    ], None),
+])
+
+def playlist(mbti_code, features, rng=None):
+    # Up to five (song, artist): a pool song per MBTI axis, then the rule
+    # songs, without repeats and in that order
+    rng = rng or random
+    songs = []
+    for letter, other in SOUNDTRACK_AXES:
+        songs.extend(rng.sample(SOUNDTRACK_POOLS[letter if letter in mbti_code else other], 1))
+    songs.extend(SOUNDTRACK_RULES.evaluate(features))
+    return list(dict.fromkeys(songs))[:5]
+
+# --- SCORING MANY USERS ---
+
+class Scores:
+    # Every table matched over the same users, plus their roast and playlist
+    # picks drawn from one seeded generator
+    def __init__(self, personas, roast, mbti, soundtrack, roast_pick, song_picks):
+        self.persona_matches = personas
+        self.roast_matches = roast
+        self.mbti_matches = mbti
+        self.soundtrack_matches = soundtrack
+        self.roast_pick = roast_pick  # index into each user's roast lines
+        self.song_picks = song_picks  # (users, 3) uniform draws, one per axis's pool
+
+    def __len__(self):
+        return len(self.persona_matches)
+
+    def personas(self, i):
+        return self.persona_matches.outcome(i)
+
+    def roast_lines(self, i):
+        return [line for lines in self.roast_matches.outcome(i) for line in lines]
+
+    def roast(self, i):
+        return self.roast_lines(i)[self.roast_pick[i]]
+
+    def _mbti_index(self):
+        # Each user's code as a number 0-15: a bit per axis, 0 where the rule matched
+        import numpy as np
+
+        index = np.zeros(len(self), dtype=np.intp)
+        for g in range(len(MBTI_RULES.groups)):
+            index = index * 2 + np.minimum(self.mbti_matches.codes[:, g], 1)
+        return index
+
+    @staticmethod
+    def _all_mbti_codes():
+        codes = [""]
+        for _, rules, default in MBTI_RULES.groups:
+            codes = [code + letter for code in codes for letter in (rules[0][3], default)]
+        return codes
+
+    def mbti_codes(self):
+        # The code of every user, as an array of strings
+        import numpy as np
+
+        return np.array(self._all_mbti_codes(), dtype=object)[self._mbti_index()]
+
+    def mbti_counts(self):
+        # code -> number of users, for all 16 codes
+        import numpy as np
+
+        counts = np.bincount(self._mbti_index(), minlength=2 ** len(MBTI_RULES.groups))
+        return dict(zip(self._all_mbti_codes(), counts.tolist()))
+
+    def mbti(self, i):
+        return "".join(self.mbti_matches.outcome(i))
+
+    def playlist(self, i):
+        code = self.mbti(i)
+        songs = []
+        for (letter, other), pick in zip(SOUNDTRACK_AXES, self.song_picks[i]):
+            pool = SOUNDTRACK_POOLS[letter if letter in code else other]
+            songs.append(pool[int(pick * len(pool))])
+        songs.extend(self.soundtrack_matches.outcome(i))
+        return list(dict.fromkeys(songs))[:5]
+
+def score(columns, seed=None):
+    # Scores every user in columns ({feature: array}, see feature_columns)
+    # in one pass. The same seed gives the same roasts and playlists.
+    import numpy as np
+
+    masks = {}
+    personas = PERSONA_RULES.match(columns, masks)
+    roast = ROAST_RULES.match(columns, masks)
+    mbti = MBTI_RULES.match(columns, masks)
+    soundtrack = SOUNDTRACK_RULES.match(columns, masks)
+
+    rng = np.random.default_rng(seed)
+    roast_pick = (rng.random(len(roast)) * roast.sizes()).astype(np.intp)
+    song_picks = rng.random((len(roast), len(SOUNDTRACK_AXES)))
+    return Scores(personas, roast, mbti, soundtrack, roast_pick, song_picks)
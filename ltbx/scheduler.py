@@ -0,0 +1,339 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+from ltbx.feed import LETTERBOXD_BASE_URL, FeedCache, check_username, feed_error, parse_rss_feed, scan_feed
+from ltbx.tracing import tracer
+
+# --- BACKGROUND REFRESH ---
+# Keeps the feeds of users we've seen warm, so someone coming back is served
+# from the feed cache (and an already built report) instead of paying for the
+# Letterboxd round trip. Every watched user has a due time in a heap; one
+# scheduler thread hands due users to a small worker pool, never more than it
+# has free workers, so a backlog waits in the heap (that's the queue depth).
+#
+# Polling adapts per user: a refresh that finds new entries goes back to the
+# shortest interval, one that finds nothing doubles it up to the longest, and
+# users whose newest entry is recent are never left longer than a quarter of
+# its age. Every interval is jittered so users seen together drift apart.
+#
+# Each user's watermark is the guid and pubDate of the newest item seen (the
+# pubDate is what the activity cap above goes by). A refresh does a
+# conditional GET; on a 200 it only scans the item guids, and if they are the
+# ones already cached the cached frame is kept as is. Otherwise only the items
+# above the newest cached guid are parsed and put on top of the cached rows
+# still in the feed. Anything that doesn't line up (no cached frame, items
+# without guids, reordered items) falls back to parsing the whole feed.
+# Downloads go through the client's single-flight under the feed URL, like
+# fetch_rss_data's, so a refresh and a user's Generate never both fetch it.
+
+REFRESH_ENABLED = os.environ.get("LTBX_REFRESH", "") == "1"
+REFRESH_WORKERS = int(os.environ.get("LTBX_REFRESH_WORKERS", 4))
+REFRESH_MIN_INTERVAL = float(os.environ.get("LTBX_REFRESH_MIN_INTERVAL", 300))
+REFRESH_MAX_INTERVAL = float(os.environ.get("LTBX_REFRESH_MAX_INTERVAL", 6 * 3600))
+REFRESH_WATCHLIST_SIZE = int(os.environ.get("LTBX_REFRESH_WATCHLIST", 5000))
+
+def _published_at(pubdate):
+    try:
+        return parsedate_to_datetime(pubdate).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+class RefreshScheduler:
+    def __init__(self, cache, client=None, base_url=None, workers=REFRESH_WORKERS,
+                 min_interval=REFRESH_MIN_INTERVAL, max_interval=REFRESH_MAX_INTERVAL, jitter=0.1,
+                 max_users=REFRESH_WATCHLIST_SIZE, on_refresh=None, clock=time.time, seed=None):
+        # on_refresh(username, df, new): called after a refresh found the feed
+        # changed, with the whole feed frame and just the new rows.
+        # clock: wall-clock seconds; it is compared with item pubDates.
+        self.cache = cache
+        self.client = client
+        self.base_url = (base_url or LETTERBOXD_BASE_URL).rstrip('/')
+        self.workers = workers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.max_users = max_users
+        self.on_refresh = on_refresh
+        self.clock = clock
+        self._rng = random.Random(seed)
+        self._users = OrderedDict()  # key -> state, least recently seen first
+        self._heap = []  # (due, seq, key); entries whose seq is outdated are skipped
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pool = None
+        self._thread = None
+        self._stopping = False
+        self._in_flight = 0
+        self._lags = deque(maxlen=1000)  # seconds between due and start
+        self.refreshes = 0
+        self.new_entries = 0
+        self.unchanged = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.evictions = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._users)
+
+    def _jittered(self, interval):
+        return interval * (1 + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _schedule(self, state, delay):
+        state['due'] = self.clock() + self._jittered(delay)
+        state['seq'] = next(self._seq)
+        heapq.heappush(self._heap, (state['due'], state['seq'], state['key']))
+
+    def watch(self, username):
+        # Adds a user (or, for one already watched, marks them active again);
+        # ValueError for an invalid username
+        key = check_username(username)
+        with self._lock:
+            state = self._users.get(key)
+            if state is None:
+                state = self._users[key] = {
+                    'key': key, 'username': username, 'interval': self.min_interval, 'watermark': None,
+                    'due': None, 'seq': None, 'running': False, 'failures': 0, 'refreshed_at': None,
+                }
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._users.move_to_end(key)
+            state['interval'] = self.min_interval
+            if not state['running'] and (state['due'] is None or state['due'] > self.clock() + self.min_interval):
+                self._schedule(state, self.min_interval)
+        self._wake.set()
+
+    def unwatch(self, username):
+        with self._lock:
+            self._users.pop(FeedCache.normalize(username), None)
+
+    # --- SCHEDULING ---
+
+    def _pop_due(self, now, limit):
+        due = []
+        while self._heap and len(due) < limit and self._heap[0][0] <= now:
+            when, seq, key = heapq.heappop(self._heap)
+            state = self._users.get(key)
+            if state is None or state['seq'] != seq or state['running']:
+                continue
+            state['running'] = True
+            self._lags.append(now - when)
+            due.append(state)
+        return due
+
+    def _next_due(self):
+        # Drops outdated heap entries from the top; seconds until the next due user
+        while self._heap:
+            when, seq, key = self._heap[0]
+            state = self._users.get(key)
+            if state is not None and state['seq'] == seq and not state['running']:
+                return max(0.0, when - self.clock())
+            heapq.heappop(self._heap)
+        return None
+
+    def run_pending(self):
+        # Starts every due user there's a free worker for; without a pool
+        # (start() not called) they are refreshed right here, one by one.
+        # Returns the seconds until the next user is due, or None if nobody
+        # is or every worker is busy (a finishing worker sets _wake).
+        with self._lock:
+            now = self.clock()
+            limit = self.workers - self._in_flight if self._pool is not None else len(self._heap)
+            due = self._pop_due(now, max(0, limit))
+            self._in_flight += len(due)
+        for state in due:
+            if self._pool is not None:
+                self._pool.submit(self._run, state)
+            else:
+                self._run(state)
+        with self._lock:
+            if self._pool is not None and self._in_flight >= self.workers:
+                return None
+            return self._next_due()
+
+    def _run(self, state):
+        try:
+            outcome = self.refresh(state['username'])
+        except Exception:
+            outcome = self._record('error')
+        with self._lock:
+            self._in_flight -= 1
+            state['running'] = False
+            state['refreshed_at'] = self.clock()
+            if outcome == 'new':
+                state['interval'] = self.min_interval
+            else:
+                state['interval'] = min(self.max_interval, state['interval'] * 2)
+            interval = state['interval']
+            published = _published_at(state['watermark'][1]) if state['watermark'] else None
+            if published is not None and outcome != 'error':
+                interval = min(interval, max(self.min_interval, (self.clock() - published) / 4))
+            state['failures'] = state['failures'] + 1 if outcome == 'error' else 0
+            if state['key'] in self._users:
+                self._schedule(state, interval)
+        self._wake.set()
+
+    def start(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ltbx-refresh")
+        self._thread = threading.Thread(target=self._loop, name="ltbx-refresh-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while True:
+            # Cleared before looking, so a worker finishing (or stop()) in
+            # between still wakes us
+            self._wake.clear()
+            if self._stopping:
+                break
+            wait = self.run_pending()
+            self._wake.wait(self.max_interval if wait is None else wait)
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        self._thread = self._pool = None
+        self._stopping = False
+
+    # --- REFRESHING ---
+
+    def refresh(self, username):
+        # One refresh, right now: 'new', 'unchanged', 'not_modified' or 'error'
+        from ltbx.http import default_client
+
+        key = check_username(username)
+        client = self.client or default_client()
+        url = f"{self.base_url}/{key}/rss/"
+        entry, _ = self.cache.get(key)
+        cached = entry['df'] if entry is not None else None
+
+        # Goes through the same single-flight as fetch_rss_data, keyed by the
+        # feed URL and returning what it does, (feed frame, error): a refresh
+        # and a user's Generate for the same feed download it once
+        fetched = {}
+        df, _ = client.flights.do(url, lambda: self._download(username, key, url, entry, client, fetched))
+        if fetched:
+            outcome, items, new = fetched['outcome'], fetched['items'], fetched['new']
+        elif df is None:
+            return self._record('error')
+        else:
+            # A user's fetch ran instead, and has already cached the feed
+            items = None
+            new = df[~df['Guid'].isin(cached['Guid'])] if cached is not None and 'Guid' in cached else df
+            outcome = 'new' if len(new) else 'unchanged'
+        if outcome != 'new':
+            return self._record(outcome)
+        with self._lock:
+            state = self._users.get(key)
+            if state is not None and items:
+                state['watermark'] = items[0]
+            self.new_entries += len(new)
+        if self.on_refresh is not None:
+            self.on_refresh(username, df.copy(), new)
+        return self._record('new')
+
+    def _download(self, username, key, url, entry, client, fetched):
+        # The conditional GET and splice; fills in fetched (outcome, items,
+        # new rows) and returns (feed frame, error) for whoever shares the flight
+        cached = entry['df'] if entry is not None else None
+        fetched.update(outcome='error', items=None, new=None)
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        with tracer.span("refresh.feed", username=key, conditional=bool(headers)) as span:
+            try:
+                response = client.get(url, headers=headers)
+            except Exception as e:
+                # Like fetch_rss_data: an old copy beats an error
+                return (cached, None) if cached is not None else (None, feed_error(username, error=e))
+            span.set(status=response.status_code)
+            if response.status_code == 304 and entry is not None:
+                self.cache.touch(key)
+                fetched['outcome'] = 'not_modified'
+                return cached, None
+            if response.status_code != 200:
+                return (cached, None) if cached is not None else (None, feed_error(username, response.status_code))
+
+            items = scan_feed(response.content)
+            df, new = self._splice(items, response.content, cached)
+            span.set(new=0 if new is None else len(new))
+            if df is None:
+                return (cached, None) if cached is not None else (None, "No diary entries found in RSS feed.")
+            self.cache.put(key, df, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            fetched.update(outcome='unchanged' if df is cached else 'new', items=items, new=new)
+            return df, None
+
+    def _splice(self, items, content, cached):
+        # (feed frame, new rows) for the fetched feed, parsing as little of it
+        # as the cached frame allows; (None, None) if it doesn't parse
+        import pandas as pd
+
+        guids = [guid for guid, _ in items]
+        if cached is not None and 'Guid' in cached and None not in guids:
+            cached_guids = cached['Guid'].tolist()
+            if guids == cached_guids:
+                return cached, cached.iloc[:0]
+            seen = set(cached_guids)
+            fresh = [guid for guid in guids if guid not in seen]
+            rest = guids[len(fresh):]
+            if guids[:len(fresh)] == fresh and not set(rest) - seen:
+                kept = cached[cached['Guid'].isin(rest)]
+                if kept['Guid'].tolist() == rest:
+                    new, error = parse_rss_feed(content, known_guids=set(rest))
+                    if error:
+                        return None, None
+                    return pd.concat([new, kept], ignore_index=True), new
+        df, error = parse_rss_feed(content)
+        if error:
+            return None, None
+        return df, df
+
+    def _record(self, outcome):
+        with self._lock:
+            self.refreshes += 1
+            if outcome == 'unchanged':
+                self.unchanged += 1
+            elif outcome == 'not_modified':
+                self.not_modified += 1
+            elif outcome == 'error':
+                self.errors += 1
+        return outcome
+
+    def stats(self):
+        with self._lock:
+            now = self.clock()
+            overdue = [now - state['due'] for state in self._users.values()
+                       if not state['running'] and state['due'] is not None and state['due'] <= now]
+            lags = sorted(self._lags)
+            return {
+                'watched': len(self._users),
+                'queue_depth': len(overdue),
+                'in_flight': self._in_flight,
+                'oldest_overdue_s': round(max(overdue), 3) if overdue else 0.0,
+                'lag_p50_s': round(lags[len(lags) // 2], 3) if lags else 0.0,
+                'lag_max_s': round(lags[-1], 3) if lags else 0.0,
+                'refreshes': self.refreshes,
+                'new_entries': self.new_entries,
+                'unchanged': self.unchanged,
+                'not_modified': self.not_modified,
+                'errors': self.errors,
+                'evictions': self.evictions,
+            }
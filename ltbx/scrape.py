@@ -0,0 +1,257 @@
+import argparse
+import html
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ltbx.feed import LETTERBOXD_BASE_URL, FeedCache, add_calendar_columns, repeated_entries, valid_username
+from ltbx.tracing import tracer
+
+# --- DIARY PAGES ---
+# Deep fetch: the RSS feed stops at the last 50 entries, but the diary itself
+# is browsable at /<username>/films/diary/page/<n>/, 50 rows a page, newest
+# first. Page 1 tells us how many pages there are; the rest are fetched by a
+# bounded pool, spaced by a per-host rate limit, and handed out in page order
+# so that with a target year nothing past the first page older than that year
+# is requested. The rows come out in the same schema as parse_rss_feed.
+#
+# Pages are read with the same kind of regex extraction the feed parser uses
+# for descriptions: each pattern below picks one field out of a row, the way
+# a CSS selector would, without building a DOM.
+
+SCRAPE_WORKERS = int(os.environ.get("LTBX_SCRAPE_WORKERS", 4))
+SCRAPE_RATE = float(os.environ.get("LTBX_SCRAPE_RATE", 5))
+SCRAPE_MAX_PAGES = int(os.environ.get("LTBX_SCRAPE_MAX_PAGES", 100))
+
+_ROW_RE = re.compile(r'<tr [^>]*?class="diary-entry-row[^"]*"[^>]*>.*?</tr>', re.DOTALL)
+# Each pattern starts with a literal class name, which lets the regex engine
+# skip straight to it
+_FIELDS = {
+    # tr[data-viewing-id]
+    'viewing': re.compile(r'data-viewing-id="(\d+)"'),
+    # td.td-day a[href] -> /<user>/films/diary/for/YYYY/MM/DD/
+    'date': re.compile(r'td-day[^>]*>\s*<a [^>]*href="[^"]*/for/(\d{4})/(\d{2})/(\d{2})/'),
+    # td.td-film-details h3 a
+    'title': re.compile(r'headline-3[^>]*>\s*<a [^>]*>(.*?)</a>', re.DOTALL),
+    # td.td-released span
+    'year': re.compile(r'td-released[^>]*>\s*<span>\s*(\d*)'),
+    # td.td-rating input.rateit-field[value] (half stars, 0 = unrated)
+    'rating': re.compile(r'rateit-field"[^>]*value="(\d+)"'),
+    # td.td-rating span.rating, when there's no rating input
+    'stars': re.compile(r'rating rated-(\d+)'),
+    # td.td-rewatch: icon-status-off unless it was a rewatch
+    'rewatch': re.compile(r'td-rewatch([^"]*)"'),
+}
+_PAGE_LINK_RE = re.compile(r'/films/diary/(?:for/[\d/]+)?page/(\d+)/')
+
+def parse_diary_page(content):
+    # (rows, last_page): rows are dicts with the parse_rss_feed columns, and
+    # last_page is the highest page the pagination links to (at least 1)
+    text = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+    rows = []
+    for match in _ROW_RE.finditer(text):
+        row = match.group(0)
+        date = _FIELDS['date'].search(row)
+        if not date:
+            continue
+        viewing = _FIELDS['viewing'].search(row)
+        title = _FIELDS['title'].search(row)
+        year = _FIELDS['year'].search(row)
+        rating = _FIELDS['rating'].search(row) or _FIELDS['stars'].search(row)
+        rewatch = _FIELDS['rewatch'].search(row)
+        # td.td-review a.icon-review
+        reviewed = 'icon-review' in row
+        guid = None
+        if viewing:
+            guid = f"letterboxd-{'review' if reviewed else 'watch'}-{viewing.group(1)}"
+        half_stars = int(rating.group(1)) if rating else 0
+        rows.append({
+            'Guid': guid,
+            'Date': '-'.join(date.groups()),
+            'Name': html.unescape(title.group(1).strip()) if title else "Unknown",
+            'Year': int(year.group(1)) if year and year.group(1) else 0,
+            'Rating': half_stars / 2,
+            'Rewatch': bool(rewatch) and 'icon-status-off' not in rewatch.group(1),
+            'Poster': None,
+            # The page only says whether there is a review, not how long it is
+            'Review_Words': 0,
+            'Has_Review': reviewed,
+        })
+    pages = [int(p) for p in _PAGE_LINK_RE.findall(text)]
+    return rows, max(pages + [1])
+
+def rows_to_frame(rows):
+    import pandas as pd
+
+    df = pd.DataFrame(rows, columns=['Guid', 'Date', 'Name', 'Year', 'Rating', 'Rewatch', 'Poster',
+                                     'Review_Words', 'Has_Review'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Year'] = df['Year'].astype('int64')
+    df['Rating'] = df['Rating'].astype('float64')
+    df['Rewatch'] = df['Rewatch'].astype(bool)
+    df['Review_Words'] = df['Review_Words'].astype('int64')
+    df['Has_Review'] = df['Has_Review'].astype(bool)
+    return add_calendar_columns(df)
+
+def merge_entries(rss, scraped):
+    # Feed rows first (they carry posters and review lengths), then every
+    # scraped entry the feed doesn't have, newest first
+    import pandas as pd
+
+    if rss is None or rss.empty:
+        df = scraped
+    elif scraped is None or scraped.empty:
+        df = rss
+    else:
+        df = pd.concat([rss, scraped], ignore_index=True)
+    df = df[~repeated_entries(df)]
+    return add_calendar_columns(df.sort_values('Date', ascending=False, kind='stable').reset_index(drop=True))
+
+class DiaryScraper:
+    def __init__(self, client=None, base_url=None, workers=SCRAPE_WORKERS, rate=SCRAPE_RATE,
+                 max_pages=SCRAPE_MAX_PAGES):
+        from ltbx.http import HostRateLimiter
+
+        self.client = client
+        self.base_url = (base_url or LETTERBOXD_BASE_URL).rstrip('/')
+        self.workers = workers
+        self.max_pages = max_pages
+        self.limiter = HostRateLimiter(rate)
+        self._lock = threading.Lock()
+        self.diaries = 0
+        self.pages = 0
+        self.failed_pages = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def page_url(self, username, page):
+        return f"{self.base_url}/{username}/films/diary/page/{page}/"
+
+    def _page(self, client, username, page):
+        # (rows, last_page) or None if the page couldn't be read
+        from ltbx.http import UpstreamUnavailable
+
+        url = self.page_url(username, page)
+        self.limiter.wait(url)
+        with tracer.span("scrape.page", username=FeedCache.normalize(username), page=page) as span:
+            try:
+                response = client.get(url)
+            except Exception as e:
+                if isinstance(e, UpstreamUnavailable):
+                    with self._lock:
+                        self.failed_pages += 1
+                    raise
+                response = None
+            span.set(status=getattr(response, 'status_code', None))
+            if response is None or response.status_code != 200:
+                with self._lock:
+                    self.failed_pages += 1
+                return None
+            result = parse_diary_page(response.content)
+            span.set(rows=len(result[0]))
+        with self._lock:
+            self.pages += 1
+        return result
+
+    def fetch(self, username, year=None, cancelled=None):
+        # Every diary entry (or those watched in `year`). Returns (df, error)
+        # like fetch_rss_data; pages after the first that fail are skipped.
+        # No more pages are requested once cancelled() is true.
+        if not valid_username(username):
+            return None, f"'{username}' isn't a valid Letterboxd username"
+        username = FeedCache.normalize(username)
+        with tracer.span("scrape.diary", username=FeedCache.normalize(username), year=year):
+            return self._fetch(username, year, cancelled)
+
+    def _fetch(self, username, year, cancelled):
+        from ltbx.http import UpstreamUnavailable, default_client
+
+        client = self.client or default_client()
+        started = time.perf_counter()
+        try:
+            first = self._page(client, username, 1)
+        except UpstreamUnavailable:
+            return None, "Letterboxd isn't responding right now. Please try again in a minute."
+        if first is None:
+            return None, f"Could not read the diary of '{username}'"
+        rows, last = first
+        pages = {1: rows}
+        stop = min(last, self.max_pages)
+        if year is not None and rows and min(r['Date'] for r in rows) < f"{year}-01-01":
+            stop = 1
+
+        next_page = 2
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            while running or next_page <= stop:
+                if cancelled is not None and cancelled():
+                    stop = min(stop, next_page - 1)
+                while next_page <= stop and len(running) < self.workers:
+                    running[pool.submit(self._page, client, username, next_page)] = next_page
+                    next_page += 1
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = running.pop(future)
+                    result = future.result() if future.exception() is None else None
+                    if result is None:
+                        continue
+                    pages[page] = result[0]
+                    # Pages are newest first: once one reaches back past the
+                    # target year, the ones after it can't be in it
+                    if year is not None and result[0] and min(r['Date'] for r in result[0]) < f"{year}-01-01":
+                        stop = min(stop, page)
+
+        entries = [row for page in sorted(pages) if page <= stop for row in pages[page]]
+        if year is not None:
+            entries = [row for row in entries if row['Date'].startswith(f"{year}-")]
+        if cancelled is not None and cancelled():
+            return None, "Cancelled."
+        with self._lock:
+            self.diaries += 1
+            self.rows += len(entries)
+            self.seconds += time.perf_counter() - started
+        if not entries:
+            return None, "No diary entries found" + (f" for {year}." if year is not None else ".")
+        df = rows_to_frame(entries)
+        return df[~repeated_entries(df)].reset_index(drop=True), None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'diaries': self.diaries,
+                'pages': self.pages,
+                'failed_pages': self.failed_pages,
+                'rows': self.rows,
+                'pages_per_s': round(self.pages / self.seconds, 1) if self.seconds else 0.0,
+            }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read a user's whole diary from its pages.")
+    parser.add_argument("username")
+    parser.add_argument("--year", type=int, help="only entries watched in this year")
+    parser.add_argument("--workers", type=int, default=SCRAPE_WORKERS)
+    parser.add_argument("--rate", type=float, default=SCRAPE_RATE, help="max pages per second (0 = unlimited)")
+    parser.add_argument("--base-url", default=LETTERBOXD_BASE_URL)
+    parser.add_argument("-o", "--output", help="write the entries here (.csv or .parquet)")
+    args = parser.parse_args(argv)
+
+    scraper = DiaryScraper(base_url=args.base_url, workers=args.workers, rate=args.rate)
+    df, error = scraper.fetch(args.username, args.year)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    stats = scraper.stats()
+    print(f"{len(df)} entries from {stats['pages']} pages ({stats['failed_pages']} failed), "
+          f"{stats['pages_per_s']} pages/s", file=sys.stderr)
+    if args.output:
+        if args.output.endswith(".parquet"):
+            df.to_parquet(args.output, index=False)
+        else:
+            df.to_csv(args.output, index=False)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
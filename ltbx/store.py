@@ -0,0 +1,185 @@
+import argparse
+import glob
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from ltbx.feed import USERNAME_RE, add_calendar_columns, check_username, repeated_entries
+from ltbx.tracing import tracer
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock below
+    fcntl = None
+
+# --- DIARY STORE ---
+# Per-user history on disk, so the diary keeps growing past the 50 entries the
+# RSS feed shows. Each merge appends only the rows the store hasn't seen (by
+# guid; by date, title and year for data-export rows, which have none) as a
+# new Arrow IPC segment; reads memory-map the segments, and compaction folds
+# them back into a single file (which is what makes a load zero-copy for the
+# numeric columns). Month/Day/Decade are derived on load rather than stored.
+#
+# Merges and compactions of one user are serialized, by a lock per user
+# directory within the process and a lock file across processes (the app and
+# the store CLI, say), so two of them can't both append the same new rows.
+#
+# Layout: <root>/<username>/<timestamp>.arrow, plus <root>/<username>/.lock
+
+STORE_DIR = os.environ.get("LTBX_STORE_DIR")
+_user_locks = {}  # user directory -> threading.Lock
+_user_locks_lock = threading.Lock()
+STORE_COLUMNS = ['Guid', 'Date', 'Name', 'Year', 'Rating', 'Rewatch', 'Poster', 'Review_Words', 'Has_Review']
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('Guid', pa.string()),
+        ('Date', pa.timestamp('us')),
+        ('Name', pa.string()),
+        ('Year', pa.int16()),
+        ('Rating', pa.float32()),
+        ('Rewatch', pa.bool_()),
+        ('Poster', pa.string()),
+        ('Review_Words', pa.int32()),
+        ('Has_Review', pa.bool_()),
+    ])
+
+def _upgrade(table):
+    # Segments written before Rewatch became a bool hold 'Yes'/'No'; their
+    # pandas metadata would turn the column back into strings, so it goes too
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    i = table.schema.get_field_index('Rewatch')
+    if i < 0 or not pa.types.is_string(table.schema.field(i).type):
+        return table
+    rewatch = pc.fill_null(pc.equal(table.column(i), 'Yes'), False)
+    return table.set_column(i, pa.field('Rewatch', pa.bool_()), rewatch).replace_schema_metadata(None)
+
+class DiaryStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def _user_dir(self, username):
+        return os.path.join(self.root, check_username(username))
+
+    @contextmanager
+    def _locked(self, username):
+        path = self._user_dir(username)
+        with _user_locks_lock:
+            lock = _user_locks.setdefault(os.path.abspath(path), threading.Lock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, ".lock"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _segments(self, username):
+        return sorted(glob.glob(os.path.join(self._user_dir(username), "*.arrow")))
+
+    def usernames(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if USERNAME_RE.fullmatch(d) and self._segments(d))
+
+    def _read_table(self, username, columns=None):
+        import pyarrow as pa
+
+        tables = []
+        for path in self._segments(username):
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+            tables.append(_upgrade(table.select(columns) if columns else table))
+        return pa.concat_tables(tables) if tables else None
+
+    def known_guids(self, username):
+        table = self._read_table(username, ['Guid'])
+        if table is None:
+            return set()
+        return {guid for guid in table.column('Guid').to_pylist() if guid}
+
+    def load(self, username):
+        with tracer.span("store.read", username=username):
+            table = self._read_table(username)
+        if table is None:
+            return None
+        df = table.to_pandas(split_blocks=True)
+        # A guid is one entry, whichever segments it ended up in
+        df = df[~(df['Guid'].duplicated() & df['Guid'].notna())]
+        # The app tests posters for truthiness, so missing ones must be None
+        df['Poster'] = df['Poster'].astype(object).where(df['Poster'].notna(), None)
+        add_calendar_columns(df)
+        return df.sort_values('Date', ascending=False, kind='stable').reset_index(drop=True)
+
+    def _write_segment(self, username, df):
+        import pyarrow as pa
+
+        os.makedirs(self._user_dir(username), exist_ok=True)
+        df = df.reindex(columns=STORE_COLUMNS)
+        table = pa.Table.from_pandas(df, schema=_schema(), preserve_index=False)
+        path = os.path.join(self._user_dir(username), f"{time.time_ns()}.arrow")
+        tmp = path + ".tmp"
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+        return path
+
+    def merge(self, username, df):
+        # Appends the rows of df that aren't stored yet; returns (history, added)
+        with tracer.span("store.merge", username=username, rows=len(df)), self._locked(username):
+            return self._merge(username, df)
+
+    def _merge(self, username, df):
+        existing = self.load(username)
+        if not df.empty:
+            df = df[~repeated_entries(df, existing)]
+        if not df.empty:
+            self._write_segment(username, df)
+            return self.load(username), len(df)
+        return existing, 0
+
+    def compact(self, username):
+        # Rewrites all segments as one; returns the number of segments removed
+        with self._locked(username):
+            return self._compact(username)
+
+    def _compact(self, username):
+        segments = self._segments(username)
+        if len(segments) < 2:
+            return 0
+        df = self.load(username)
+        df = df[~repeated_entries(df)]
+        self._write_segment(username, df)
+        for path in segments:
+            os.remove(path)
+        return len(segments)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the on-disk diary store.")
+    parser.add_argument("command", choices=["compact", "list"])
+    parser.add_argument("usernames", nargs="*", help="defaults to every stored user")
+    parser.add_argument("--root", default=STORE_DIR, required=STORE_DIR is None,
+                        help="store directory (default: $LTBX_STORE_DIR)")
+    args = parser.parse_args(argv)
+
+    store = DiaryStore(args.root)
+    for username in args.usernames or store.usernames():
+        if args.command == "compact":
+            print(f"{username}: compacted {store.compact(username)} segments")
+        else:
+            df = store.load(username)
+            print(f"{username}: {0 if df is None else len(df)} entries in {len(store._segments(username))} segments")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+from collections import namedtuple
+from dataclasses import dataclass
+
+from ltbx.feed import DAY_ORDER
+from ltbx.tracing import tracer
+
+# --- WRAPPED SUMMARY ---
+# Every number the report needs, computed once per DataFrame. The helpers in
+# ltbx.analytics and the app sections read from this instead of re-filtering
+# and re-grouping the diary themselves, which is what keeps full diary exports
+# (hundreds of thousands of rows) responsive.
+
+@dataclass(frozen=True)
+class WrappedSummary:
+    total: int
+    avg_rating: float
+    avg_year: float
+    rewatches: int
+    rewatch_pct: float
+    reviews: int
+    review_pct: float
+    old_movies: int
+    recent_movies: int
+    monday_count: int
+    decade_counts: object
+    day_counts: object
+    fav_day: str
+    rating_counts: object
+    daily_counts: object
+    daily_variance: float
+    streak: int
+    streak_start: object
+    streak_end: object
+    max_binge: int
+    binge_date: str
+    top_binges: list
+    top_movies: object
+    longest_title: object
+    oldest_film: object
+    newest_film: object
+
+    @property
+    def decade_diversity(self):
+        return len(self.decade_counts)
+
+    @property
+    def top_movie(self):
+        return self.top_movies.iloc[0] if not self.top_movies.empty else None
+
+StreakStats = namedtuple('StreakStats', ['streak', 'start', 'end', 'max_binge', 'binge_date', 'top_binges'])
+
+def daily_counts(dates):
+    # Entries per calendar day, indexed by midnight timestamps in date order
+    import numpy as np
+    import pandas as pd
+
+    days = dates.to_numpy().astype('datetime64[D]')
+    days, counts = np.unique(days[~np.isnat(days)], return_counts=True)
+    return pd.Series(counts, index=pd.DatetimeIndex(days))
+
+def compute_streaks(per_day, top_n=3):
+    # Longest run of consecutive days and the busiest days, from the output of
+    # daily_counts. Works on day ordinals: a run breaks wherever the gap to the
+    # previous day isn't exactly 1, so run lengths fall out of the break offsets.
+    import numpy as np
+
+    if per_day.empty:
+        return StreakStats(0, None, None, 0, "N/A", [])
+
+    ordinals = per_day.index.to_numpy().astype('datetime64[D]').astype(np.int64)
+    counts = per_day.to_numpy()
+    breaks = np.flatnonzero(np.diff(ordinals) != 1) + 1
+    run_starts = np.concatenate(([0], breaks))
+    run_ends = np.concatenate((breaks, [len(ordinals)]))
+    best = int(np.argmax(run_ends - run_starts))  # first longest run wins ties
+
+    # Busiest days first, earliest first among equals
+    top = np.argsort(-counts, kind='stable')[:top_n]
+    top_binges = [(per_day.index[i], int(counts[i])) for i in top]
+
+    return StreakStats(
+        streak=int(run_ends[best] - run_starts[best]),
+        start=per_day.index[run_starts[best]],
+        end=per_day.index[run_ends[best] - 1],
+        max_binge=top_binges[0][1],
+        binge_date=top_binges[0][0].strftime('%b %d'),
+        top_binges=top_binges,
+    )
+
+def summarize(df, top_n=5):
+    with tracer.span("summarize", rows=len(df)):
+        return _summarize(df, top_n)
+
+def _summarize(df, top_n):
+    total = len(df)
+    ratings = df['Rating'].to_numpy()
+    years = df['Year'].to_numpy()
+    rewatched = df['Rewatch'].to_numpy(dtype=bool)
+
+    rewatches = int(rewatched.sum())
+    reviews = int(df['Has_Review'].sum())
+    day_counts = df['Day'].value_counts(sort=False).reindex(DAY_ORDER, fill_value=0)
+    per_day = daily_counts(df['Date'])
+    streaks = compute_streaks(per_day)
+
+    if total:
+        fav_day = day_counts.idxmax()
+        longest_title = df.loc[df['Name'].str.len().idxmax()]
+    else:
+        fav_day, longest_title = "N/A", None
+
+    dated = years > 0
+    oldest_film = newest_film = None
+    if dated.any():
+        dated_positions = dated.nonzero()[0]
+        oldest_film = df.iloc[dated_positions[years[dated].argmin()]]
+        newest_film = df.iloc[dated_positions[years[dated].argmax()]]
+
+    return WrappedSummary(
+        total=total,
+        avg_rating=float(ratings.mean()) if total else float('nan'),
+        avg_year=float(years.mean()) if total else float('nan'),
+        rewatches=rewatches,
+        rewatch_pct=(rewatches / total) * 100 if total else 0,
+        reviews=reviews,
+        review_pct=(reviews / total) * 100 if total else 0,
+        old_movies=int((years < 1980).sum()),
+        recent_movies=int((years > 2020).sum()),
+        monday_count=int(day_counts['Monday']),
+        decade_counts=df['Decade'].value_counts(),
+        day_counts=day_counts,
+        fav_day=fav_day,
+        rating_counts=df['Rating'].value_counts().sort_index(),
+        daily_counts=per_day,
+        daily_variance=float(per_day.var()),
+        streak=streaks.streak,
+        streak_start=streaks.start,
+        streak_end=streaks.end,
+        max_binge=streaks.max_binge,
+        binge_date=streaks.binge_date,
+        top_binges=streaks.top_binges,
+        top_movies=df.sort_values(by=['Rating', 'Date'], ascending=[False, True]).head(top_n),
+        longest_title=longest_title,
+        oldest_film=oldest_film,
+        newest_film=newest_film,
+    )
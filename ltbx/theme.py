@@ -0,0 +1,174 @@
+# --- THEME ---
+# The Letterboxd-dark styles for every report section. The Streamlit app
+# injects them into the page and ltbx.render inlines them into the static
+# pages, so both look the same. The [data-testid] rules only matter inside
+# Streamlit.
+
+REPORT_CSS = """
+    /* Dark Theme Adjustment */
+    [data-testid="stAppViewContainer"] {
+        background-color: #14181c;
+        color: #9ab;
+    }
+    [data-testid="stSidebar"] {
+        background-color: #1f252d; 
+    }
+    
+    /* Headers */
+    h1, h2, h3 {
+        color: #ffffff !important;
+        font-family: 'Helvetica', sans-serif;
+    }
+    
+    /* Metrics */
+    div[data-testid="metric-container"] {
+        background-color: #2c3440;
+        border: 1px solid #456;
+        padding: 15px;
+        border-radius: 8px;
+        color: #fff;
+    }
+    label[data-testid="stMetricLabel"] {
+        color: #00e054 !important; /* Letterboxd Green */
+        font-weight: bold;
+    }
+    div[data-testid="stMetricValue"] {
+        color: #ffffff !important;
+    }
+    
+    /* Personality Card */
+    .personality-card {
+        background: linear-gradient(135deg, #2c3e50 0%, #000000 100%);
+        border: 2px solid #00e054;
+        border-radius: 15px;
+        padding: 25px;
+        text-align: center;
+        margin-bottom: 20px;
+        box-shadow: 0 4px 15px rgba(0, 224, 84, 0.2);
+    }
+    .personality-entry {
+        margin-bottom: 20px;
+        padding-bottom: 15px;
+        border-bottom: 1px solid rgba(255,255,255,0.1);
+    }
+    .personality-entry:last-child {
+        border-bottom: none;
+        margin-bottom: 0;
+        padding-bottom: 0;
+    }
+    .personality-title {
+        font-size: 2.2em;
+        font-weight: bold;
+        color: #00e054;
+        margin-bottom: 5px;
+        line-height: 1.2;
+    }
+    .personality-desc {
+        font-size: 1.1em;
+        color: #fff;
+        font-style: italic;
+    }
+
+    /* Poster Grid */
+    .poster-container {
+        display: flex;
+        flex-wrap: wrap;
+        gap: 10px;
+        justify-content: center;
+        padding: 20px 0;
+    }
+    .poster-img {
+        border-radius: 4px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.5);
+        transition: transform 0.2s;
+        width: 100px; 
+    }
+    @media only screen and (max-width: 600px) {
+      .poster-img {
+        width: 70px;
+      }
+    }
+    .poster-sprite {
+        display: inline-block;
+        aspect-ratio: 2 / 3;
+        background-repeat: no-repeat;
+    }
+    .poster-img:hover {
+        transform: scale(1.05);
+        z-index: 10;
+    }
+    
+    /* Fun Stat Box */
+    .fun-stat-box {
+        background-color: #2c3440;
+        padding: 15px;
+        border-radius: 8px;
+        text-align: center;
+        border: 1px solid #456;
+        height: 100%;
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+    }
+    
+    /* Roast Bubble */
+    .roast-box {
+        background: linear-gradient(45deg, #1f252d, #2c0000);
+        border-left: 5px solid #ff4040;
+        padding: 20px;
+        margin: 20px 0;
+        border-radius: 8px;
+        font-size: 1.3em;
+        font-style: italic;
+        color: #ffcccc;
+        text-align: center;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.3);
+    }
+
+    /* Cine-MBTI */
+    .mbti-container {
+        display: flex;
+        justify-content: center;
+        gap: 20px;
+        margin: 20px 0;
+        flex-wrap: wrap;
+    }
+    .mbti-letter {
+        font-size: 3em;
+        font-weight: bold;
+        color: #00e054;
+        text-shadow: 0 0 10px rgba(0, 224, 84, 0.3);
+    }
+    .mbti-desc {
+        color: #9ab;
+        font-size: 0.9em;
+    }
+    
+    /* Soundtrack List */
+    .song-row {
+        display: flex; 
+        align-items: center; 
+        padding: 10px; 
+        background: #1f252d; 
+        margin-bottom: 8px; 
+        border-radius: 8px;
+        border-left: 4px solid #40bcf4;
+    }
+    .song-icon { font-size: 1.5em; margin-right: 15px; }
+    .song-info { display: flex; flex-direction: column; }
+    .song-title { font-weight: bold; color: #fff; }
+    .song-artist { font-size: 0.9em; color: #9ab; }
+    
+    /* Buttons */
+    .stButton>button {
+        background-color: #00e054;
+        color: #14181c;
+        border: none;
+        font-weight: bold;
+        width: 100%;
+    }
+    .stButton>button:hover {
+        background-color: #40bcf4; /* Letterboxd Blue */
+        color: #fff;
+    }
+"""
@@ -0,0 +1,284 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# --- TRACING ---
+# Lightweight spans around each stage of a report (fetch, parse, analytics,
+# rendering). Off by default: a disabled tracer hands out one shared no-op
+# span, so instrumented code pays an attribute check and nothing else.
+#
+#   with tracer.span("feed.fetch", username=username):
+#       ...
+#
+# Finished spans are kept in a bounded ring buffer and aggregated per name;
+# they can be streamed as JSON lines to a log file and exported as Prometheus
+# text or a Chrome trace (open it in chrome://tracing or ui.perfetto.dev).
+# With memory tracking on, each span also records its tracemalloc peak above
+# the memory in use when it started. tracemalloc is process-wide, so with
+# several threads a span's peak includes whatever the others allocated.
+#
+# Spans finished in an executor worker process are captured there and sent
+# back with the job's result, then merged into the submitting process's
+# tracer on its timeline (they keep the worker's pid).
+#
+# Switch it on with LTBX_PROFILE=1 (LTBX_PROFILE_MEMORY=1 adds tracemalloc,
+# LTBX_TRACE_LOG=<path> streams spans) or with --profile on the CLIs.
+
+PROFILE = os.environ.get("LTBX_PROFILE", "") == "1"
+PROFILE_MEMORY = os.environ.get("LTBX_PROFILE_MEMORY", "") == "1"
+TRACE_LOG = os.environ.get("LTBX_TRACE_LOG")
+TRACE_BUFFER_SIZE = 10_000
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.peak_seen = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        if self.tracer.memory:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.peak_seen = max(self.parent.peak_seen, peak)
+            tracemalloc.reset_peak()
+            self.start_memory = current
+        self.wall = time.time()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self.start
+        peak_bytes = None
+        if self.tracer.memory:
+            import tracemalloc
+
+            peak = max(tracemalloc.get_traced_memory()[1], self.peak_seen)
+            peak_bytes = max(0, peak - self.start_memory)
+            if self.parent is not None:
+                self.parent.peak_seen = max(self.parent.peak_seen, peak)
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._finish(self, duration, peak_bytes)
+        return False
+
+class Tracer:
+    def __init__(self, enabled=False, memory=False, log_path=None, max_spans=TRACE_BUFFER_SIZE):
+        self.enabled = False
+        self.memory = False
+        self.spans = deque(maxlen=max_spans)
+        self.totals = {}
+        self._log = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._capture = None
+        self._origin = time.perf_counter_ns()
+        self._origin_wall = time.time()
+        if enabled:
+            self.enable(memory=memory, log_path=log_path)
+
+    def enable(self, memory=False, log_path=None):
+        if memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        if log_path:
+            self._log = sys.stderr if log_path == "-" else open(log_path, "a", encoding="utf-8")
+        self.memory = memory
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self.memory:
+            import tracemalloc
+
+            tracemalloc.stop()
+            self.memory = False
+        if self._log is not None and self._log is not sys.stderr:
+            self._log.close()
+        self._log = None
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, span, duration_ns, peak_bytes):
+        record = {
+            'name': span.name,
+            'start_us': (span.start - self._origin) // 1000,
+            'duration_ms': round(duration_ns / 1e6, 3),
+            'wall_time': round(span.wall, 6),
+            'pid': os.getpid(),
+            'thread': threading.get_ident(),
+            'parent': span.parent.name if span.parent is not None else None,
+        }
+        if peak_bytes is not None:
+            record['peak_bytes'] = peak_bytes
+        if span.attrs:
+            record['attrs'] = span.attrs
+        with self._lock:
+            if self._capture is not None:
+                self._capture.append(record)
+                return
+        self._record(record, duration_ns / 1e9, peak_bytes)
+
+    def _record(self, record, seconds, peak_bytes):
+        with self._lock:
+            self.spans.append(record)
+            totals = self.totals.get(record['name'])
+            if totals is None:
+                totals = self.totals[record['name']] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'peak_bytes': 0,
+                                                   'buckets': [0] * len(LATENCY_BUCKETS)}
+            totals['count'] += 1
+            totals['sum'] += seconds
+            totals['max'] = max(totals['max'], seconds)
+            if peak_bytes is not None:
+                totals['peak_bytes'] = max(totals['peak_bytes'], peak_bytes)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    totals['buckets'][i] += 1
+            if self._log is not None:
+                self._log.write(json.dumps(record, default=str) + "\n")
+                self._log.flush()
+
+    @contextmanager
+    def capture(self):
+        # For a job in a worker process: tracing on, and every span finished
+        # until the block ends goes to the yielded list instead of this
+        # tracer. A worker runs one job at a time, so nothing else is caught.
+        enabled = self.enabled
+        captured = []
+        with self._lock:
+            self.enabled = True
+            self._capture = captured
+        try:
+            yield captured
+        finally:
+            with self._lock:
+                self._capture = None
+                self.enabled = enabled
+
+    def merge(self, records):
+        # Adds spans captured in another process as if they had finished
+        # here, moved onto this tracer's timeline by their wall-clock start
+        for record in records:
+            record = dict(record, start_us=round((record['wall_time'] - self._origin_wall) * 1e6))
+            self._record(record, record['duration_ms'] / 1000, record.get('peak_bytes'))
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.totals.clear()
+
+    # --- exports ---
+
+    def summary(self):
+        # {name: {count, total_ms, mean_ms, max_ms[, peak_bytes]}}, slowest first
+        with self._lock:
+            totals = {name: dict(t) for name, t in self.totals.items()}
+        rows = {}
+        for name, t in sorted(totals.items(), key=lambda item: -item[1]['sum']):
+            rows[name] = {
+                'count': t['count'],
+                'total_ms': round(t['sum'] * 1000, 2),
+                'mean_ms': round(t['sum'] * 1000 / t['count'], 3),
+                'max_ms': round(t['max'] * 1000, 3),
+            }
+            if self.memory:
+                rows[name]['peak_bytes'] = t['peak_bytes']
+        return rows
+
+    def prometheus(self):
+        with self._lock:
+            totals = {name: dict(t, buckets=list(t['buckets'])) for name, t in self.totals.items()}
+        lines = [
+            "# HELP ltbx_span_duration_seconds Time spent in each traced stage.",
+            "# TYPE ltbx_span_duration_seconds histogram",
+        ]
+        for name, t in sorted(totals.items()):
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for bound, count in zip(LATENCY_BUCKETS, t['buckets']):
+                lines.append(f'ltbx_span_duration_seconds_bucket{{span="{label}",le="{bound}"}} {count}')
+            lines.append(f'ltbx_span_duration_seconds_bucket{{span="{label}",le="+Inf"}} {t["count"]}')
+            lines.append(f'ltbx_span_duration_seconds_sum{{span="{label}"}} {t["sum"]:.6f}')
+            lines.append(f'ltbx_span_duration_seconds_count{{span="{label}"}} {t["count"]}')
+        if self.memory:
+            lines.append("# HELP ltbx_span_peak_memory_bytes Highest tracemalloc peak seen inside each stage.")
+            lines.append("# TYPE ltbx_span_peak_memory_bytes gauge")
+            for name, t in sorted(totals.items()):
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'ltbx_span_peak_memory_bytes{{span="{label}"}} {t["peak_bytes"]}')
+        return "\n".join(lines) + "\n"
+
+    def chrome_trace(self):
+        with self._lock:
+            spans = list(self.spans)
+        events = []
+        for record in spans:
+            args = dict(record.get('attrs', {}))
+            if 'peak_bytes' in record:
+                args['peak_bytes'] = record['peak_bytes']
+            events.append({
+                'name': record['name'],
+                'cat': record['name'].split('.')[0],
+                'ph': 'X',
+                'ts': record['start_us'],
+                'dur': round(record['duration_ms'] * 1000),
+                'pid': record['pid'],
+                'tid': record['thread'],
+                'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, directory):
+        # Dumps spans.jsonl, trace.json (Chrome) and metrics.prom; returns the paths
+        os.makedirs(directory, exist_ok=True)
+        paths = {name: os.path.join(directory, name) for name in ("spans.jsonl", "trace.json", "metrics.prom")}
+        with self._lock:
+            spans = list(self.spans)
+        with open(paths["spans.jsonl"], "w", encoding="utf-8") as f:
+            for record in spans:
+                f.write(json.dumps(record, default=str) + "\n")
+        with open(paths["trace.json"], "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        with open(paths["metrics.prom"], "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        return paths
+
+# Process-wide tracer used by the instrumented code
+tracer = Tracer(enabled=PROFILE, memory=PROFILE_MEMORY, log_path=TRACE_LOG)
@@ -0,0 +1,336 @@
+import json
+import os
+import threading
+from collections import namedtuple
+
+from ltbx.feed import FeedCache
+from ltbx.summary import summarize
+from ltbx.tracing import tracer
+
+# --- CINEMATIC TWINS ---
+# "Your closest cinematic twin": the user whose diary looks most like yours.
+# Each user becomes a taste vector with two parts:
+#
+#   films   sparse, one weight per film watched (Name|Year); a watched film
+#           counts 1.0, a rated one 0.6-1.5 by stars, L2-normalized
+#   traits  dense: share of films per decade plus the four Cine-MBTI axes as
+#           signed distances from their thresholds, L2-normalized
+#
+# and similarity is (1 - TWIN_TRAIT_WEIGHT) * film similarity (cosine, or
+# Jaccard over the film sets) + TWIN_TRAIT_WEIGHT * trait cosine.
+#
+# The index keeps the film weights twice: per user (CSR) to read a user's own
+# vector, and per film (CSC) so a query only touches the postings of films it
+# shares with others and scores everyone with one bincount. Users added since
+# the last rebuild sit in a small delta that is scanned directly, and the
+# main segment is rebuilt once the delta outgrows an eighth of it, so adding
+# a user is cheap and rebuild cost is amortized. Re-adding a user replaces
+# their old vector; the old row is skipped until the next rebuild drops it
+# and renumbers the rest.
+
+TWIN_INDEX_PATH = os.environ.get("LTBX_TWIN_INDEX")
+TWIN_TRAIT_WEIGHT = 0.3
+TWIN_DELTA_MIN = 50_000  # delta postings always allowed before a rebuild
+DECADES = list(range(1920, 2030, 10))  # earlier films count towards the 1920s
+TRAIT_DIM = len(DECADES) + 4
+
+TasteVector = namedtuple('TasteVector', ['films', 'weights', 'traits'])
+Twin = namedtuple('Twin', ['username', 'score', 'shared'])  # shared: up to 5 "Name (Year)" in common
+
+def encode(df, summary=None):
+    # TasteVector for one diary: film keys, their weights and the trait vector
+    import numpy as np
+
+    summary = summary or summarize(df)
+    keys = (df['Name'].astype(str) + '|' + df['Year'].astype(str)).to_numpy()
+    best = df['Rating'].groupby(keys).max()  # a rewatch keeps the best rating
+    ratings = best.to_numpy(dtype=np.float64)
+    weights = np.where(ratings > 0, 0.5 + ratings / 5, 1.0)
+    weights /= np.linalg.norm(weights) if len(weights) else 1.0
+
+    years = df['Year'].to_numpy()
+    years = years[years > 0]
+    buckets = np.clip((years - DECADES[0]) // 10, 0, len(DECADES) - 1).astype(np.int64)
+    decades = np.bincount(buckets, minlength=len(DECADES)) / max(len(years), 1)
+    axes = np.nan_to_num(np.clip([
+        (summary.rewatch_pct - 20) / 20,
+        (summary.avg_year - 2010) / 30,
+        summary.avg_rating - 3.2,
+        (summary.daily_variance - 1.5) / 1.5,
+    ], -1, 1))
+    traits = np.concatenate([decades, axes])
+    norm = np.linalg.norm(traits)
+    return TasteVector(list(best.index), weights.astype(np.float32),
+                       (traits / norm if norm else traits).astype(np.float32))
+
+def _grow(array, size):
+    # array with room for at least `size` rows, doubling the capacity
+    import numpy as np
+
+    if len(array) >= size:
+        return array
+    grown = np.zeros((max(size, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+class TwinIndex:
+    def __init__(self, trait_weight=TWIN_TRAIT_WEIGHT, delta_min=TWIN_DELTA_MIN):
+        import numpy as np
+
+        self.trait_weight = trait_weight
+        self.delta_min = delta_min
+        self.film_ids = {}  # "Name|Year" -> film id
+        self.film_keys = []
+        self.usernames = []  # row -> username
+        self.rows = {}  # normalized username -> current row
+        self._n = 0
+        self._traits = np.zeros((0, TRAIT_DIM), np.float32)
+        self._sizes = np.zeros(0, np.int32)  # films per row, for Jaccard
+        self._alive = np.zeros(0, bool)
+        # Main segment: rows [0, len(indptr) - 1)
+        self._indptr = np.zeros(1, np.int64)
+        self._films = np.zeros(0, np.int32)
+        self._weights = np.zeros(0, np.float32)
+        self._film_ptr = np.zeros(1, np.int64)
+        self._post_rows = np.zeros(0, np.int32)
+        self._post_weights = np.zeros(0, np.float32)
+        # Delta: rows added since the last rebuild, as (row, film ids, weights)
+        self._delta = []
+        self._delta_postings = 0
+        self._delta_arrays = None
+        self.rebuilds = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, username, df, summary=None):
+        return self.add_vector(username, encode(df, summary))
+
+    def add_vector(self, username, vector):
+        import numpy as np
+
+        key = FeedCache.normalize(username)
+        with self._lock:
+            ids = np.empty(len(vector.films), np.int32)
+            for i, film in enumerate(vector.films):
+                film_id = self.film_ids.get(film)
+                if film_id is None:
+                    film_id = self.film_ids[film] = len(self.film_keys)
+                    self.film_keys.append(film)
+                ids[i] = film_id
+            previous = self.rows.get(key)
+            if previous is not None:
+                self._alive[previous] = False
+            row = self._n
+            self._n += 1
+            self._traits = _grow(self._traits, self._n)
+            self._sizes = _grow(self._sizes, self._n)
+            self._alive = _grow(self._alive, self._n)
+            self._traits[row] = vector.traits
+            self._sizes[row] = len(ids)
+            self._alive[row] = True
+            self.usernames.append(username)
+            self.rows[key] = row
+            self._delta.append((row, ids, np.asarray(vector.weights, np.float32)))
+            self._delta_postings += len(ids)
+            self._delta_arrays = None
+            if self._delta_postings > max(self.delta_min, len(self._films) // 8):
+                self._rebuild()
+            return self.rows[key]
+
+    def _rebuild(self):
+        # Folds the delta into the main segment and drops replaced rows,
+        # renumbering the live ones so their slots are reclaimed
+        import numpy as np
+
+        with tracer.span("twins.rebuild", rows=self._n, delta=len(self._delta)):
+            n = self._n
+            alive = self._alive[:n].copy()
+            main_rows = len(self._indptr) - 1
+            lengths = np.zeros(n, np.int64)
+            lengths[:main_rows] = np.diff(self._indptr)
+            films, weights = [self._films], [self._weights]
+            for row, ids, row_weights in self._delta:
+                lengths[row] = len(ids)
+                films.append(ids)
+                weights.append(row_weights)
+            films, weights = np.concatenate(films), np.concatenate(weights)
+            rows = np.repeat(np.arange(n, dtype=np.int32), lengths)
+            keep = alive[rows]
+            renumber = (np.cumsum(alive) - 1).astype(np.int32)
+            films, weights, rows = films[keep], weights[keep], renumber[rows[keep]]
+
+            self._n = int(alive.sum())
+            self._traits = self._traits[:n][alive]
+            self._sizes = self._sizes[:n][alive]
+            self._alive = np.ones(self._n, bool)
+            self.usernames = [name for name, live in zip(self.usernames, alive) if live]
+            self.rows = {key: int(renumber[row]) for key, row in self.rows.items()}
+            self._indptr = np.concatenate([[0], np.cumsum(lengths[alive])])
+            self._films, self._weights = films, weights
+            self._build_postings(rows)
+            self._delta = []
+            self._delta_postings = 0
+            self._delta_arrays = None
+            self.rebuilds += 1
+
+    def _build_postings(self, rows):
+        # The per-film (CSC) view of the main segment; rows is the row of each posting
+        import numpy as np
+
+        order = np.argsort(self._films, kind='stable')
+        self._post_rows, self._post_weights = rows[order], self._weights[order]
+        per_film = np.bincount(self._films, minlength=len(self.film_keys))
+        self._film_ptr = np.concatenate([[0], np.cumsum(per_film)])
+
+    def _delta_concat(self):
+        import numpy as np
+
+        if self._delta_arrays is None:
+            if self._delta:
+                self._delta_arrays = (
+                    np.concatenate([np.full(len(ids), row, np.int32) for row, ids, _ in self._delta]),
+                    np.concatenate([ids for _, ids, _ in self._delta]),
+                    np.concatenate([w for _, _, w in self._delta]),
+                )
+            else:
+                empty = np.zeros(0, np.int32)
+                self._delta_arrays = (empty, empty, np.zeros(0, np.float32))
+        return self._delta_arrays
+
+    def _row_vector(self, row):
+        # (film ids, weights) stored for one row
+        main_rows = len(self._indptr) - 1
+        if row < main_rows:
+            start, end = self._indptr[row], self._indptr[row + 1]
+            return self._films[start:end], self._weights[start:end]
+        for delta_row, ids, weights in self._delta:
+            if delta_row == row:
+                return ids, weights
+        raise KeyError(row)
+
+    def _scores(self, ids, weights, traits, metric, query_films):
+        import numpy as np
+
+        n = self._n
+        order = np.argsort(ids)
+        ids, weights = ids[order], weights[order]
+        ones = metric == "jaccard"
+
+        known = ids[ids < len(self._film_ptr) - 1]
+        starts, ends = self._film_ptr[known], self._film_ptr[known + 1]
+        post_rows = [self._post_rows[s:e] for s, e in zip(starts, ends)]
+        if ones:
+            post_weights = None
+        else:
+            query_weights = weights[ids < len(self._film_ptr) - 1]
+            post_weights = np.concatenate([self._post_weights[s:e] * w
+                                           for s, e, w in zip(starts, ends, query_weights)] or [np.zeros(0)])
+        post_rows = np.concatenate(post_rows or [np.zeros(0, np.int32)])
+        films = np.bincount(post_rows, weights=post_weights, minlength=n).astype(np.float64)
+
+        delta_rows, delta_films, delta_weights = self._delta_concat()
+        if len(delta_rows) and len(ids):
+            positions = np.searchsorted(ids, delta_films)
+            positions[positions == len(ids)] = 0
+            match = ids[positions] == delta_films
+            contribution = None if ones else delta_weights[match] * weights[positions[match]]
+            films += np.bincount(delta_rows[match], weights=contribution, minlength=n)
+
+        if ones:
+            union = query_films + self._sizes[:n] - films
+            films = np.divide(films, union, out=np.zeros(n), where=union > 0)
+        trait_scores = self._traits[:n] @ traits
+        return (1 - self.trait_weight) * films + self.trait_weight * trait_scores
+
+    def search(self, vector, k=5, metric="cosine", exclude=None):
+        # Top-k Twins for a TasteVector; exclude is a username to leave out
+        import numpy as np
+
+        with self._lock, tracer.span("twins.search", users=len(self.rows), metric=metric):
+            ids = np.array([self.film_ids.get(film, -1) for film in vector.films], np.int64)
+            weights = np.asarray(vector.weights, np.float32)
+            keep = ids >= 0
+            return self._top(ids[keep], weights[keep], vector.traits, k, metric, exclude,
+                             query_films=len(vector.films))
+
+    def twins(self, username, k=5, metric="cosine"):
+        # Top-k Twins for a user already in the index
+        with self._lock, tracer.span("twins.search", users=len(self.rows), metric=metric):
+            row = self.rows[FeedCache.normalize(username)]
+            ids, weights = self._row_vector(row)
+            return self._top(ids, weights, self._traits[row], k, metric, username, query_films=len(ids))
+
+    def _top(self, ids, weights, traits, k, metric, exclude, query_films):
+        import numpy as np
+
+        n = self._n
+        if not n:
+            return []
+        scores = self._scores(ids.astype(np.int64), weights, np.asarray(traits, np.float32), metric, query_films)
+        scores[~self._alive[:n]] = -np.inf
+        if exclude is not None:
+            own = self.rows.get(FeedCache.normalize(exclude))
+            if own is not None:
+                scores[own] = -np.inf
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        query = {int(film): float(weight) for film, weight in zip(ids, weights)}
+        results = []
+        for row in top:
+            if scores[row] == -np.inf:
+                break
+            films, their_weights = self._row_vector(int(row))
+            shared = sorted(((query[int(f)] * float(w), self.film_keys[int(f)])
+                             for f, w in zip(films, their_weights) if int(f) in query), reverse=True)
+            titles = ["{} ({})".format(*key.rsplit('|', 1)) for _, key in shared[:5]]
+            results.append(Twin(self.usernames[row], float(scores[row]), titles))
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self.rows),
+                'rows': self._n,
+                'films': len(self.film_keys),
+                'postings': int(len(self._films)) + self._delta_postings,
+                'delta_users': len(self._delta),
+                'rebuilds': self.rebuilds,
+            }
+
+    # --- persistence ---
+
+    def save(self, path):
+        import numpy as np
+
+        with self._lock:
+            if self._delta:
+                self._rebuild()
+            meta = {'usernames': self.usernames, 'film_keys': self.film_keys, 'trait_weight': self.trait_weight}
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+                         traits=self._traits[:self._n], sizes=self._sizes[:self._n], alive=self._alive[:self._n],
+                         indptr=self._indptr, films=self._films, weights=self._weights)
+            os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes().decode("utf-8"))
+            index = cls(trait_weight=meta['trait_weight'])
+            index.usernames = meta['usernames']
+            index.film_keys = meta['film_keys']
+            index.film_ids = {key: i for i, key in enumerate(index.film_keys)}
+            index._traits, index._sizes, index._alive = data['traits'], data['sizes'], data['alive']
+            index._indptr, index._films, index._weights = data['indptr'], data['films'], data['weights']
+        index._n = len(index._traits)
+        index.rows = {FeedCache.normalize(name): row for row, name in enumerate(index.usernames)
+                      if index._alive[row]}
+        index._build_postings(np.repeat(np.arange(index._n, dtype=np.int32), np.diff(index._indptr)))
+        return index
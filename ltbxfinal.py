@@ -1,11 +1,51 @@
+import datetime
+import html
+import json
+import os
+import time
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import requests
-from bs4 import BeautifulSoup
-import re
-import random
+
+from ltbx import (
+    FeedCache,
+    valid_username,
+    fetch_rss_data,
+    summarize,
+    load_export,
+    DiaryStore,
+    STORE_DIR,
+    PosterCache,
+    StaticChartCache,
+    STATIC_CHARTS,
+    CHART_CONFIG,
+    rating_trend_figure,
+    rating_distribution_figure,
+    day_rhythm_figure,
+    monthly_trend_figure,
+    Rollups,
+    Community,
+    COMMUNITY_PATH,
+    percentile_lines,
+    TwinIndex,
+    TWIN_INDEX_PATH,
+    MetadataIndex,
+    METADATA_INDEX,
+    RefreshScheduler,
+    REFRESH_ENABLED,
+    DiaryScraper,
+    merge_entries,
+    Executor,
+    ExecutorBusy,
+    Cancelled,
+    EXECUTOR_ENABLED,
+    build_report,
+    report_fingerprint,
+    REPORT_CACHE_SIZE,
+    REPORT_CACHE_TTL,
+    tracer,
+    REPORT_CSS,
+    default_client,
+)
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -16,432 +56,419 @@ st.set_page_config(
 )
 
 # --- CUSTOM CSS ---
-st.markdown("""
-<style>
-    /* Dark Theme Adjustment */
-    [data-testid="stAppViewContainer"] {
-        background-color: #14181c;
-        color: #9ab;
-    }
-    [data-testid="stSidebar"] {
-        background-color: #1f252d; 
-    }
-    
-    /* Headers */
-    h1, h2, h3 {
-        color: #ffffff !important;
-        font-family: 'Helvetica', sans-serif;
-    }
-    
-    /* Metrics */
-    div[data-testid="metric-container"] {
-        background-color: #2c3440;
-        border: 1px solid #456;
-        padding: 15px;
-        border-radius: 8px;
-        color: #fff;
-    }
-    label[data-testid="stMetricLabel"] {
-        color: #00e054 !important; /* Letterboxd Green */
-        font-weight: bold;
-    }
-    div[data-testid="stMetricValue"] {
-        color: #ffffff !important;
-    }
-    
-    /* Personality Card */
-    .personality-card {
-        background: linear-gradient(135deg, #2c3e50 0%, #000000 100%);
-        border: 2px solid #00e054;
-        border-radius: 15px;
-        padding: 25px;
-        text-align: center;
-        margin-bottom: 20px;
-        box-shadow: 0 4px 15px rgba(0, 224, 84, 0.2);
-    }
-    .personality-entry {
-        margin-bottom: 20px;
-        padding-bottom: 15px;
-        border-bottom: 1px solid rgba(255,255,255,0.1);
-    }
-    .personality-entry:last-child {
-        border-bottom: none;
-        margin-bottom: 0;
-        padding-bottom: 0;
-    }
-    .personality-title {
-        font-size: 2.2em;
-        font-weight: bold;
-        color: #00e054;
-        margin-bottom: 5px;
-        line-height: 1.2;
-    }
-    .personality-desc {
-        font-size: 1.1em;
-        color: #fff;
-        font-style: italic;
-    }
+st.markdown(f"<style>{REPORT_CSS}</style>", unsafe_allow_html=True)
 
-    /* Poster Grid */
-    .poster-container {
-        display: flex;
-        flex-wrap: wrap;
-        gap: 10px;
-        justify-content: center;
-        padding: 20px 0;
-    }
-    .poster-img {
-        border-radius: 4px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.5);
-        transition: transform 0.2s;
-        width: 100px; 
-    }
-    @media only screen and (max-width: 600px) {
-      .poster-img {
-        width: 70px;
-      }
-    }
-    .poster-img:hover {
-        transform: scale(1.05);
-        z-index: 10;
-    }
-    
-    /* Fun Stat Box */
-    .fun-stat-box {
-        background-color: #2c3440;
-        padding: 15px;
-        border-radius: 8px;
-        text-align: center;
-        border: 1px solid #456;
-        height: 100%;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-    }
-    
-    /* Roast Bubble */
-    .roast-box {
-        background: linear-gradient(45deg, #1f252d, #2c0000);
-        border-left: 5px solid #ff4040;
-        padding: 20px;
-        margin: 20px 0;
-        border-radius: 8px;
-        font-size: 1.3em;
-        font-style: italic;
-        color: #ffcccc;
-        text-align: center;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.3);
-    }
+# --- SHARED RESOURCES ---
 
-    /* Cine-MBTI */
-    .mbti-container {
-        display: flex;
-        justify-content: center;
-        gap: 20px;
-        margin: 20px 0;
-        flex-wrap: wrap;
-    }
-    .mbti-letter {
-        font-size: 3em;
-        font-weight: bold;
-        color: #00e054;
-        text-shadow: 0 0 10px rgba(0, 224, 84, 0.3);
-    }
-    .mbti-desc {
-        color: #9ab;
-        font-size: 0.9em;
-    }
-    
-    /* Soundtrack List */
-    .song-row {
-        display: flex; 
-        align-items: center; 
-        padding: 10px; 
-        background: #1f252d; 
-        margin-bottom: 8px; 
-        border-radius: 8px;
-        border-left: 4px solid #40bcf4;
-    }
-    .song-icon { font-size: 1.5em; margin-right: 15px; }
-    .song-info { display: flex; flex-direction: column; }
-    .song-title { font-weight: bold; color: #fff; }
-    .song-artist { font-size: 0.9em; color: #9ab; }
-    
-    /* Buttons */
-    .stButton>button {
-        background-color: #00e054;
-        color: #14181c;
-        border: none;
-        font-weight: bold;
-        width: 100%;
-    }
-    .stButton>button:hover {
-        background-color: #40bcf4; /* Letterboxd Blue */
-        color: #fff;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def get_feed_cache():
+    return FeedCache()
 
-# --- HELPER FUNCTIONS ---
+@st.cache_resource
+def get_poster_cache():
+    return PosterCache()
 
-def fetch_rss_data(username):
-    url = f"https://letterboxd.com/{username}/rss/"
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code != 200:
-            return None, f"Could not find user '{username}' (Status: {response.status_code})"
-            
-        soup = BeautifulSoup(response.content, "html.parser")
-        items = soup.find_all('item')
-        
-        data = []
-        for item in items:
-            watched_date_tag = item.find('letterboxd:watcheddate')
-            if not watched_date_tag:
-                continue 
-            watched_date = pd.to_datetime(watched_date_tag.text)
-            
-            title_tag = item.find('letterboxd:filmtitle')
-            title = title_tag.text if title_tag else "Unknown"
-            
-            year_tag = item.find('letterboxd:filmyear')
-            year = int(year_tag.text) if year_tag and year_tag.text.isdigit() else 0
-            
-            rating_tag = item.find('letterboxd:memberrating')
-            rating = float(rating_tag.text) if rating_tag else 0.0
-            
-            rewatch_tag = item.find('letterboxd:rewatch')
-            rewatch = 'Yes' if (rewatch_tag and rewatch_tag.text == 'Yes') else 'No'
-            
-            description = item.find('description')
-            poster_url = None
-            review_length = 0
-            
-            if description:
-                desc_soup = BeautifulSoup(description.text, "html.parser")
-                img = desc_soup.find('img')
-                if img and 'src' in img.attrs:
-                    poster_url = img['src']
-                
-                for p in desc_soup.find_all('p'):
-                    if p.find('img'):
-                        p.decompose()
-                
-                text_content = desc_soup.get_text(strip=True)
-                review_length = len(text_content.split())
-            
-            data.append({
-                'Date': watched_date,
-                'Name': title,
-                'Year': year,
-                'Rating': rating,
-                'Rewatch': rewatch,
-                'Poster': poster_url,
-                'Review_Words': review_length,
-                'Has_Review': True if review_length > 5 else False
-            })
-            
-        if not data:
-            return None, "No diary entries found in RSS feed."
-            
-        df = pd.DataFrame(data)
-        df['Month'] = df['Date'].dt.month_name()
-        df['Day'] = df['Date'].dt.day_name()
-        df['Decade'] = (df['Year'] // 10) * 10
-        
-        return df, None
+@st.cache_resource
+def get_chart_cache():
+    return StaticChartCache()
 
-    except Exception as e:
-        return None, f"Error fetching RSS: {str(e)}"
+@st.cache_resource
+def get_diary_store():
+    # Only keep history on disk when a store directory is configured
+    return DiaryStore(STORE_DIR) if STORE_DIR else None
 
-def calculate_stats(df):
-    if df.empty:
-        return 0, 0, "N/A"
-    dates = sorted(df['Date'].dt.date.unique())
-    if not dates:
-        streak = 0
+@st.cache_resource
+def get_community():
+    # Percentile sketches over every user this deployment has seen
+    return Community(COMMUNITY_PATH)
+
+@st.cache_resource
+def get_metadata_index():
+    # Memory-mapped film metadata, when an index directory is configured
+    return MetadataIndex(METADATA_INDEX) if METADATA_INDEX else None
+
+@st.cache_resource
+def get_twin_index():
+    # Taste vectors of every user seen, starting from a batch-built index if configured
+    if TWIN_INDEX_PATH and os.path.exists(TWIN_INDEX_PATH):
+        return TwinIndex.load(TWIN_INDEX_PATH)
+    return TwinIndex()
+
+@st.cache_resource
+def get_user_rollups():
+    # Normalized username -> Rollups of that user's stored history
+    return {}
+
+@st.cache_resource
+def get_diary_scraper():
+    return DiaryScraper()
+
+@st.cache_resource
+def get_refresh_scheduler():
+    # Polls the feeds of users who generated a Wrapped, when enabled
+    if not REFRESH_ENABLED:
+        return None
+    return RefreshScheduler(get_feed_cache(), on_refresh=prewarm_report).start()
+
+@st.cache_resource
+def get_executor():
+    # Shared io/process pools for Generate, unless LTBX_EXECUTOR=0
+    return Executor().start() if EXECUTOR_ENABLED else None
+
+def stop_requested():
+    # A check for work started by this rerun: true once the session is no
+    # longer active in the runtime (the tab was closed). Takes the session id
+    # here on the script thread; is_active_session is safe from any thread,
+    # so the check also works from the pools'. Without a runtime (bare mode,
+    # tests) or on a Streamlit without that API, the work is never cancelled.
+    from streamlit import runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    session_id = getattr(get_script_run_ctx(suppress_warning=True), 'session_id', None)
+    is_active = getattr(runtime.get_instance(), 'is_active_session', None) \
+        if session_id is not None and runtime.exists() else None
+    if is_active is None:
+        return lambda: False
+
+    def stopped():
+        try:
+            return not is_active(session_id)
+        except Exception:
+            return False
+    return stopped
+
+@st.cache_resource
+def get_report_counters():
+    return {'lookups': 0, 'misses': 0}
+
+# --- REPORT CACHE ---
+# The whole report for a diary is cached under its fingerprint, so reruns
+# triggered by widgets only pay for a lookup. The DataFrame and rollups are
+# left out of the cache key (leading underscore); the fingerprint and the
+# rollups' token stand in for them. The rollups can cover more than the
+# DataFrame (a year of a stored history), so they need their own.
+
+@st.cache_data(max_entries=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL, show_spinner=False)
+def cached_report(fingerprint, rollups_token, _df, _rollups=None):
+    get_report_counters()['misses'] += 1
+    executor = get_executor()
+    if executor is not None:
+        return executor.build_report(_df, fingerprint, _rollups, cancelled=stop_requested())
+    return build_report(_df, fingerprint, poster_cache=get_poster_cache(), rollups=_rollups,
+                        metadata=get_metadata_index())
+
+def load_report(fingerprint, df, rollups=None):
+    get_report_counters()['lookups'] += 1
+    with tracer.span("app.report"):
+        return cached_report(fingerprint, rollups.token if rollups is not None else None, df, rollups)
+
+def update_rollups(username, fetched, history, added):
+    # Folds just the rows the store added into the user's rollups; when they
+    # don't line up with the stored history (first visit, dedupe dropped rows)
+    # the rollups are rebuilt from the history instead
+    rollups = get_user_rollups()
+    key = FeedCache.normalize(username)
+    current = rollups.get(key)
+    if current is not None and added == len(fetched) and current.total + added == len(history):
+        current = current.append(fetched)
     else:
-        longest_streak = 1
-        current_streak = 1
-        for i in range(1, len(dates)):
-            if (dates[i] - dates[i-1]).days == 1:
-                current_streak += 1
-            else:
-                longest_streak = max(longest_streak, current_streak)
-                current_streak = 1
-        streak = max(longest_streak, current_streak)
-        
-    daily_counts = df.groupby(df['Date'].dt.date).size()
-    max_binge = daily_counts.max()
-    binge_date = daily_counts.idxmax().strftime('%b %d')
-    return streak, max_binge, binge_date
+        current = Rollups.from_frame(history)
+    rollups[key] = current
+    return current
 
-def get_multi_personalities(total, avg_rating, rewatch_pct, diversity_score, review_pct):
-    personas = []
-    
-    # 1. Base Engagement
-    if total < 5:
-        personas.append(("The Casual Viewer", "Just dipping your toes in the cinematic waters."))
-        return personas # Return mainly this if data is too low
-        
-    # 2. Rating Habits
-    if avg_rating > 4.0:
-        personas.append(("The Generous Spirit", "5 stars for everyone! You love movies and they love you."))
-    elif avg_rating < 2.8:
-        personas.append(("The Harsh Critic", "Hard to please? Or maybe you just have impeccable taste."))
-        
-    # 3. Rewatch Habits
-    if rewatch_pct > 30:
-        personas.append(("The Comfort Seeker", "Why risk a bad movie when you can watch a masterpiece again?"))
-    elif rewatch_pct < 5:
-        personas.append(("The Explorer", "Always seeking something new. No looking back."))
-        
-    # 4. Era / Diversity
-    if diversity_score > 6:
-        personas.append(("The Time Traveler", "From the classics to the modern era, you see it all."))
-        
-    # 5. Review Habits
-    if review_pct > 50:
-        personas.append(("The Scribe", "You don't just watch; you document. Pen mighty!"))
-        
-    # Fallback
-    if not personas:
-        personas.append(("The Balanced Cinephile", "A perfectly balanced diet of cinema."))
-        
-    return personas
+def prewarm_report(username, fetched, new):
+    # Runs on a refresh worker once a feed changed: brings the stored history
+    # and rollups up to date and builds the report, so the user's next visit
+    # finds it all cached
+    store = get_diary_store()
+    df, rollups = fetched, None
+    if store is not None:
+        df, added = store.merge(username, new)
+        if df is None:
+            return
+        rollups = update_rollups(username, new, df, added)
+    cached_report(report_fingerprint(df), rollups.token if rollups is not None else None, df, rollups)
 
-def generate_roast(df):
-    comments = []
-    avg = df['Rating'].mean()
-    rewatch_count = df[df['Rewatch'] == 'Yes'].shape[0]
-    old_movies = df[df['Year'] < 1980].shape[0]
-    
-    # Rating specific
-    if avg > 4.5:
-        comments.append("You know 2.5 stars exists, right? Not everything is a masterpiece.")
-        comments.append("You're the person who claps when the plane lands, aren't you?")
-    elif avg < 2.5:
-        comments.append("Who hurt you? Seriously, do you even like movies?")
-        comments.append("I bet you're fun at parties. 'Actually, the book was better.'")
-        comments.append("You woke up and chose violence with these ratings.")
-    elif avg > 3.8:
-        comments.append("A little generous with the stars, are we?")
-        
-    # Rewatch specific
-    if rewatch_count > 15:
-        comments.append("Comfort movies are a cry for help. We hear you.")
-        comments.append("Trying to relive the past won't fix the present.")
-        comments.append("We get it, you really like that one movie.")
-    elif rewatch_count == 0:
-        comments.append("Commitment issues? You never call a movie back.")
-        
-    # Era specific
-    if old_movies > 15:
-        comments.append("We get it, you own a turntable and hate CGI.")
-        comments.append("Born in the wrong generation? Or just pretentious?")
-    elif df[df['Year'] > 2020].shape[0] > 20:
-        comments.append("Recency bias is a hell of a drug.")
-        
-    # Day specific
-    if df[df['Day'] == 'Monday'].shape[0] > 5:
-        comments.append("Watching movies on Monday? Avoiding responsibilities like a pro.")
-        
-    # Generic
-    if not comments:
-        comments.append("Your taste is so painfully average, I can't even roast it.")
-        comments.append("You exist. You watch movies. That's about it.")
-        comments.append("Honestly? A pretty respectable list. Boring, but respectable.")
-        
-    return random.choice(comments)
+def fetch_feed(username, **kwargs):
+    # fetch_rss_data, through the executor's pools when there is one
+    executor = get_executor()
+    if executor is None:
+        return fetch_rss_data(username, **kwargs)
+    try:
+        return executor.fetch_feed(username, cancelled=stop_requested(), **kwargs)
+    except (ExecutorBusy, Cancelled) as e:
+        return None, str(e) or "Cancelled."
 
-def calculate_cine_mbti(df):
-    # E (Explorer) vs I (Comfort)
-    rewatch_rate = (df[df['Rewatch'] == 'Yes'].shape[0] / len(df)) * 100
-    p1 = "I" if rewatch_rate > 20 else "E"
-    
-    # S (Modern) vs N (Vintage)
-    avg_year = df['Year'].mean()
-    p2 = "S" if avg_year > 2010 else "N"
-    
-    # T (Critical) vs F (Fan)
-    avg_rating = df['Rating'].mean()
-    p3 = "T" if avg_rating < 3.2 else "F"
-    
-    # J (Routine) vs P (Binge)
-    daily_variance = df.groupby(df['Date'].dt.date).size().var()
-    p4 = "P" if daily_variance > 1.5 else "J"
-    
-    code = f"{p1}{p2}{p3}{p4}"
-    meaning = {
-        "E": "Explorer (New Films)", "I": "Comfort (Rewatches)",
-        "S": "Modernist (Recent)", "N": "Historian (Classics)",
-        "T": "Critic (Analytic)", "F": "Fan (Emotional)",
-        "J": "Routine (Steady)", "P": "Binger (Spontaneous)"
-    }
-    return code, meaning
-
-def get_soundtrack_suggestions(mbti_code, df):
-    pools = {
-        "N": [("Heroes", "David Bowie"), ("Dreams", "Fleetwood Mac"), ("Space Oddity", "David Bowie"), ("There Is a Light", "The Smiths")],
-        "S": [("Blinding Lights", "The Weeknd"), ("Midnight City", "M83"), ("As It Was", "Harry Styles"), ("Espresso", "Sabrina Carpenter")],
-        "T": [("Paranoid Android", "Radiohead"), ("Psycho Killer", "Talking Heads"), ("Where Is My Mind?", "Pixies"), ("Tame Impala", "New Person")],
-        "F": [("Dancing Queen", "ABBA"), ("Mr. Brightside", "The Killers"), ("Dog Days Are Over", "Florence + The Machine"), ("Cruel Summer", "Taylor Swift")],
-        "I": [("Fast Car", "Tracy Chapman"), ("Landslide", "Fleetwood Mac"), ("Vienna", "Billy Joel"), ("Mystery of Love", "Sufjan Stevens")],
-        "E": [("Time to Pretend", "MGMT"), ("Paper Planes", "M.I.A."), ("Maps", "Yeah Yeah Yeahs"), ("Electric Feel", "MGMT")]
-    }
-    suggestions = []
-    # Dominant Traits logic
-    if "E" in mbti_code: suggestions.extend(random.sample(pools["E"], 1))
-    else: suggestions.extend(random.sample(pools["I"], 1))
-    if "N" in mbti_code: suggestions.extend(random.sample(pools["N"], 1))
-    else: suggestions.extend(random.sample(pools["S"], 1))
-    if "T" in mbti_code: suggestions.extend(random.sample(pools["T"], 1))
-    else: suggestions.extend(random.sample(pools["F"], 1))
-    
-    # Specific Movie Vibe
-    if not df.empty:
-        top_movie = df.sort_values(by=['Rating', 'Date'], ascending=[False, True]).iloc[0]
-        year = top_movie['Year']
-        if year < 1980: suggestions.append(("California Dreamin'", "The Mamas & The Papas"))
-        elif year < 1990: suggestions.append(("Everybody Wants to Rule the World", "Tears for Fears"))
-        elif year < 2000: suggestions.append(("Smells Like Teen Spirit", "Nirvana"))
-        elif year < 2010: suggestions.append(("Mr. Brightside", "The Killers"))
-        else: suggestions.append(("bad guy", "Billie Eilish"))
-            
-    avg_rating = df['Rating'].mean()
-    if avg_rating < 2.5: suggestions.append(("Creep", "Radiohead"))
-    elif avg_rating > 4.5: suggestions.append(("Walking on Sunshine", "Katrina and the Waves"))
-        
-    return list(set(suggestions))[:5]
+def deep_fetch(username, rss, year):
+    # The feed's rows plus every older entry from the diary pages; if the
+    # pages can't be read the feed's rows are kept on their own
+    executor = get_executor()
+    if executor is None:
+        scraped, error = get_diary_scraper().fetch(username, year)
+    else:
+        try:
+            scraped, error = executor.deep_fetch(get_diary_scraper(), username, year, cancelled=stop_requested())
+        except (ExecutorBusy, Cancelled) as e:
+            scraped, error = None, str(e) or "Cancelled."
+    if error:
+        st.warning(f"Only the RSS feed could be read: {error}")
+        return rss
+    return merge_entries(rss, scraped)
+
+FEED_ENTRIES = 50  # what a Letterboxd RSS feed shows
+
+def feed_window(key, history):
+    # The rows the RSS feed itself shows, out of a stored history: the feed
+    # cache's frame, else the newest FEED_ENTRIES entries
+    entry, _ = get_feed_cache().get(key)
+    if entry is not None and entry['df'] is not None:
+        return entry['df']
+    return history.head(FEED_ENTRIES).reset_index(drop=True)
+
+# Operators only: the panel shows process-wide state, spans from every
+# session included, so no visitor can switch it on from the URL
+DEBUG = os.environ.get("LTBX_DEBUG", "") == "1"
+
+def show_debug_panel(report, rerun_started):
+    counters = get_report_counters()
+    with st.sidebar.expander("🛠️ Debug"):
+        timings = st.session_state.get('render_timings', {})
+        st.caption(f"Rerun: {(time.perf_counter() - rerun_started) * 1000:.1f} ms "
+                   f"(first content after {timings.get('first_content_ms', 0):.1f} ms)")
+        st.markdown(f"**Report cache** (max {REPORT_CACHE_SIZE} entries)")
+        st.json({'hits': counters['lookups'] - counters['misses'], 'misses': counters['misses'],
+                 'fingerprint': report.fingerprint[:12]})
+        st.markdown("**Section build times (ms, on miss)**")
+        st.json(report.timings)
+        st.markdown("**Feed cache**")
+        st.json(get_feed_cache().stats())
+        st.markdown("**Letterboxd client**")
+        st.json(default_client().stats())
+        if get_refresh_scheduler() is not None:
+            st.markdown("**Background refresh**")
+            st.json(get_refresh_scheduler().stats())
+        if get_executor() is not None:
+            st.markdown("**Executor**")
+            st.json(get_executor().stats())
+        if get_diary_scraper().stats()['diaries']:
+            st.markdown("**Diary pages**")
+            st.json(get_diary_scraper().stats())
+        st.markdown("**Community**")
+        st.json(get_community().stats())
+        st.markdown("**Twin index**")
+        st.json(get_twin_index().stats())
+        if get_metadata_index() is not None:
+            st.markdown("**Film metadata**")
+            st.json(get_metadata_index().stats())
+        st.markdown("**Poster cache**")
+        st.json(get_poster_cache().stats())
+        if STATIC_CHARTS:
+            st.markdown("**Chart cache**")
+            st.json(get_chart_cache().stats())
+        if tracer.enabled:
+            st.markdown("**Traced spans**")
+            st.json(tracer.summary())
+            st.download_button("Chrome trace", json.dumps(tracer.chrome_trace(), default=str),
+                               file_name="trace.json", mime="application/json")
+            st.download_button("Prometheus metrics", tracer.prometheus(),
+                               file_name="metrics.prom", mime="text/plain")
+
+# --- CHART RENDERING ---
+
+def show_chart(name, build, fingerprint=None):
+    # Pre-rendered image when static charts are on and renderable, otherwise
+    # the regular (static-config) Plotly chart
+    with tracer.span("render.chart", chart=name) as span:
+        if fingerprint is not None:
+            charts = get_chart_cache()
+            image = charts.render(name, fingerprint, build)
+            if image:
+                span.set(static=True)
+                st.markdown(f'<img src="{charts.data_uri(image)}" style="width: 100%;">', unsafe_allow_html=True)
+                return
+        st.plotly_chart(build(), use_container_width=True, config=CHART_CONFIG)
+
+# --- DEFERRED SECTIONS ---
+# The heavy sections (charts, the poster wall, favorites with their images,
+# year over year) only get an empty container where they sit on the page
+# during the main pass, and are filled in once everything else has been
+# sent, so the header, numbers and text show up first. Each one runs as a
+# fragment: a widget inside it (the year pickers) reruns that section alone.
+# LTBX_PROGRESSIVE=0 renders them in place, without fragments.
+
+PROGRESSIVE = os.environ.get("LTBX_PROGRESSIVE", "1") == "1"
+
+class DeferredSections:
+    def __init__(self):
+        self.pending = []
+
+    def defer(self, name, render, *args):
+        slot = st.container()
+        if PROGRESSIVE:
+            self.pending.append((name, slot, render, args))
+        else:
+            self._render(name, slot, render, args)
+
+    def flush(self):
+        for name, slot, render, args in self.pending:
+            self._render(name, slot, render, args)
+        self.pending = []
+
+    @staticmethod
+    def _render(name, slot, render, args):
+        with slot, tracer.span("render.section", section=name):
+            (st.fragment(render) if PROGRESSIVE else render)(*args)
+
+def trend_section(df, total_movies, chart_key):
+    st.subheader("🎢 The Rating Rollercoaster")
+    st.caption(f"How your ratings have trended over these {total_movies} films.")
+    show_chart('trend', lambda: rating_trend_figure(df), chart_key)
+
+def poster_wall_section(posters_html):
+    st.subheader("🖼️ The Wall of Fame")
+    st.markdown(posters_html, unsafe_allow_html=True)
+
+def distribution_section(summary, chart_key):
+    col_left, col_right = st.columns(2)
+    with col_left:
+        st.subheader("⭐ Ratings Distribution")
+        show_chart('ratings', lambda: rating_distribution_figure(summary.rating_counts), chart_key)
+
+    with col_right:
+        st.subheader("🥁 Your Movie Rhythm")
+        show_chart('rhythm', lambda: day_rhythm_figure(summary.day_counts), chart_key)
+
+def favorites_section(favorites):
+    st.markdown("### 👑 Recent Favorites")
+    for name, year, rating, watched, image in favorites:
+        cols = st.columns([1, 4])
+        with cols[0]:
+            if image:
+                st.image(image, width=70)
+        with cols[1]:
+            st.markdown(f"**{name}** ({year})")
+            st.markdown(f"<span style='color:#00e054; font-weight:bold;'>{rating} ★</span> • Watched {watched}", unsafe_allow_html=True)
+
+def year_over_year_section(rollups, chart_key):
+    years = rollups.years
+    st.subheader("📆 Year over Year")
+    yoy1, yoy2 = st.columns(2)
+    year_a = yoy1.selectbox("Compare", years, index=len(years) - 2, key="yoy_a")
+    year_b = yoy2.selectbox("with", years, index=len(years) - 1, key="yoy_b")
+    before, after = rollups.wrapped_for(year_a), rollups.wrapped_for(year_b)
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric(f"Films in {year_b}", after.total, after.total - before.total)
+    m2.metric("Avg Rating", f"{after.avg_rating:.2f} ★", f"{after.avg_rating - before.avg_rating:+.2f}")
+    m3.metric("Rewatch Rate", f"{after.rewatch_pct:.0f}%", f"{after.rewatch_pct - before.rewatch_pct:+.0f} pts")
+    m4.metric("Longest Streak", f"{after.streak} days", after.streak - before.streak)
+    st.caption("Films per month, with your rating averaged over a rolling 3 months.")
+    # Drawn from the rollups, which can cover more than the diary on the page
+    show_chart('monthly', lambda: monthly_trend_figure(rollups.rolling()), chart_key and f"{chart_key}-{rollups.token}")
+    st.markdown("---")
 
 # --- MAIN APP ---
 
 def main():
+    with tracer.span("app.rerun"):
+        render_page()
+
+def render_page():
+    rerun_started = time.perf_counter()
     if 'data' not in st.session_state:
         st.session_state.data = None
     if 'username' not in st.session_state:
         st.session_state.username = ""
+    if 'period' not in st.session_state:
+        st.session_state.period = "Recent"
+    if 'fingerprint' not in st.session_state:
+        st.session_state.fingerprint = None
+    if 'rollups' not in st.session_state:
+        st.session_state.rollups = None
+    if 'feed_df' not in st.session_state:
+        st.session_state.feed_df = None
 
     # --- SIDEBAR ---
     with st.sidebar:
         st.header("⚡ Quick Wrapped")
         st.caption("Last 50 Films")
         username_input = st.text_input("Username (Public account only)", value=st.session_state.username)
+        deep = st.checkbox("Full diary", help="Also reads your diary pages, past the last 50 entries (slower)")
+        deep_year = "All Time"
+        if deep:
+            deep_year = st.selectbox("Diary year", ["All Time"] + list(range(datetime.date.today().year, 2010, -1)),
+                                     key="deep_year")
         if st.button("Generate", type="primary"):
-            if username_input:
+            if username_input and not valid_username(username_input):
+                st.error(f"'{username_input}' isn't a valid Letterboxd username")
+            elif username_input:
                 st.session_state.username = username_input
                 with st.spinner(f"Fetching..."):
-                    df, error = fetch_rss_data(username_input)
+                    store = get_diary_store()
+                    scheduler = get_refresh_scheduler()
+                    key = FeedCache.normalize(username_input)
+                    year = None if deep_year == "All Time" else deep_year
+                    rollups = None
+                    if store is None:
+                        df, error = fetch_feed(username_input, cache=get_feed_cache())
+                        if deep and not error:
+                            df = deep_fetch(username_input, df, year)
+                    elif not deep and scheduler is not None and get_feed_cache().get(key)[1] and key in get_user_rollups():
+                        # The background refresh has kept the stored history current
+                        df, error = store.load(username_input), None
+                        rollups = get_user_rollups()[key]
+                    else:
+                        fetched, error = fetch_feed(username_input, cache=get_feed_cache(),
+                                                    known_guids=store.known_guids(username_input))
+                        if deep and not error:
+                            fetched = deep_fetch(username_input, fetched, year)
+                        df = fetched
+                        if not error:
+                            df, added = store.merge(username_input, fetched)
+                            if df is not None:
+                                rollups = update_rollups(username_input, fetched, df, added)
                     if error:
                         st.error(error)
                         st.session_state.data = None
                     else:
+                        if year is not None:
+                            df = df[df['Date'].dt.year == year].reset_index(drop=True)
                         st.session_state.data = df
+                        st.session_state.fingerprint = report_fingerprint(df)
+                        st.session_state.rollups = rollups
+                        # The community and twin index only ever see the feed's
+                        # window; a stored history is reported as such
+                        if deep:
+                            st.session_state.period, st.session_state.feed_df = str(deep_year), None
+                        elif store is None:
+                            st.session_state.period, st.session_state.feed_df = "Recent", df
+                        else:
+                            st.session_state.period, st.session_state.feed_df = "Stored", feed_window(key, df)
+                        if scheduler is not None:
+                            scheduler.watch(username_input)
             else:
                 st.warning("Enter username")
         
         st.markdown("---")
-        st.caption("Note: Limited to last 50 entries due to RSS limits.")
+        st.caption("Note: Limited to last 50 entries due to RSS limits, unless Full diary is on.")
+
+        # Full history from the Letterboxd data export (Settings > Data)
+        st.header("📦 Full History")
+        export_file = st.file_uploader("Data export (.zip)", type="zip")
+        export_year = st.selectbox("Year", ["All Time"] + list(range(datetime.date.today().year, 2010, -1)))
+        if st.button("Generate from export", disabled=export_file is None):
+            with st.spinner("Reading export..."):
+                year = None if export_year == "All Time" else export_year
+                df, error = load_export(export_file, year=year)
+                if error:
+                    st.error(error)
+                    st.session_state.data = None
+                else:
+                    st.session_state.data = df
+                    st.session_state.fingerprint = report_fingerprint(df)
+                    st.session_state.rollups = None
+                    st.session_state.feed_df = None
+                    st.session_state.username = username_input or "Your"
+                    st.session_state.period = str(export_year)
 
     # --- LANDING PAGE ---
     if st.session_state.data is None:
@@ -458,49 +485,58 @@ def main():
 
     # --- PREPARE DATA ---
     df = st.session_state.data
-    total_movies = len(df)
-    avg_rating = df['Rating'].mean()
-    rewatches = df[df['Rewatch'] == 'Yes'].shape[0]
-    rewatch_pct = (rewatches / total_movies) * 100 if total_movies > 0 else 0
-    reviews_count = df['Has_Review'].sum()
-    review_pct = (reviews_count / total_movies) * 100 if total_movies > 0 else 0
-    decade_counts = df['Decade'].value_counts()
-    streak, max_binge, binge_date = calculate_stats(df)
+    try:
+        report = load_report(st.session_state.fingerprint, df, st.session_state.rollups)
+    except (ExecutorBusy, Cancelled) as e:
+        st.warning(str(e) or "Cancelled.")
+        return
+    summary = report.summary
+    total_movies = summary.total
+    avg_rating = summary.avg_rating
+    review_pct = summary.review_pct
+    chart_key = report.chart_key if STATIC_CHARTS else None
     
     # 1. Header & Personality (UPDATED TO SHOW ALL)
-    st.title(f"🎬 {st.session_state.username}'s Recent Wrapped")
-    
-    personas = get_multi_personalities(total_movies, avg_rating, rewatch_pct, len(decade_counts), review_pct)
-    
-    # Construct HTML for ALL personalities found - NO INDENTATION TO FIX RENDERING BUG
-    persona_html = """<div class="personality-card">
-<div style="font-size: 1.5em; color: #9ab; margin-bottom: 20px;">Your Cinematic Archetypes</div>"""
-    
-    for p_title, p_desc in personas:
-        persona_html += f"""
-<div class="personality-entry">
-<div class="personality-title">{p_title}</div>
-<div class="personality-desc">"{p_desc}"</div>
-</div>"""
-    
-    persona_html += "</div>"
-    st.markdown(persona_html, unsafe_allow_html=True)
+    owner = "Your" if st.session_state.username == "Your" else f"{st.session_state.username}'s"
+    st.title(f"🎬 {owner} {st.session_state.period} Wrapped")
+    st.markdown(report.persona_html, unsafe_allow_html=True)
 
     # 2. Key Metrics
     st.markdown("### 📊 The Numbers")
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Recent Logs", total_movies)
+    col1.metric({"Recent": "Recent Logs", "Stored": "Stored Logs"}.get(st.session_state.period, "Logs"), total_movies)
     col2.metric("Avg Rating", f"{avg_rating:.2f} ★")
     col3.metric("Review Rate", f"{review_pct:.0f}%")
-    avg_year = int(df['Year'].mean()) if not df['Year'].eq(0).all() else "N/A"
+    avg_year = int(summary.avg_year) if summary.oldest_film is not None else "N/A"
     col4.metric("Avg Release Year", avg_year)
+    first_content = time.perf_counter() - rerun_started
+    sections = DeferredSections()
+
+    # Where this diary sits among everyone else's (RSS feeds only, so every
+    # user is compared over the same kind of window)
+    feed_df = st.session_state.feed_df
+    in_community = feed_df is not None and st.session_state.username != "Your"
+    if in_community:
+        community = get_community()
+        if st.session_state.get('community_fingerprint') != report.fingerprint:
+            feed_summary = summary if feed_df is df else summarize(feed_df)
+            community.ingest(st.session_state.username, feed_summary)
+            community.maybe_save()
+            twins = get_twin_index()
+            twins.add(st.session_state.username, feed_df, feed_summary)
+            st.session_state.twin = next(iter(twins.twins(st.session_state.username, k=1)), None)
+            st.session_state.feed_summary = feed_summary
+            st.session_state.community_fingerprint = report.fingerprint
+        lines = percentile_lines(community.percentiles(st.session_state.feed_summary))
+        if lines:
+            st.markdown("### 🌍 You vs the Community")
+            st.markdown("\n".join(f"- **{line}**" for line in lines))
 
     st.markdown("---")
     
     # 3. Cinematic Roast
     st.subheader("🔥 Cinematic Roast")
-    snark = generate_roast(df)
-    st.markdown(f"""<div class="roast-box">"{snark}"</div>""", unsafe_allow_html=True)
+    st.markdown(f"""<div class="roast-box">"{html.escape(report.roast)}"</div>""", unsafe_allow_html=True)
     
     st.markdown("---")
     
@@ -508,13 +544,14 @@ def main():
     st.subheader("🧬 Your Movie DNA (Cine-MBTI)")
     st.caption("A personality type based on your **viewing habits** (Eras, Ratings, Consistency).")
     
-    mbti_code, mbti_meaning = calculate_cine_mbti(df)
-    
-    mbti_html = "<div class='mbti-container'>"
-    for char in mbti_code:
-        mbti_html += f"<div style='text-align:center;'><div class='mbti-letter'>{char}</div><div class='mbti-desc'>{mbti_meaning[char]}</div></div>"
-    mbti_html += "</div>"
-    st.markdown(mbti_html, unsafe_allow_html=True)
+    st.markdown(report.mbti_html, unsafe_allow_html=True)
+
+    # Closest diary among everyone else's
+    twin = st.session_state.get('twin') if in_community else None
+    if twin is not None and twin.shared:
+        st.subheader("👯 Your Cinematic Twin")
+        st.markdown(f"**{twin.username}** is a {twin.score * 100:.0f}% taste match.")
+        st.caption("You both watched " + ", ".join(twin.shared))
     
     st.markdown("---")
     
@@ -523,107 +560,68 @@ def main():
     
     fs1, fs2, fs3, fs4 = st.columns(4)
     
-    with fs1:
-        st.markdown(f"""<div class="fun-stat-box"><div style="font-size: 2em;">🔥</div><div>Best Streak</div><div style="font-size: 1.5em; font-weight: bold; color: #fff;">{streak} Days</div></div>""", unsafe_allow_html=True)
-    with fs2:
-        st.markdown(f"""<div class="fun-stat-box"><div style="font-size: 2em;">🍿</div><div>Biggest Binge</div><div style="font-size: 1.5em; font-weight: bold; color: #fff;">{max_binge} Films</div></div>""", unsafe_allow_html=True)
-        
-    vibe = "Balanced"
-    if avg_rating > 3.5: vibe = "Positive Vibes Only"
-    elif avg_rating < 2.8: vibe = "Tough Critic"
-    elif rewatch_pct > 50: vibe = "Nostalgic"
-    
-    with fs3:
-        st.markdown(f"""<div class="fun-stat-box"><div style="font-size: 2em;">✨</div><div>The Vibe</div><div style="font-size: 1.2em; font-weight: bold; color: #fff;">{vibe}</div></div>""", unsafe_allow_html=True)
-    
-    day_counts = df['Day'].value_counts()
-    fav_day = day_counts.idxmax() if not day_counts.empty else "N/A"
-    with fs4:
-        st.markdown(f"""<div class="fun-stat-box"><div style="font-size: 2em;">📅</div><div>Movie Night</div><div style="font-size: 1.5em; font-weight: bold; color: #fff;">{fav_day}s</div></div>""", unsafe_allow_html=True)
+    for col, box in zip((fs1, fs2, fs3, fs4), report.flash_html):
+        with col:
+            st.markdown(box, unsafe_allow_html=True)
+
+    # Genres, runtimes and directors from the metadata index, when there is one
+    films = report.metadata
+    if films is not None and films.matched:
+        st.markdown("### 🎞️ Beyond the Diary")
+        md1, md2, md3, md4 = st.columns(4)
+        md1.metric("Hours Watched", f"{films.hours:,.0f}")
+        md2.metric("Top Genre", films.genre_counts.index[0] if len(films.genre_counts) else "N/A")
+        md3.metric("Top Director", films.director_counts.index[0] if len(films.director_counts) else "N/A")
+        md4.metric("Countries", len(films.country_counts))
+        if films.longest_film is not None:
+            longest = films.longest_film
+            st.caption(f"Longest sit: {longest['Name']} ({int(longest['Runtime'])} min). "
+                       f"Matched {films.matched} of {films.total} entries to the film database.")
 
     st.markdown("---")
     
     # 6. Rating Rollercoaster
-    st.subheader("🎢 The Rating Rollercoaster")
-    st.caption("How your ratings have trended over these 50 films.")
-    
-    df_trend = df.sort_values(by='Date').reset_index(drop=True)
-    df_trend['Rolling_Avg'] = df_trend['Rating'].rolling(window=5, min_periods=1).mean()
-    
-    fig_trend = go.Figure()
-    fig_trend.add_trace(go.Scatter(x=df_trend['Date'], y=df_trend['Rating'], mode='markers', name='Rating', marker=dict(color='#40bcf4', size=8, opacity=0.6)))
-    fig_trend.add_trace(go.Scatter(x=df_trend['Date'], y=df_trend['Rolling_Avg'], mode='lines', name='Trend (5-film avg)', line=dict(color='#00e054', width=3)))
-    fig_trend.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#fff", yaxis=dict(range=[0, 5.5], title="Stars"), margin=dict(t=10, b=10), showlegend=False)
-    st.plotly_chart(fig_trend, use_container_width=True, config={'staticPlot': True, 'displayModeBar': False})
+    sections.defer('trend', trend_section, df, total_movies, chart_key)
     
     st.markdown("---")
 
     # 7. The Poster Wall
-    st.subheader("🖼️ The Wall of Fame")
-    posters_html = '<div class="poster-container">'
-    for _, row in df.iterrows():
-        if row['Poster']:
-            posters_html += f'<img src="{row["Poster"]}" class="poster-img" title="{row["Name"]} ({row["Year"]})">'
-    posters_html += '</div>'
-    st.markdown(posters_html, unsafe_allow_html=True)
+    sections.defer('posters', poster_wall_section, report.posters_html)
 
     # 8. Title Superlatives & Time Warp
     st.markdown("### 🏆 Fun Superlatives")
-    valid_years = df[df['Year'] > 0]
     
     col_sup1, col_sup2, col_sup3 = st.columns(3)
     with col_sup1:
-        longest_title = df.loc[df['Name'].str.len().idxmax()]
+        longest_title = summary.longest_title
         st.info(f"**📝 Longest Title:**\n\n{longest_title['Name']}")
     with col_sup2:
-         if not valid_years.empty:
-            oldest_film = valid_years.loc[valid_years['Year'].idxmin()]
+         if summary.oldest_film is not None:
+            oldest_film = summary.oldest_film
             st.success(f"**🕰️ Oldest Film:**\n\n{oldest_film['Name']} ({oldest_film['Year']})")
     with col_sup3:
-        if not valid_years.empty:
-            newest_film = valid_years.loc[valid_years['Year'].idxmax()]
+        if summary.newest_film is not None:
+            newest_film = summary.newest_film
             st.warning(f"**🆕 Newest Film:**\n\n{newest_film['Name']} ({newest_film['Year']})")
 
     st.markdown("---")
 
     # 9. Charts: Ratings & Rhythm
-    col_left, col_right = st.columns(2)
-    with col_left:
-        st.subheader("⭐ Ratings Distribution")
-        rating_counts = df['Rating'].value_counts().sort_index()
-        colors = ['#ff8000' if r >= 4 else '#40bcf4' if r >= 2.5 else '#667788' for r in rating_counts.index]
-        fig_rating = go.Figure(data=[go.Bar(x=rating_counts.index, y=rating_counts.values, marker_color=colors, text=rating_counts.values, textposition='auto')])
-        fig_rating.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#fff", margin=dict(t=20, b=20), xaxis=dict(tickmode='linear', tick0=0.5, dtick=0.5, title="Stars"), yaxis=dict(showgrid=False, visible=False))
-        st.plotly_chart(fig_rating, use_container_width=True, config={'staticPlot': True, 'displayModeBar': False})
-
-    with col_right:
-        st.subheader("🥁 Your Movie Rhythm")
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_counts_radar = df['Day'].value_counts().reindex(day_order, fill_value=0)
-        fig_radar = go.Figure(data=go.Scatterpolar(r=day_counts_radar.values, theta=day_order, fill='toself', line_color='#00e054'))
-        fig_radar.update_layout(polar=dict(bgcolor="#1f252d", radialaxis=dict(visible=True, gridcolor="#456"), angularaxis=dict(color="#fff")), paper_bgcolor="rgba(0,0,0,0)", font_color="#fff", margin=dict(t=20, b=20, l=40, r=40))
-        st.plotly_chart(fig_radar, use_container_width=True, config={'staticPlot': True, 'displayModeBar': False})
+    sections.defer('distribution', distribution_section, summary, chart_key)
 
     # 10. Top Rated List
-    st.markdown("### 👑 Recent Favorites")
-    top_movies = df.sort_values(by=['Rating', 'Date'], ascending=[False, True]).head(5)
-    for i, row in top_movies.iterrows():
-        cols = st.columns([1, 4])
-        with cols[0]:
-            if row['Poster']:
-                st.image(row['Poster'], width=70)
-        with cols[1]:
-            st.markdown(f"**{row['Name']}** ({row['Year']})")
-            st.markdown(f"<span style='color:#00e054; font-weight:bold;'>{row['Rating']} ★</span> • Watched {row['Date'].strftime('%b %d')}", unsafe_allow_html=True)
+    sections.defer('favorites', favorites_section, report.favorites)
 
     st.markdown("---")
 
-    # 11. Soundtrack of the Year
+    # 11. Year over Year (full histories only)
+    if len(report.rollups.years) > 1:
+        sections.defer('year_over_year', year_over_year_section, report.rollups, chart_key)
+
+    # 12. Soundtrack of the Year
     st.subheader("🎵 The Soundtrack of Your Year")
     st.caption("A dynamic playlist based on your Movie MBTI and Top Hits.")
-    playlist = get_soundtrack_suggestions(mbti_code, df)
-    for song, artist in playlist:
-        st.markdown(f"""<div class="song-row"><div class="song-icon">🎵</div><div class="song-info"><span class="song-title">{song}</span><span class="song-artist">{artist}</span></div></div>""", unsafe_allow_html=True)
+    st.markdown(report.playlist_html, unsafe_allow_html=True)
 
     # Footer
     st.markdown("---")
@@ -633,5 +631,16 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+    text_done = time.perf_counter() - rerun_started
+    sections.flush()
+    st.session_state.render_timings = {
+        'first_content_ms': round(first_content * 1000, 1),
+        'text_ms': round(text_done * 1000, 1),
+        'total_ms': round((time.perf_counter() - rerun_started) * 1000, 1),
+    }
+
+    if DEBUG:
+        show_debug_panel(report, rerun_started)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from benchmarks.stub_server import StubServer
+from ltbx import FeedCache, HttpClient, fetch_rss_data
+
+# The feed cache against the local stub, which serves the recorded feeds in
+# fixtures/feeds (by username) and answers If-None-Match with a 304. Time is a
+# fake clock, so TTLs expire when a test says so.
+
+FEEDS = os.path.join(os.path.dirname(__file__), "fixtures", "feeds")
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def stub():
+    with StubServer(feeds_dir=FEEDS) as server:
+        yield server
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def fetch(stub, username, cache, client=None):
+    df, error = fetch_rss_data(username, cache=cache, base_url=stub.base_url, client=client or HttpClient())
+    assert error is None
+    return df
+
+def test_fresh_entry_is_served_from_memory(stub, clock):
+    cache = FeedCache(ttl=60, clock=clock)
+    client = HttpClient()
+    first = fetch(stub, "diary", cache, client)
+    clock.now = 59
+    second = fetch(stub, "Diary", cache, client)
+    pd.testing.assert_frame_equal(first, second)
+    assert stub.requests == 1
+    assert (cache.hits, cache.misses, cache.revalidations) == (1, 1, 0)
+
+def test_copies_are_handed_out(stub, clock):
+    cache = FeedCache(ttl=60, clock=clock)
+    client = HttpClient()
+    df = fetch(stub, "diary", cache, client)
+    df.loc[0, 'Name'] = "changed"
+    assert fetch(stub, "diary", cache, client).loc[0, 'Name'] == "Past Lives"
+
+def test_expired_entry_is_revalidated_with_304(stub, clock):
+    cache = FeedCache(ttl=60, clock=clock)
+    client = HttpClient()
+    fetch(stub, "diary", cache, client)
+    parsed = cache.get("diary")[0]['df']
+    clock.now = 60
+    assert cache.get("diary")[1] is False
+    fetch(stub, "diary", cache, client)
+    assert stub.requests == 2
+    assert (cache.misses, cache.revalidations) == (1, 1)
+    # The 304 kept the parsed frame and restarted its TTL
+    entry, fresh = cache.get("diary")
+    assert entry['df'] is parsed and fresh
+    clock.now = 100
+    fetch(stub, "diary", cache, client)
+    assert stub.requests == 2
+
+def test_changed_feed_is_parsed_again(stub, clock):
+    cache = FeedCache(ttl=60, clock=clock)
+    client = HttpClient()
+    before = fetch(stub, "someone", cache, client)
+    etag = cache.get("someone")[0]['etag']
+    stub.publish("someone", 2)
+    clock.now = 61
+    after = fetch(stub, "someone", cache, client)
+    assert (cache.misses, cache.revalidations) == (2, 0)
+    assert cache.get("someone")[0]['etag'] != etag
+    assert after['Guid'].tolist()[2:] == before['Guid'].tolist()[:-2]
+
+def test_least_recently_used_is_evicted(stub, clock):
+    cache = FeedCache(ttl=60, max_entries=2, clock=clock)
+    client = HttpClient()
+    fetch(stub, "alice", cache, client)
+    fetch(stub, "bob", cache, client)
+    fetch(stub, "alice", cache, client)  # a hit, so bob is now the oldest
+    fetch(stub, "carol", cache, client)
+    assert cache.evictions == 1
+    assert cache.get("bob") == (None, False)
+    assert cache.get("alice")[0] is not None and cache.get("carol")[0] is not None
+    requests = stub.requests
+    fetch(stub, "bob", cache, client)
+    assert stub.requests == requests + 1
+    assert cache.get("alice") == (None, False)
+
+def test_expired_entry_is_served_while_upstream_fails(stub, clock):
+    cache = FeedCache(ttl=60, clock=clock)
+    client = HttpClient(retries=0)
+    first = fetch(stub, "diary", cache, client)
+    clock.now = 120
+    stub.fail_next(1)
+    pd.testing.assert_frame_equal(fetch(stub, "diary", cache, client), first)
+    assert cache.stale == 1
+
+def test_failure_without_a_cached_copy(stub, clock):
+    stub.fail_next(1)
+    df, error = fetch_rss_data("diary", cache=FeedCache(clock=clock), base_url=stub.base_url,
+                               client=HttpClient(retries=0))
+    assert df is None and "503" in error
+
+@pytest.mark.parametrize("refresh_first", [True, False])
+def test_background_refresh_shares_a_users_download(stub, clock, refresh_first):
+    from ltbx import RefreshScheduler
+
+    cache = FeedCache(ttl=60, clock=clock)
+    client = HttpClient()
+    scheduler = RefreshScheduler(cache, client=client, base_url=stub.base_url, clock=clock)
+    stub.latency = 0.3
+    results = {}
+
+    def refresh():
+        results['refresh'] = scheduler.refresh("diary")
+
+    def generate():
+        results['generate'] = fetch(stub, "diary", cache, client)
+
+    first, second = (refresh, generate) if refresh_first else (generate, refresh)
+    thread = threading.Thread(target=first)
+    thread.start()
+    time.sleep(0.1)
+    second()
+    thread.join()
+    assert stub.requests == 1 and client.flights.coalesced == 1
+    assert results['refresh'] == 'new' and len(results['generate']) == 9
+    assert cache.get("diary")[0] is not None
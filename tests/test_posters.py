@@ -0,0 +1,101 @@
+import http.server
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from ltbx import HttpClient, PosterCache
+from ltbx.posters import allowed_url
+
+# Poster fetching is driven by URLs from feed content: only allowlisted
+# hosts, no redirects, a byte cap and a pixel cap.
+
+def jpeg(width, height):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(out, "JPEG")
+    return out.getvalue()
+
+def png_bomb(width, height):
+    # Tiny on the wire, huge once decoded
+    out = io.BytesIO()
+    Image.new("1", (width, height)).save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+@pytest.fixture(scope="module")
+def images():
+    files = {
+        "/poster.jpg": jpeg(230, 345),
+        "/big.jpg": jpeg(230, 345) + b"\0" * 200_000,
+        "/bomb.png": png_bomb(20_000, 20_000),
+    }
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/redirect":
+                self.send_response(302)
+                self.send_header("Location", "/poster.jpg")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = files.get(self.path)
+            self.send_response(200 if body else 404)
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def cache(tmp_path):
+    return PosterCache(str(tmp_path), client=HttpClient(retries=0), hosts={"127.0.0.1"}, max_bytes=100_000)
+
+def test_allowed_url():
+    assert allowed_url("https://a.ltrbxd.com/resized/film-poster/1/2/3-0-230-0-345-crop.jpg")
+    assert allowed_url("https://image.tmdb.org/t/p/w500/poster.jpg")
+    assert not allowed_url("http://169.254.169.254/latest/meta-data/")
+    assert not allowed_url("https://a.ltrbxd.com.evil.example/poster.jpg")
+    assert not allowed_url("file:///etc/passwd")
+
+def test_poster_from_allowed_host(images, cache):
+    thumb = cache.thumbnail(images + "/poster.jpg", 100)
+    with Image.open(io.BytesIO(thumb)) as img:
+        assert img.size == (100, 150)
+    assert cache.stats()['fetches'] == 1
+
+def test_other_hosts_are_refused(images, tmp_path):
+    cache = PosterCache(str(tmp_path), client=HttpClient(retries=0))
+    assert cache.thumbnail(images + "/poster.jpg") is None
+    assert cache.stats()['refused'] == 1 and cache.stats()['fetches'] == 0
+
+@pytest.mark.parametrize("path", ["/big.jpg", "/bomb.png", "/redirect", "/missing.jpg"])
+def test_unsafe_or_missing_posters_fail(images, cache, path):
+    assert cache.thumbnail(images + path) is None
+    assert cache.stats()['failures'] == 1
+
+def test_failed_urls_expire_and_are_capped(images, tmp_path):
+    now = [1000.0]
+    cache = PosterCache(str(tmp_path), memory_entries=4, client=HttpClient(retries=0), hosts={"127.0.0.1"},
+                        clock=lambda: now[0])
+    for i in range(10):
+        assert cache.thumbnail(f"{images}/missing-{i}.jpg") is None
+    assert cache.stats()['failed_urls'] == 4
+    # Past the retry window the old entries go as soon as another is added
+    now[0] += 601
+    cache.thumbnail(images + "/missing-new.jpg")
+    assert cache.stats()['failed_urls'] == 1
+
+def test_thumbnails_reuse_one_pool(images, cache):
+    urls = [images + "/poster.jpg"] * 3
+    assert all(cache.thumbnails(urls))
+    pool = cache._pool
+    assert all(cache.thumbnails(urls)) and cache._pool is pool
+    cache.close()
+    assert cache._pool is None
@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks.synthetic import make_diary_frame
+from ltbx import build_report, render_html
+
+# Film names and poster URLs come from the feed; whatever they hold must come
+# out of the report's HTML fragments and the static page as text.
+
+NAME = '"><script>alert(1)</script><img src=x onerror=alert(2)>'
+URL = 'https://a.ltrbxd.com/p.jpg" onerror="alert(3)'
+
+@pytest.fixture(scope="module")
+def report_and_df():
+    df = make_diary_frame(30, seed=1)
+    df['Name'] = NAME
+    df['Rating'] = 5.0
+    df['Poster'] = URL
+    return build_report(df, seed=0), df
+
+def assert_inert(fragment):
+    assert "<script>" not in fragment
+    assert "<img src=x" not in fragment
+    assert '" onerror="' not in fragment
+
+def test_report_fragments_escape_feed_values(report_and_df):
+    report, _ = report_and_df
+    assert "&lt;script&gt;" in report.posters_html
+    assert "&quot; onerror=&quot;alert(3)" in report.posters_html
+    for fragment in (report.posters_html, report.persona_html, report.mbti_html, report.playlist_html,
+                     *report.flash_html):
+        assert_inert(fragment)
+
+def test_static_page_escapes_feed_values(report_and_df):
+    report, df = report_and_df
+    page = render_html(report, df, "someone", charts="none")
+    assert_inert(page)
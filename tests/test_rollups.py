@@ -0,0 +1,25 @@
+import pytest
+
+from benchmarks.synthetic import make_diary_frame
+from ltbx import Rollups
+from ltbx.rollups import COMPARE_METRICS
+
+# Rollups kept up to date with append() against ones built from scratch.
+
+def test_append_matches_a_rebuild():
+    df = make_diary_frame(400, seed=3)
+    appended = Rollups.from_frame(df[100:]).append(df[:100])
+    rebuilt = Rollups.from_frame(df)
+    assert appended.token == rebuilt.token
+    for year in [None] + rebuilt.years:
+        a, b = appended.wrapped_for(year), rebuilt.wrapped_for(year)
+        assert [getattr(a, m) for m in COMPARE_METRICS] == pytest.approx([getattr(b, m) for m in COMPARE_METRICS])
+
+def test_token_changes_with_entries_outside_a_year():
+    # A report for one year of a history is cached by that year's rows, so
+    # the rollups' token must tell it when another year gained entries
+    df = make_diary_frame(400, seed=3)
+    years = sorted(df['Date'].dt.year.unique())
+    older = df[df['Date'].dt.year == years[0]]
+    rollups = Rollups.from_frame(df.drop(older.index[:5]))
+    assert rollups.append(older[:5]).token != rollups.token
@@ -0,0 +1,97 @@
+import os
+import random
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_rules import (
+    FixedPicks,
+    check_scores,
+    reference_mbti,
+    reference_personas,
+    reference_roast_lines,
+    reference_soundtrack,
+    summary_at,
+    synthetic_features,
+)
+from ltbx.analytics import calculate_cine_mbti, generate_roast, get_multi_personalities, get_soundtrack_suggestions
+from ltbx.rules import playlist, score
+
+# The rule tables against the if/elif chains they replaced (kept in
+# benchmarks/bench_rules.py), through the single-user helpers and through
+# score(), on synthetic users with many values right on the thresholds.
+
+USERS = 20_000
+
+@pytest.fixture(scope="module")
+def columns():
+    return synthetic_features(USERS, seed=0)
+
+def summaries(columns):
+    return (summary_at(columns, i) for i in range(USERS))
+
+def persona_args(summary):
+    return summary.total, summary.avg_rating, summary.rewatch_pct, summary.decade_diversity, summary.review_pct
+
+def test_personas_match_chains(columns):
+    for i, summary in enumerate(summaries(columns)):
+        assert get_multi_personalities(*persona_args(summary)) == reference_personas(*persona_args(summary)), i
+
+def test_roasts_match_chains(columns):
+    for i, summary in enumerate(summaries(columns)):
+        expected = random.Random(i).choice(reference_roast_lines(summary))
+        assert generate_roast(None, summary, rng=random.Random(i)) == expected, i
+
+def test_mbti_matches_chains(columns):
+    for i, summary in enumerate(summaries(columns)):
+        assert calculate_cine_mbti(None, summary)[0] == reference_mbti(summary), i
+
+def test_playlists_match_chains(columns):
+    for i, summary in enumerate(summaries(columns)):
+        for code in (reference_mbti(summary), "ISTP", "ENFJ"):
+            expected = reference_soundtrack(code, summary, random.Random(i))
+            assert get_soundtrack_suggestions(code, None, summary, rng=random.Random(i)) == expected, (i, code)
+
+def test_vectorized_scores_match_chains(columns):
+    check_scores(score(columns, seed=0), columns, USERS)
+
+def test_same_seed_same_picks(columns):
+    first, second = score(columns, seed=3), score(columns, seed=3)
+    assert np.array_equal(first.roast_pick, second.roast_pick)
+    assert np.array_equal(first.song_picks, second.song_picks)
+    assert [first.playlist(i) for i in range(100)] == [second.playlist(i) for i in range(100)]
+
+# --- PLAYLIST ORDER ---
+# The baseline returned list(set(songs))[:5], whose order (and, past five
+# songs, content) followed string hashing. Now it is the MBTI pool songs in
+# axis order, then the era song, then the mood song, repeats dropped where
+# they come again.
+
+def test_playlist_order():
+    # E -> "Time to Pretend", N -> "Heroes", F -> "Dancing Queen"
+    songs = playlist("ENFP", {'top_year': 1985, 'avg_rating': 4.8}, FixedPicks([0.0, 0.0, 0.0]))
+    assert songs == [("Time to Pretend", "MGMT"), ("Heroes", "David Bowie"), ("Dancing Queen", "ABBA"),
+                     ("Everybody Wants to Rule the World", "Tears for Fears"),
+                     ("Walking on Sunshine", "Katrina and the Waves")]
+
+def test_playlist_repeat_keeps_first_place():
+    # F's pool and the 2000s era both suggest "Mr. Brightside"
+    songs = playlist("ISFJ", {'top_year': 2005, 'avg_rating': 2.0}, FixedPicks([0.0, 0.0, 0.3]))
+    assert songs == [("Fast Car", "Tracy Chapman"), ("Blinding Lights", "The Weeknd"),
+                     ("Mr. Brightside", "The Killers"), ("Creep", "Radiohead")]
+
+def test_playlist_without_top_film_or_mood():
+    songs = playlist("ISTJ", {'top_year': float('nan'), 'avg_rating': 3.5}, FixedPicks([0.99, 0.99, 0.99]))
+    assert songs == [("Mystery of Love", "Sufjan Stevens"), ("Espresso", "Sabrina Carpenter"),
+                     ("Tame Impala", "New Person")]
+
+def test_playlist_independent_of_hash_seed():
+    code = ("import random; from ltbx.rules import playlist; "
+            "print(playlist('ENTP', {'top_year': 1975, 'avg_rating': 1.0}, random.Random(7)))")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    outputs = {subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root,
+                              env={**os.environ, 'PYTHONHASHSEED': seed}).stdout
+               for seed in ("0", "1", "2")}
+    assert len(outputs) == 1
@@ -0,0 +1,21 @@
+from ltbx.scrape import merge_entries, rows_to_frame
+
+# Combining the feed with entries read from the diary pages.
+
+def row(guid, date, name, poster=None):
+    return {'Guid': guid, 'Date': date, 'Name': name, 'Year': 1995, 'Rating': 4.0, 'Rewatch': False,
+            'Poster': poster, 'Review_Words': 0, 'Has_Review': False}
+
+def test_same_day_rewatch_from_the_pages_is_kept():
+    rss = rows_to_frame([row("letterboxd-watch-1", "2024-05-01", "Heat", poster="heat.jpg")])
+    scraped = rows_to_frame([row("letterboxd-watch-1", "2024-05-01", "Heat"),
+                             row("letterboxd-watch-2", "2024-05-01", "Heat")])
+    df = merge_entries(rss, scraped)
+    assert sorted(df['Guid']) == ["letterboxd-watch-1", "letterboxd-watch-2"]
+    # The feed's copy wins
+    assert df.set_index('Guid').loc["letterboxd-watch-1", 'Poster'] == "heat.jpg"
+
+def test_rows_without_a_guid_match_on_date_title_and_year():
+    rss = rows_to_frame([row("letterboxd-watch-1", "2024-05-01", "Heat")])
+    scraped = rows_to_frame([row(None, "2024-05-01", "Heat"), row(None, "2024-05-02", "Ronin")])
+    assert sorted(merge_entries(rss, scraped)['Name']) == ["Heat", "Ronin"]
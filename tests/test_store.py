@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from ltbx.store import DiaryStore
+
+# Merging into the on-disk store: which rows count as already stored.
+
+def entries(*rows):
+    # (guid, date, name) -> a diary frame shaped like the feed's
+    return pd.DataFrame({
+        'Guid': [guid for guid, _, _ in rows],
+        'Date': pd.to_datetime([date for _, date, _ in rows]),
+        'Name': [name for _, _, name in rows],
+        'Year': [1995] * len(rows),
+        'Rating': [4.0] * len(rows),
+        'Rewatch': [False] * len(rows),
+        'Poster': [None] * len(rows),
+        'Review_Words': [0] * len(rows),
+        'Has_Review': [False] * len(rows),
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    return DiaryStore(str(tmp_path))
+
+def test_same_day_rewatch_is_kept(store):
+    df = entries(("letterboxd-watch-1", "2024-05-01", "Heat"), ("letterboxd-watch-2", "2024-05-01", "Heat"))
+    history, added = store.merge("bob", df)
+    assert added == 2 and len(history) == 2
+    assert store.known_guids("bob") == {"letterboxd-watch-1", "letterboxd-watch-2"}
+    # Nothing is new the second time round
+    assert store.merge("bob", df)[1] == 0
+
+def test_known_guid_is_not_added_again(store):
+    store.merge("bob", entries(("letterboxd-watch-1", "2024-05-01", "Heat")))
+    history, added = store.merge("bob", entries(("letterboxd-watch-1", "2024-05-01", "Heat"),
+                                                ("letterboxd-watch-3", "2024-05-02", "Ronin")))
+    assert added == 1 and sorted(history['Name']) == ["Heat", "Ronin"]
+
+def test_export_rows_match_on_date_title_and_year(store):
+    store.merge("bob", entries(("letterboxd-watch-1", "2024-05-01", "Heat")))
+    exported = entries((None, "2024-05-01", "Heat"), (None, "2024-05-03", "Collateral")).drop(columns=['Guid'])
+    history, added = store.merge("bob", exported)
+    assert added == 1 and sorted(history['Name']) == ["Collateral", "Heat"]
+
+def test_compaction_keeps_same_day_rewatches(store):
+    store.merge("bob", entries(("letterboxd-watch-1", "2024-05-01", "Heat")))
+    store.merge("bob", entries(("letterboxd-watch-2", "2024-05-01", "Heat")))
+    assert store.compact("bob") == 2
+    assert len(store.load("bob")) == 2
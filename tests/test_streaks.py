@@ -0,0 +1,71 @@
+import random
+
+import pandas as pd
+import pytest
+
+from benchmarks.bench_streak import legacy_stats, random_diary, vectorized_stats
+from ltbx import compute_streaks, daily_counts
+
+# The run-length streaks against the original loop, on random diaries where
+# runs, gaps and repeated days are all common, and on the edge cases spelled
+# out. The loop can't take an empty diary, so that case is checked on its own.
+
+def diary(*days):
+    return pd.DataFrame({'Date': pd.to_datetime(list(days))})
+
+def streaks_of(df):
+    return compute_streaks(daily_counts(df['Date']))
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_diaries_match_loop(seed):
+    df = random_diary(random.Random(seed))
+    assert vectorized_stats(df) == legacy_stats(df)
+    streaks = streaks_of(df)
+    assert (streaks.end - streaks.start).days + 1 == streaks.streak
+
+def test_empty_diary():
+    streaks = streaks_of(diary())
+    assert (streaks.streak, streaks.max_binge, streaks.binge_date, streaks.top_binges) == (0, 0, "N/A", [])
+    assert streaks.start is None and streaks.end is None
+
+@pytest.mark.parametrize("df", [
+    diary("2024-05-04"),
+    diary("2024-05-04", "2024-05-04", "2024-05-04"),
+    diary("2024-05-04 09:30", "2024-05-04 23:59"),
+], ids=["one-entry", "same-day", "times-of-day"])
+def test_single_day(df):
+    assert vectorized_stats(df) == legacy_stats(df)
+    streaks = streaks_of(df)
+    assert streaks.streak == 1
+    assert streaks.start == streaks.end == pd.Timestamp("2024-05-04")
+    assert streaks.max_binge == len(df)
+
+@pytest.mark.parametrize("df, streak, start", [
+    (diary("2024-01-01", "2024-01-03", "2024-01-05"), 1, "2024-01-01"),
+    (diary("2024-01-01", "2024-01-02", "2024-01-04", "2024-01-05", "2024-01-06"), 3, "2024-01-04"),
+    (diary("2024-02-28", "2024-02-29", "2024-03-01", "2024-06-01"), 3, "2024-02-28"),
+    (diary("2023-12-31", "2024-01-01", "2024-03-10", "2024-03-11"), 2, "2023-12-31"),
+], ids=["no-runs", "later-run", "leap-day", "tie-first-wins"])
+def test_gaps(df, streak, start):
+    assert vectorized_stats(df) == legacy_stats(df)
+    streaks = streaks_of(df)
+    assert streaks.streak == streak
+    assert streaks.start == pd.Timestamp(start)
+
+def test_duplicate_dates_and_order():
+    df = diary("2024-03-03", "2024-03-01", "2024-03-02", "2024-03-01", "2024-03-03", "2024-03-01")
+    assert vectorized_stats(df) == legacy_stats(df)
+    streaks = streaks_of(df)
+    assert streaks.streak == 3
+    assert streaks.top_binges == [(pd.Timestamp("2024-03-01"), 3), (pd.Timestamp("2024-03-03"), 2),
+                                  (pd.Timestamp("2024-03-02"), 1)]
+
+def test_binge_ties_go_to_the_earliest_day():
+    df = diary("2024-07-09", "2024-07-09", "2024-07-02", "2024-07-02")
+    assert vectorized_stats(df) == legacy_stats(df)
+    assert streaks_of(df).binge_date == "Jul 02"
+
+def test_missing_dates_are_ignored():
+    df = diary("2024-01-01", None, "2024-01-02")
+    streaks = streaks_of(df)
+    assert (streaks.streak, streaks.max_binge) == (2, 1)
@@ -0,0 +1,41 @@
+import itertools
+
+import pytest
+
+from benchmarks.bench_twins import brute_force, synthetic_population
+from ltbx.twins import TwinIndex
+
+# The twin index against a brute-force scan, with users coming back.
+
+@pytest.fixture(scope="module")
+def population():
+    return list(synthetic_population(600, seed=1))
+
+def test_readding_users_reclaims_rows(population):
+    # A tiny delta so rebuilds happen along the way
+    index = TwinIndex(delta_min=500)
+    first, returning = population[:200], population[200:]
+    for username, vector in first:
+        index.add_vector(username, vector)
+    # The same 200 users come back with new diaries, twice
+    latest = dict(first)
+    for (username, _), (_, vector) in zip(itertools.cycle(first), returning):
+        index.add_vector(username, vector)
+        latest[username] = vector
+    assert len(index) == 200 and index.rebuilds > 0
+    # Only rows replaced since the last rebuild still take a slot
+    stats = index.stats()
+    assert stats['rows'] - len(index) <= stats['delta_users'] < 50
+    assert len(index.usernames) == stats['rows']
+    for username in list(latest)[:20]:
+        expected = brute_force(latest, username, 5, index.trait_weight, "cosine")
+        assert [twin.username for twin in index.twins(username, k=5)] == expected
+
+def test_save_and_load_after_readds(population, tmp_path):
+    index = TwinIndex(delta_min=100)
+    for username, vector in population[:50] + [(name, vector) for (name, _), (_, vector)
+                                               in zip(population[:50], population[50:100])]:
+        index.add_vector(username, vector)
+    loaded = TwinIndex.load(index.save(str(tmp_path / "twins.npz")))
+    assert loaded.stats()['rows'] == len(loaded) == 50
+    assert loaded.twins("user0", k=3) == index.twins("user0", k=3)